@@ -10,6 +10,10 @@
     const pubsPath = 'data/openalex_all_authors_last5y_key_fields_dedup.csv';
     const authorshipsPath = 'data/openalex_all_authors_last5y_key_fields.csv'; // pre-dedup, optional
     const perAuthorPath = 'data/openalex_all_authors_last5y_key_fields_dedup_per_author.csv';  // NEW
+    const searchIndexPath = 'data/openalex_search_index.json';  // optional, built by the ETL
+    const termTablesPath = 'data/openalex_wordcloud_terms.json';  // optional, built by the ETL
+    const manifestPath = 'data/partitions/manifest.json';  // optional: year/author partitions of the two pubs CSVs
+    const assetManifestPath = 'data/static/manifest.json';  // optional: content-hashed, precompressed copies (etl/assets.py)
     
     // In-memory data
     let rosterData = [];   // faculty roster + metrics
@@ -17,6 +21,11 @@
     let perAuthorData = []; // NEW: per-author projection (one row per (work, cohort-author))
     let yearBounds = { min: DEFAULT_START_YEAR, max: DEFAULT_END_YEAR };
     let authorshipData = null;
+    let searchIndex = null; // { docSet: Set(work id), docs: [...], postings: Map(token -> [doc idx]) }
+    let termTables = null;  // { terms, docOf: Map(work id -> doc idx), concepts/topics: [[term id]], authorYear/ownerYear }
+    let partitionState = null; // { dedup: [entries], perAuthor: Map(author id -> entry), loaded: Set(path), ready: Set(path), loading }
+    let initialPartitions = []; // year partitions fetched with the first load
+    let assetMap = null;       // Map(path under data/ -> { path: 'static/<name>.<hash>.<ext>', sha256, bytes })
 
     // Focus (single author) state
     let focusedAuthorID = null;
@@ -51,17 +60,32 @@
     }
 
     
-    // Load both CSVs, then initialize
-    Promise.all([
+    // Load the static bundle manifest and the partition manifest (if any), then the CSVs, then initialize.
+    // With a bundle, every file is fetched under its content-hashed name (cacheable for good);
+    // the bundle manifest itself is revalidated on every load.
+    // With a partition manifest, only the year partitions for the default window are fetched up front;
+    // per-author partitions are pulled in by ensurePartitionsFor() for the authors on screen.
+    fetch(assetManifestPath, { cache: 'no-cache' }).then(r => r.ok ? r.json() : null).catch(() => null)
+      .then(assets => { assetMap = loadAssetManifest(assets); return fetchJSONIfExists(manifestPath); })
+      .then(manifest => {
+      partitionState = initPartitions(manifest);
+      initialPartitions = partitionState ? neededDedupPartitions() : [];
+      return Promise.all([
       fetchCSV(rosterPath),
-      fetchCSV(pubsPath),
+      partitionState ? fetchPartitions(initialPartitions) : fetchCSV(pubsPath),
       fetchCSVIfExists(authorshipsPath),
-      fetchCSVIfExists(perAuthorPath)])
-      .then(([rosterCSV, pubsCSV, authCSV, perAuthorCSV]) => {
+      partitionState ? Promise.resolve(null) : fetchCSVIfExists(perAuthorPath),
+      fetchJSONIfExists(searchIndexPath),
+      fetchJSONIfExists(termTablesPath)]);
+    })
+      .then(([rosterCSV, pubsCSV, authCSV, perAuthorCSV, indexJSON, termsJSON]) => {
       rosterData = parseCSV(rosterCSV);
-      pubData = parseCSV(pubsCSV);
+      pubData = Array.isArray(pubsCSV) ? pubsCSV : parseCSV(pubsCSV);
+      if (partitionState) markPartitionsReady(initialPartitions);
       authorshipData = authCSV ? parseCSV(authCSV) : [];
       perAuthorData = perAuthorCSV ? parseCSV(perAuthorCSV) : [];  // NEW
+      searchIndex = loadSearchIndex(indexJSON);
+      termTables = loadTermTables(termsJSON);
 
       normalizeRoster();
       normalizePubsFor(pubData);
@@ -75,15 +99,146 @@
       initYearInputs();
       bindEvents();
       ensurePcaSearchUI();
-      update();                 // IMPORTANT: forces initial render (fixes “needs a filter change”)
-      document.getElementById('loading-banner')?.classList.add('hidden');
+      update();                 // IMPORTANT: forces initial render (fixes “needs a filter change”); hides the banner
       }).catch(err => console.error('Failed to load CSVs', err));
 
 
     // ============ Core helpers ============
     function fetchCSVIfExists(path){
-      return fetch(path).then(r => r.ok ? r.text() : null).catch(() => null);
+      return fetch(assetURL(path)).then(r => r.ok ? r.text() : null).catch(() => null);
       }
+    function fetchJSONIfExists(path){
+      return fetch(assetURL(path)).then(r => r.ok ? r.json() : null).catch(() => null);
+    }
+
+    // ============ Static bundle (content-hashed copies from the ETL) ============
+    function loadAssetManifest(json){
+      if (!json || json.version !== 1 || !json.assets) return null;
+      return new Map(Object.entries(json.assets));
+    }
+
+    // 'data/x.csv' -> its content-hashed copy when the bundle has one, else the path itself
+    function assetURL(path){
+      const e = assetMap && assetMap.get(String(path).replace(/^data\//, ''));
+      return e ? `data/${e.path}` : path;
+    }
+
+    // ============ Partitioned data (manifest from the ETL) ============
+    function initPartitions(manifest){
+      const ds = manifest && manifest.version === 1 && manifest.datasets;
+      if (!ds || !ds.dedup || !Array.isArray(ds.dedup.partitions)) return null;
+      const pa = (ds.per_author && ds.per_author.partitions) || [];
+      return {
+        dedup: ds.dedup.partitions,
+        perAuthor: new Map(pa.map(e => [e.key, e])),
+        loaded: new Set(),   // requested
+        ready: new Set(),    // rows merged into pubData / perAuthorData
+        loading: false
+      };
+    }
+
+    // Content hash in the file name (static bundle) or the query string: unchanged partitions
+    // stay valid in the browser cache
+    function partitionURL(e){
+      const url = assetURL(`data/${e.path}`);
+      return url !== `data/${e.path}` ? url : `data/${e.path}?v=${String(e.sha256 || '').slice(0, 16)}`;
+    }
+
+    // Fetch + parse partitions not requested before; resolves to the concatenated rows
+    function fetchPartitions(entries){
+      const todo = entries.filter(e => !partitionState.loaded.has(e.path));
+      todo.forEach(e => partitionState.loaded.add(e.path));
+      return Promise.all(todo.map(e =>
+        fetch(partitionURL(e)).then(r => r.ok ? r.text() : '').then(t => t ? parseCSV(t) : []).catch(() => [])
+      )).then(parts => parts.flat());
+    }
+
+    function markPartitionsReady(entries){
+      entries.forEach(e => partitionState.ready.add(e.path));
+    }
+
+    // All rows of the focused/listed author are in perAuthorData: the whole file was loaded, or
+    // that author's partition has arrived (other authors' partitions say nothing about this one)
+    function perAuthorReady(aid){
+      if (!partitionState) return perAuthorData.length > 0;
+      const e = partitionState.perAuthor.get(aid);
+      return !!e && partitionState.ready.has(e.path);
+    }
+
+    // The view still waits for rows it needs: year partitions of the window, or the focused
+    // author's partition. update() shows the loading banner instead of partial counts meanwhile.
+    function partitionsPending(){
+      if (!partitionState) return false;
+      if (neededDedupPartitions().some(e => !partitionState.ready.has(e.path))) return true;
+      const fa = focusedAuthorID ? normalizeID(focusedAuthorID) : '';
+      return !!fa && partitionState.perAuthor.has(fa) && !perAuthorReady(fa);
+    }
+
+    // Year partitions overlapping the current window (years are clamped the same way as rows)
+    function neededDedupPartitions(){
+      return partitionState.dedup.filter(e => {
+        const y = clampYear(e.key === 'unknown' ? 0 : e.key);
+        return y >= yearBounds.min && y <= yearBounds.max;
+      });
+    }
+
+    // Called after each render: fetch what the current view is missing, then render again
+    function ensurePartitionsFor(contributingRoster){
+      if (!partitionState || partitionState.loading) return;
+      const ids = focusedAuthorID
+        ? [normalizeID(focusedAuthorID)]
+        : contributingRoster.map(r => normalizeID(r.OpenAlexID));
+      const paEntries = ids.map(id => partitionState.perAuthor.get(id))
+        .filter(e => e && !partitionState.loaded.has(e.path));
+      const dEntries = neededDedupPartitions().filter(e => !partitionState.loaded.has(e.path));
+      if (!paEntries.length && !dEntries.length) return;
+
+      partitionState.loading = true;
+      Promise.all([fetchPartitions(dEntries), fetchPartitions(paEntries)])
+        .then(([dRows, paRows]) => {
+          if (dRows.length) { normalizePubsFor(dRows); pubData.push(...dRows); }
+          if (paRows.length) { normalizePubsFor(paRows); perAuthorData.push(...paRows); }
+          markPartitionsReady([...dEntries, ...paEntries]);
+        })
+        .finally(() => { partitionState.loading = false; update(); });
+    }
+
+    // ============ Prebuilt search index (from the ETL) ============
+    // Tokens were produced with the same normalizeText/stem/tokenize rules as fuzzyQueryMatch,
+    // so intersecting posting lists gives the same answer without re-tokenizing every pub.
+    function loadSearchIndex(json){
+      if (!json || json.version !== 1 || !Array.isArray(json.docs) || !json.postings) return null;
+      return { docs: json.docs, docSet: new Set(json.docs), postings: new Map(Object.entries(json.postings)), cache: null };
+    }
+
+    // Set of matching work ids, or null when the index can't answer (no index / empty query)
+    function searchIndexHits(query){
+      if (!searchIndex) return null;
+      if (searchIndex.cache && searchIndex.cache.q === query) return searchIndex.cache.hits;
+      const qTokens = tokenize(query);
+      if (!qTokens.length) return null;
+      const lists = qTokens.map(t => searchIndex.postings.get(t) || []).sort((a, b) => a.length - b.length);
+      let docs = lists[0];
+      for (let i = 1; i < lists.length && docs.length; i++) {
+        const other = lists[i];
+        const out = [];
+        let j = 0;
+        for (const d of docs) {            // both lists ascending
+          while (j < other.length && other[j] < d) j++;
+          if (j < other.length && other[j] === d) out.push(d);
+        }
+        docs = out;
+      }
+      const hits = new Set(docs.map(d => searchIndex.docs[d]));
+      searchIndex.cache = { q: query, hits };
+      return hits;
+    }
+
+    function topicQueryMatch(query, p){
+      const hits = searchIndexHits(query);
+      if (hits && searchIndex.docSet.has(p.id)) return hits.has(p.id);
+      return fuzzyQueryMatch(query, p._topic_haystack);
+    }
     
     function toInt(x) {
       const n = Number(x);
@@ -107,9 +262,60 @@
         .replace(/^https?:\/\/openalex\.org\//i, '')
         .trim();
     }
-    function fetchCSV(path) { return fetch(path).then(resp => resp.text()); }
+    function fetchCSV(path) { return fetch(assetURL(path)).then(resp => resp.text()); }
+
+    function loadTermTables(json){
+      if (!json || json.version !== 1 || !Array.isArray(json.docs) || !Array.isArray(json.terms)) return null;
+      return {
+        terms: json.terms,
+        docOf: new Map(json.docs.map((id, i) => [id, i])),
+        concepts: json.concepts || [],
+        topics: json.topics || [],
+        authorYear: json.author_year_df || {},
+        ownerYear: json.owner_year_df || {}
+      };
+    }
+
+    // Sum the ETL's term-id vectors: a whole author x year document-frequency cell when the filter
+    // keeps all of that cell's works, else the per-work lists. Null if any pub isn't covered
+    // (caller re-tokenizes).
+    function wc_collectTermsFromTables(pubs, source) {
+      if (!termTables) return null;
+      const lists = source === 'topics' ? termTables.topics : termTables.concepts;
+      // Focused view reads perAuthorData (one row per owner), so use the owner-keyed table
+      const owned = focusedAuthorID && perAuthorReady(normalizeID(focusedAuthorID));
+      const table = ((owned ? termTables.ownerYear : termTables.authorYear) || {})[source] || {};
+
+      const cells = new Map();  // "author|year" -> Set(doc idx)
+      for (const p of pubs) {
+        const d = termTables.docOf.get(p.id);
+        if (d === undefined) return null;
+        const key = p.author_openalex_id + '|' + (p._yearKey || '');
+        if (!cells.has(key)) cells.set(key, new Set());
+        cells.get(key).add(d);
+      }
+
+      const byId = new Map();
+      cells.forEach((docs, key) => {
+        const [aid, year] = key.split('|');
+        const cell = (table[aid] || {})[year];
+        if (cell && cell.n === docs.size) {
+          for (const tid in cell.df) byId.set(+tid, (byId.get(+tid) || 0) + cell.df[tid]);
+          return;
+        }
+        docs.forEach(d => {
+          for (const tid of (lists[d] || [])) byId.set(tid, (byId.get(tid) || 0) + 1);
+        });
+      });
+      const counts = new Map();
+      byId.forEach((n, tid) => counts.set(termTables.terms[tid], n));
+      return counts;
+    }
 
     function wc_collectTermsBySource(pubs, source) {
+      const fromTables = wc_collectTermsFromTables(pubs, source);
+      if (fromTables) return fromTables;
+
       // Count each term at most once per publication (document frequency)
       const counts = new Map();
     
@@ -449,7 +655,9 @@
       );
     
       arr.forEach(p => {
-        // numeric
+        // numeric; the unclamped year keys the ETL's author x year term tables
+        const y = Number(p.publication_year);
+        p._yearKey = Number.isFinite(y) && String(p.publication_year).trim() ? String(Math.trunc(y)) : '';
         p.publication_year = clampYear(p.publication_year);
         p.cited_by_count = toInt(p.cited_by_count);
     
@@ -876,12 +1084,12 @@ if (resetBtn) {
       const selectedAppt   = getMulti('appointment');
       const selectedRGs    = getMulti('research-group');
     
-      // Choose source:
-      const sourcePubs = (focusedAuthorID && perAuthorData.length) ? perAuthorData : pubData;
+      // Choose source: the per-author rows only once the focused author's are all there
+      const sourcePubs = (focusedAuthorID && perAuthorReady(normalizeID(focusedAuthorID))) ? perAuthorData : pubData;
     
       // Filter pubs by year + topic first
       let pubs = sourcePubs.filter(p => p.publication_year >= yearBounds.min && p.publication_year <= yearBounds.max);
-      if (topicQ) pubs = pubs.filter(p => fuzzyQueryMatch(topicQ, p._topic_haystack));
+      if (topicQ) pubs = pubs.filter(p => topicQueryMatch(topicQ, p));
     
       let contributingRoster;
     
@@ -1656,6 +1864,14 @@ function renderActiveFilters(contributingRoster, selectedPubs) {
 }
 
 function update(){
+      const banner = document.getElementById('loading-banner');
+      if (partitionsPending()) {
+        // Fetch what the window / focus needs; ensurePartitionsFor renders again when it arrives
+        banner?.classList.remove('hidden');
+        ensurePartitionsFor([]);
+        return;
+      }
+      banner?.classList.add('hidden');
       const { contributingRoster, selectedPubs } = applyFilters();
     
       // Ensure we have a default active type set
@@ -1704,6 +1920,7 @@ function update(){
       drawAuthorTopicPCA(selectedPubs, contributingRoster);
       drawTopRORPartners(contributingRoster, selectedPubs);
 
+      ensurePartitionsFor(contributingRoster);
     }
 
 
@@ -2011,13 +2228,20 @@ function update(){
       };
     
       const aid = normID(authorOpenAlexID);
-      if (!Array.isArray(perAuthorData) || !aid) {
+      if (!aid) {
         return years.map(y => ({ year: y, first: 0, middle: 0, last: 0, total: 0 }));
       }
+
+      // This author's own per-author rows once all of them are loaded; until then the dedup rows
+      // listing the author, whose this_author_position belongs to the representative author
+      const own = perAuthorReady(aid);
+      const isAuthorRow = own
+        ? (row) => normID(row.author_openalex_id) === aid
+        : (row) => String(row.authorships__author__id || '').split('|').some(s => normID(s) === aid);
     
       // Derive this author’s position on this work if ETL field missing
       const derivePositionIfMissing = (row) => {
-        const has = String(row.this_author_position || '').trim();
+        const has = own ? String(row.this_author_position || '').trim() : '';
         if (has) return has.toLowerCase();
     
         const ids = String(row.authorships__author__id || '')
@@ -2028,8 +2252,8 @@ function update(){
         return (idx >= 0 && idx < poss.length) ? poss[idx] : '';
       };
     
-      for (const r of perAuthorData) {
-        if (normID(r.author_openalex_id) !== aid) continue;
+      for (const r of (own ? perAuthorData : pubData)) {
+        if (!isAuthorRow(r)) continue;
     
         // Year window
         const y = parseInt(r.publication_year || r.year || r.from_year || '', 10);
@@ -5,22 +5,81 @@ UC_BioSci_works.py — single-file OpenAlex ETL for UC_BioSci dashboard
 What this script does
 ---------------------
 - Reads a roster CSV containing at least a column "OpenAlexID" (e.g., A########## or https://openalex.org/A##########).
+- Validates the roster before fetching: ids are normalized (bare, openalex:, site/API URLs), missing,
+  malformed and duplicate ones are rejected, and the rest are checked for existence in batched
+  /authors?filter=openalex:A|B|... calls (--no-id-check skips that). The resulting work plan
+  (harvested authors + rejected rows with reasons) is written to harvest_plan.json.
+- Keeps an author identity registry (cache/author_registry.json, shared with fetch_author_metrics.py;
+  see identity.py): merged OpenAlex ids are harvested under the surviving id, and only ids that are
+  new or not verified recently are checked again.
 - Fetches all works for each author via OpenAlex (cursor pagination), with retries/backoff and a
-  proper User-Agent header.
-- Flattens nested JSON with sep="__" so columns match expected keys.
+  proper User-Agent header. Downloads, transforms and CSV writes run as overlapping stages
+  (fetch threads -> transform processes -> one writer in roster order) with bounded queues.
+  Prolific authors (roster Works_count >= --split-min-works) are split into disjoint publication_year
+  ranges, sized by a group_by=publication_year probe, and those ranges are paged concurrently.
+- With --budget-requests (and/or --budget-minutes), refreshes are scheduled: each run fetches only the
+  authors with the highest staleness score (works_count growth, recent publication rate, time since
+  the last fetch) that fit the budget, so frequent small runs spread the load over the roster.
+- Dead-letters authors whose download fails or stops early: a background thread retries them while
+  the main pass goes on (--dead-letter-retries, resuming at the failed cursor), they are written
+  after the other authors, and any still incomplete are listed in cache/dead_letters.json (the next
+  run fetches them from the start); the run summary reports completeness_pct.
+- Requests only the fields the pipeline uses (select=...), decodes each page into compact slotted
+  Work/Authorship/Institution records and builds the sep="__" columns straight from them.
+- Interns author/institution/topic names and IDs while decoding an author's pages (StringTable);
+  records carry ints until that author's columns are serialized, and everything downstream
+  (compiled CSVs, dedup, per-author projection, co-authorship) works on the strings.
 - Adds convenience string columns: authors, institutions, concepts_list.
 - Writes two compiled CSVs (lifetime and last5y) and then deduplicates the last5y into the path
-  provided by --output.
-- Logs to both file and console so GitHub Actions shows useful details.
-
-Usage (as in your workflow):
+  provided by --output (out of core, in hash-partitioned spill files, when the inputs exceed
+  --dedup-memory-mb).
+- Logs through a queue (fetch/transform threads never wait on log I/O) to the console and to a
+  size-bounded JSON-lines file per run (logs/etl_run_<ts>.jsonl); run logs are kept (the workflow
+  commits them) unless --keep-logs N asks to prune all but the newest N, HTTP client chatter is off unless asked for (--log-levels urllib3=DEBUG), and
+  each run appends a one-line summary to logs/etl_runs.jsonl.
+- Optionally splits the roster into N stable hash shards (--shard I/N) that can run on separate
+  processes or CI runners; `merge` then combines the shard files and runs dedup once.
+- Writes openalex_search_index.json (stemmed token -> work ids) for the dashboard's search box and
+  openalex_wordcloud_terms.json (per-work term ids + author x year document frequencies).
+- Writes partitions/ (dedup by publication year, per-author by author) with a manifest of row
+  counts, sizes and content hashes, so the dashboard can load only what a filter needs.
+- With --static-assets, writes static/: content-hashed copies of the dashboard files with .gz/.br
+  siblings and a manifest dashboard.js reads first (assets.py); kept current once it exists.
+- Writes openalex_corpus.sqlite (not committed): the dedup corpus normalized into works,
+  authorships, institutions, topics and cohort tables with indexes, queried with corpus.py.
+- Skips the download for authors whose fingerprint (roster Works_count + Last_work_year, added by
+  fetch_author_metrics.py) matches the previous run, reusing their rows from data/cache/works/
+  (--no-cache forces a full refetch; --cache-max-age-days bounds citation-count staleness).
+- Runs dedup, lifetime backfill and the per-author projection with pandas (the reference) or, with
+  --engine duckdb (optional `pip install duckdb`), as multi-threaded SQL with identical output;
+  `compare-engines` checks both on the current compiled files and reports their timings.
+
+Usage (the nightly workflow runs this together with fetch_author_metrics.py through pipeline.py):
     python etl/UC_BioSci_works.py \
         --input data/roster_with_metrics.csv \
         --output data/openalex_all_authors_last5y_key_fields_dedup.csv
 
+Sharded (e.g. a CI matrix of 4 jobs sharing one data directory, then one merge job):
+    python etl/UC_BioSci_works.py --input ... --output ... --shard 0/4     # ... 3/4
+    python etl/UC_BioSci_works.py merge --input ... --output ...
+
+Citation-only refresh between harvests (patches cited_by_count, fwci, OA status in place; one request
+per 50 works instead of re-paging every bibliography):
+    python etl/UC_BioSci_works.py --refresh-citations --input ... --output ...
+
+Engine check / benchmark (reads the compiled files next to --output, writes nothing; CI runs it on
+the synthetic fixture in etl/fixtures/engines/, see .github/workflows/engines.yml):
+    python etl/UC_BioSci_works.py compare-engines --input ... --output ... --engine duckdb
+
+Library use (no CLI parsing on import; pandas/requests load on first use):
+    import etl
+    etl.fetch_works(roster, "data"); etl.dedup(compiled, out); etl.project_per_author(dedup_df, roster)
+    etl.refresh(out, roster)
+
 Notes
 -----
-- The script does NOT depend on any other local module (no utils_openalex import).
+- Local imports only: publish.py (artifact publishing), identity.py (author registry), corpus.py
+  (SQLite corpus store) and _lazy.py (deferred imports); works both as a script and as etl.UC_BioSci_works.
 - The output directory is derived from --output; logs and compiled intermediate files live there.
 - If zero authors are processed, the script exits nonzero so CI flags it.
 """
@@ -30,29 +89,133 @@ from __future__ import annotations
 import os
 import sys
 import time
+import hashlib
+import heapq
+import io
+import csv
+import shutil
+import unicodedata
+import queue
+import threading
+import multiprocessing
 import json
 import re
 import logging
+import logging.handlers
+import atexit
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
 from datetime import datetime
-from typing import Dict, Any, Iterable, List, Optional, Tuple
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
 import argparse
 
-import re
-import requests
-import pandas as pd
-from pandas import json_normalize
+try:  # imported as part of the etl package
+    from ._lazy import LazyModule
+    from .assets import asset_manifest_path, build_static_assets
+    from .corpus import CORPUS_NAME, build_corpus_store
+    from .identity import REGISTRY_NAME, AuthorRegistry, normalize_openalex_id
+    from .publish import ArtifactPublisher
+except ImportError:  # run as a script: python etl/UC_BioSci_works.py
+    from _lazy import LazyModule
+    from assets import asset_manifest_path, build_static_assets
+    from corpus import CORPUS_NAME, build_corpus_store
+    from identity import REGISTRY_NAME, AuthorRegistry, normalize_openalex_id
+    from publish import ArtifactPublisher
+
+# Heavy imports are deferred to first use, so --help and `import etl` stay fast
+requests = LazyModule("requests", globals())
+pd = LazyModule("pandas", globals(), "pd")
 
 # ----------------------------
 # CLI
 # ----------------------------
-parser = argparse.ArgumentParser(description="UC_BioSci OpenAlex ETL (single-file)")
-parser.add_argument("--input", "-i", required=True, help="Path to input faculty roster CSV")
-parser.add_argument("--output", "-o", required=True, help="Path to deduplicated last-5-years output CSV")
-args = parser.parse_args()
-
-INPUT_ROSTER = args.input
-OUTPUT_LAST5_DEDUP = args.output
-OUTPUT_DIR = os.path.dirname(OUTPUT_LAST5_DEDUP) or "data"
+ENGINES = ("pandas", "duckdb")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="UC_BioSci OpenAlex ETL (single-file)")
+    parser.add_argument("command", nargs="?", default="harvest", choices=["harvest", "merge", "compare-engines"],
+                        help="harvest (default): fetch works for the roster (or one --shard of it); "
+                             "merge: combine shard-local compiled files, then dedup + per-author projection; "
+                             "compare-engines: run the post-harvest stages on the existing compiled files with pandas "
+                             "and --engine, check the outputs are identical and report timings (writes nothing)")
+    parser.add_argument("--input", "-i", required=True, help="Path to input faculty roster CSV")
+    parser.add_argument("--output", "-o", required=True, help="Path to deduplicated last-5-years output CSV")
+    parser.add_argument("--shard", default=None, metavar="I/N",
+                        help="harvest only: process the stable hash partition I of N (0-based, e.g. 0/4) and write "
+                             "shard-local compiled files; run `merge` afterwards")
+    parser.add_argument("--keep-shards", action="store_true", help="merge only: keep shard files after merging")
+    parser.add_argument("--fetch-workers", type=int, default=int(os.getenv("OPENALEX_FETCH_WORKERS", "4")),
+                        help="Concurrent author downloads (default 4)")
+    parser.add_argument("--transform-workers", type=int,
+                        default=int(os.getenv("OPENALEX_TRANSFORM_WORKERS", str(min(4, max(1, (os.cpu_count() or 2) - 1))))),
+                        help="Worker processes for decoding/transforming pages; 0 = in-process (default: cores-1, max 4)")
+    parser.add_argument("--queue-size", type=int, default=8,
+                        help="Max authors in flight between fetch and write (bounds memory; default 8)")
+    parser.add_argument("--refresh-citations", action="store_true",
+                        help="Instead of harvesting, refresh cited_by_count, fwci and OA status of the works in the "
+                             f"existing --output (and per-author) file in batched lookups of {REFRESH_BATCH} ids, and "
+                             "patch them in place")
+    parser.add_argument("--static-assets", action="store_true",
+                        help="Also write content-hashed copies of the dashboard files with .gz/.br siblings and a "
+                             "manifest under static/ (see assets.py); once it exists, every run keeps it current")
+    parser.add_argument("--split-min-works", type=int, default=SPLIT_MIN_WORKS,
+                        help="Download authors with at least this many works (roster Works_count) as concurrent "
+                             f"publication_year ranges; 0 = never (default {SPLIT_MIN_WORKS})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Fetch every author even if its Works_count/Last_work_year fingerprint is unchanged "
+                             "(the cache is still refreshed)")
+    parser.add_argument("--cache-max-age-days", type=int, default=int(os.getenv("OPENALEX_CACHE_MAX_AGE_DAYS", "30")),
+                        help="Refetch cached authors after this many days regardless of fingerprint, to refresh "
+                             "citation counts (default 30)")
+    parser.add_argument("--budget-requests", type=int, default=int(os.getenv("OPENALEX_BUDGET_REQUESTS", "0")),
+                        help="Scheduler mode: fetch only the stalest authors (new works, publication rate, time since "
+                             "last fetch) whose estimated /works requests fit this budget; the rest reuse their cache "
+                             "until their turn. Authors without a usable cache are fetched regardless, on top of "
+                             "the budget. 0 = fetch every changed or expired author (default)")
+    parser.add_argument("--budget-minutes", type=float, default=float(os.getenv("OPENALEX_BUDGET_MINUTES", "0")),
+                        help="Stop starting downloads of cached authors after this many minutes; they reuse their "
+                             "cache (0 = no limit)")
+    parser.add_argument("--no-id-check", action="store_true",
+                        help="Skip the batched OpenAlex existence check of roster ids (ids are still normalized, "
+                             "and missing/malformed/duplicate ones still rejected)")
+    parser.add_argument("--dead-letter-retries", type=int, default=2,
+                        help="Background retry rounds for authors whose download failed or stopped early (written "
+                             "after the others); 0 = write partial downloads as they are (default 2)")
+    parser.add_argument("--dead-letter-backoff", type=float, default=30.0,
+                        help="Seconds from an author's failure to its first retry, doubling per round (default 30)")
+    parser.add_argument("--dedup-memory-mb", type=int, default=int(os.getenv("OPENALEX_DEDUP_MEMORY_MB", "0")),
+                        help="Memory budget for dedup; inputs estimated larger than this are deduplicated out of core "
+                             "(chunked, hash-partitioned spill files; identical output). 0 = always in memory (default)")
+    parser.add_argument("--dedup-workers", type=int, default=1,
+                        help="Processes for deduplicating spill partitions in the out-of-core mode (default 1)")
+    parser.add_argument("--engine", choices=ENGINES, default=os.getenv("OPENALEX_ENGINE", "pandas"),
+                        help="Engine for dedup, lifetime backfill and the per-author projection: pandas (reference, "
+                             "default) or duckdb (multi-threaded SQL; needs `pip install duckdb`; same output)")
+    parser.add_argument("--bench-runs", type=int, default=3, help="compare-engines only: time each stage best of N (default 3)")
+    parser.add_argument("--log-level", default=os.getenv("OPENALEX_LOG_LEVEL", "INFO"),
+                        help="Level for this script's records (default INFO; DEBUG adds per-page fetch detail)")
+    parser.add_argument("--log-levels", default=os.getenv("OPENALEX_LOG_LEVELS", ""), metavar="NAME=LEVEL,...",
+                        help="Per-logger overrides, e.g. urllib3=DEBUG (HTTP client loggers default to WARNING)")
+    parser.add_argument("--keep-logs", type=int, default=0,
+                        help="Delete all but the newest N run logs in <output dir>/logs, including committed ones "
+                             "(default 0: keep every run log)")
+    return parser
+
+
+# Output directory (logs, compiled files, cache, dashboard artifacts) and its publisher; set by
+# configure(), which the CLI and the library API call before doing any work
+OUTPUT_DIR = "data"
+# Published artifacts are only rewritten when their content changed (see publish.py)
+PUBLISHER = ArtifactPublisher(OUTPUT_DIR)
+
+
+def configure(output_dir: str) -> None:
+    global OUTPUT_DIR, PUBLISHER
+    OUTPUT_DIR = output_dir or "data"
+    PUBLISHER = ArtifactPublisher(OUTPUT_DIR)
+    STRINGS.clear()
 
 # ----------------------------
 # Config
@@ -64,11 +227,67 @@ MAX_RETRIES = int(os.getenv("OPENALEX_MAX_RETRIES", "6"))
 BACKOFF_BASE = float(os.getenv("OPENALEX_BACKOFF_BASE", "1.6"))
 TIMEOUT = int(os.getenv("OPENALEX_TIMEOUT", "30"))
 RETRIABLE_STATUS = {429, 500, 502, 503, 504}
+# Authors with at least SPLIT_MIN_WORKS works (roster Works_count) are fetched as up to SPLIT_MAX_RANGES
+# disjoint publication_year ranges of ~SPLIT_RANGE_WORKS works, paged concurrently on SPLIT_WORKERS
+# threads shared by all fetchers (fetch_author_pages_split)
+SPLIT_MIN_WORKS = int(os.getenv("OPENALEX_SPLIT_MIN_WORKS", "2000"))
+SPLIT_RANGE_WORKS = int(os.getenv("OPENALEX_SPLIT_RANGE_WORKS", "1000"))
+SPLIT_MAX_RANGES = int(os.getenv("OPENALEX_SPLIT_MAX_RANGES", "8"))
+SPLIT_WORKERS = int(os.getenv("OPENALEX_SPLIT_WORKERS", "4"))
+# Requests per second across every thread talking to OpenAlex (fetchers, split ranges, validation,
+# probes); 0 = unlimited. OpenAlex allows 10/s, so the default leaves headroom for the metrics step.
+MAX_RPS = float(os.getenv("OPENALEX_MAX_RPS", "8"))
 HEADERS = {
     "User-Agent": f"UC_BioSci-ETL (mailto:{MAILTO})",
     "Accept": "application/json",
 }
 
+_HTTP = threading.local()
+
+
+def http_session() -> requests.Session:
+    """This thread's keep-alive session (requests.Session is not safe to share between threads, and
+    a fresh connection per page costs a TLS handshake)."""
+    session = getattr(_HTTP, "session", None)
+    if session is None:
+        session = _HTTP.session = requests.Session()
+    return session
+
+
+class RateLimiter:
+    """Token bucket shared by all threads: `rate` requests per second on average, bursts of up to
+    `burst`. Callers reserve a token under the lock and sleep outside it, so waits are spread in
+    arrival order instead of every thread retrying at once."""
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+
+RATE_LIMIT = RateLimiter(MAX_RPS, burst=max(1, int(MAX_RPS)))
+
+
+def openalex_get(url: str, params: Dict[str, Any]) -> "requests.Response":
+    """GET on this thread's session, after taking a token from the shared rate limiter."""
+    RATE_LIMIT.acquire()
+    return http_session().get(url, params=params, headers=HEADERS, timeout=TIMEOUT)
+
+
 # Key fields expected downstream / in dashboard
 KEY_FIELDS_FOR_OUTPUT = [
     "id", "doi", "display_name", "publication_year", "publication_date", "type", "cited_by_count",
@@ -112,354 +331,430 @@ def safe_join(items: Iterable[str], sep: str = "; ") -> str:
     return sep.join(sorted({(x or "").strip() for x in items if (x or "").strip()}))
 
 
-def extract_string_lists_from_row(row: pd.Series) -> Tuple[str, str, str]:
-    """Builds authors, institutions, concepts_list strings from still-nested list fields if present.
-
-    After json_normalize(sep="__"), list-of-dicts fields (like authorships, concepts) remain Python lists.
-    We parse those lists here.
-    """
-    # Authors
-    authors_joined = ""
-    if "authorships" in row and isinstance(row["authorships"], list):
-        author_names: List[str] = []
-        for a in row["authorships"]:
-            try:
-                nm = a.get("author", {}).get("display_name", "")
-                if nm:
-                    author_names.append(nm)
-            except Exception:
-                continue
-        authors_joined = safe_join(author_names)
-
-    # Institutions
-    inst_joined = ""
-    if "authorships" in row and isinstance(row["authorships"], list):
-        inst_names: List[str] = []
-        for a in row["authorships"]:
-            try:
-                insts = a.get("institutions", []) or []
-                for inst in insts:
-                    nm = inst.get("display_name", "")
-                    if nm:
-                        inst_names.append(nm)
-            except Exception:
-                continue
-        inst_joined = safe_join(inst_names)
+def _first_nonempty(xs):
+    for x in xs:
+        if x:
+            return x
+    return ""
 
-    # Concepts
-    concepts_joined = ""
-    if "concepts" in row and isinstance(row["concepts"], list):
-        concept_names: List[str] = []
-        for c in row["concepts"]:
-            try:
-                nm = c.get("display_name", "")
-                if nm:
-                    concept_names.append(nm)
-            except Exception:
-                continue
-        concepts_joined = safe_join(concept_names)
+# ----------------------------
+# String interning (transform-local dictionary encoding)
+# ----------------------------
 
-    return authors_joined, inst_joined, concepts_joined
+class StringTable:
+    """Maps each distinct string to a small int while an author's pages are decoded.
 
-def first_institution_strings_from_row(row: pd.Series) -> Tuple[str, str, str]:
-    """
-    Returns 3 pipe-joined strings (aligned to authorship order):
-      - authorships__institutions__ror           (ROR id without https://ror.org/)
-      - authorships__institutions__display_name  (institution name)
-      - authorships__institutions__country_code  (ISO-2 uppercase)
-    Falls back to empty strings if authorships missing.
+    Author/institution/topic names and ids repeat across an author's works and authorships;
+    records hold the ints and the pipe lists stay integer tuples until works_to_columns turns
+    them back into strings, so the ids never leave the transform (each transform worker process
+    has its own table). id 0 is always the empty string. The table is cleared by configure() and
+    at the start of every harvest_roster, so a long-lived process (library use, several
+    harvests) does not keep every name it has ever seen.
     """
-    rors, names, countries = [], [], []
-    A = row.get("authorships", None)
-    if not isinstance(A, list):
-        return "", "", ""
+    __slots__ = ("_ids", "_strings")
 
-    for au in A:
-        try:
-            insts = (au or {}).get("institutions") or []
-            if insts:
-                first = insts[0]
-                ror = (first.get("ror") or "").replace("https://ror.org/", "")
-                name = first.get("display_name") or ""
-                ctry = (first.get("country_code") or "").upper()
-            else:
-                ror = ""; name = ""; ctry = ""
-        except Exception:
-            ror = ""; name = ""; ctry = ""
-        rors.append(ror); names.append(name); countries.append(ctry)
+    def __init__(self) -> None:
+        self.clear()
 
-    return "|".join(rors), "|".join(names), "|".join(countries)
-  
-def add_convenience_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Adds/derives authors, institutions, concepts_list, and ensures fwci column exists."""
-    if df.empty:
-        return df
-
-    # Ensure fwci column exists (OpenAlex doesn't provide FWCI; keep as NaN unless provided upstream)
-    if "fwci" not in df.columns:
-        df["fwci"] = pd.NA
-
-    # Build string-joined convenience columns from nested lists per row
-    if any(col in df.columns for col in ("authorships", "concepts")):
-        vals = df.apply(extract_string_lists_from_row, axis=1, result_type="expand")
-        # vals has 3 columns if not empty
-        if not vals.empty:
-            df["authors"] = vals[0]
-            df["institutions"] = vals[1]
-            df["concepts_list"] = vals[2]
-
-    # Ensure the explicit convenience columns exist even if lists were absent
-    for col in ("authors", "institutions", "concepts_list"):
-        if col not in df.columns:
-            df[col] = ""
+    def clear(self) -> None:
+        # Only safe between harvests: ids held by live records would point at other strings
+        self._ids: Dict[str, int] = {"": 0}
+        self._strings: List[str] = [""]
 
-    return df
+    def intern(self, s: Optional[str]) -> int:
+        s = s or ""
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self._strings)
+            self._strings.append(s)
+        return i
 
-def _first_nonempty(xs):
-    for x in xs:
-        if x:
-            return x
-    return ""
+    def lookup(self, i: int) -> str:
+        return self._strings[i]
 
-def build_authorship_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    From per-row 'authorships' (list of dicts), build pipe-joined columns:
-    - authorships__author_position           (e.g., first|middle|last)
-    - authorships__institutions              (per-author: '; ' joined institution names)  # optional
-    - authorships__countries                 (per-author: primary country code, e.g., CA)
-    - authorships__is_corresponding          (per-author: true/false)
-    - authorships__raw_author_name
-    - authorships__raw_affiliation_strings   (per-author: '; ' joined)
-    - authorships__affiliations              (alias of institutions as a flat string)
-    - authorships__author__id                (A##########)
-    - authorships__author__display_name
-    - authorships__author__orcid
-    """
-    if df.empty:
-        # ensure columns exist
-        for k in [
-            "authorships__author_position","authorships__institutions","authorships__countries",
-            "authorships__is_corresponding","authorships__raw_author_name","authorships__raw_affiliation_strings",
-            "authorships__affiliations","authorships__author__id","authorships__author__display_name",
-            "authorships__author__orcid", "authorships__institutions__ror","authorships__institutions__display_name",
-            "authorships__institutions__country_code",
-        ]:
-            if k not in df.columns:
-                df[k] = pd.NA
-        return df
-
-    def per_row(vals):
-        if not isinstance(vals, list):
-            # no authorships: return empty strings (10 original + 3 new)
-            return ["", "", "", "", "", "", "", "", "", "", "", "", ""]
-
-        pos_list, inst_list, ctry_list, corr_list = [], [], [], []
-        raw_name_list, raw_affil_list, affils_list = [], [], []
-        auth_id_list, auth_name_list, auth_orcid_list = [], [], []
-        first_ror_list, first_inst_name_list, first_ctry_list = [], [], []
-
-        for a in vals:
-            if not isinstance(a, dict):
-                continue
+    def join(self, ids: Iterable[int], sep: str = "|") -> str:
+        strings = self._strings
+        return sep.join([strings[i] for i in ids])
 
-            # position
-            pos_list.append((a.get("author_position") or "").strip())
-
-            # institutions & countries
-            insts = a.get("institutions") or []
-            inst_names = []
-            countries = []
-            first_ror, first_name, first_cc = "", "", ""
-            if isinstance(insts, list):
-                for idx, inst in enumerate(insts):
-                    if not isinstance(inst, dict):
-                        continue
-                    nm = (inst.get("display_name") or "").strip()
-                    if nm:
-                        inst_names.append(nm)
-                    cc = (inst.get("country_code") or "").strip().upper()
-                    if cc:
-                        countries.append(cc)
-                    if idx == 0:
-                        # first institution per authorship
-                        first_ror = (inst.get("ror") or "").replace("https://ror.org/", "")
-                        first_name = nm
-                        first_cc = cc
-            
-            # pick a primary country per authorship (first nonempty)
-            ctry_list.append(_first_nonempty(countries))
-            inst_list.append("; ".join(inst_names))
-            affils_list.append("; ".join(inst_names))  # alias
-            
-            # NEW: store first-institution fields
-            first_ror_list.append(first_ror)
-            first_inst_name_list.append(first_name)
-            first_ctry_list.append(first_cc)
-
-
-            # corresponding flag
-            corr = a.get("is_corresponding")
-            corr_list.append("true" if bool(corr) else "false")
-
-            # raw fields
-            raw_name_list.append((a.get("raw_author_name") or "").strip())
-            raw_aff = a.get("raw_affiliation_strings")
-            if isinstance(raw_aff, list):
-                raw_affil_list.append("; ".join([str(x).strip() for x in raw_aff if str(x).strip()]))
-            else:
-                raw_affil_list.append(str(raw_aff or "").strip())
-
-            # nested author object
-            au = a.get("author") or {}
-            aid = (au.get("id") or "").strip()
-            if aid.startswith("https://openalex.org/"):
-                aid = aid.rsplit("/", 1)[-1]
-            auth_id_list.append(aid)
-            auth_name_list.append((au.get("display_name") or "").strip())
-            auth_orcid_list.append((au.get("orcid") or "").strip())
-
-        # pipe-join per-author fields
-        def pj(xs): 
-            return "|".join([str(x) for x in xs])
-
-        return [
-            pj(pos_list),
-            pj(inst_list),
-            pj(ctry_list),
-            pj(corr_list),
-            pj(raw_name_list),
-            pj(raw_affil_list),
-            pj(affils_list),
-            pj(auth_id_list),
-            pj(auth_name_list),
-            pj(auth_orcid_list),
-            pj(first_ror_list),
-            pj(first_inst_name_list),
-            pj(first_ctry_list),
-        ]
+    def safe_join(self, ids: Iterable[int], sep: str = "; ") -> str:
+        """Interned counterpart of safe_join: dedup on ids first, then decode and sort."""
+        return safe_join([self._strings[i] for i in set(ids) if i], sep)
+
+    def __len__(self) -> int:
+        return len(self._strings)
 
-    cols = df.get("authorships")
-    built = cols.apply(per_row) if "authorships" in df.columns else pd.Series([[""]*10]*len(df))
-    built = pd.DataFrame(built.tolist(), columns=[
-        "authorships__author_position","authorships__institutions","authorships__countries",
-        "authorships__is_corresponding","authorships__raw_author_name","authorships__raw_affiliation_strings",
-        "authorships__affiliations","authorships__author__id","authorships__author__display_name",
-        "authorships__author__orcid",
-        # NEW
-        "authorships__institutions__ror","authorships__institutions__display_name",
-        "authorships__institutions__country_code",
-    ])
-
-    # Ensure these columns exist and assign
-    for c in built.columns:
-        df[c] = built[c]
-    return df
-
-
-def append_df_to_csv(df: pd.DataFrame, path: str, fixed_cols: Optional[List[str]] = None) -> None:
-    """Append rows using a *fixed schema* so the compiled CSV always has the same
-    number/order of columns. This avoids downstream tokenizing errors when
-    reading the compiled CSV back (mismatched header vs. rows).
-    """
-    if df.empty:
-        logging.info(f"append_df_to_csv: nothing to write to {path} (empty df).")
-        return
 
-    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+STRINGS = StringTable()
 
-    # Enforce a stable schema: add any missing fixed columns as empty, then reorder exactly
-    if fixed_cols:
-        for col in fixed_cols:
-            if col not in df.columns:
-                df[col] = pd.NA
-        df = df[fixed_cols]
+# ----------------------------
+# Typed decoding (OpenAlex JSON -> compact records -> column arrays)
+# ----------------------------
+# Only the top-level fields below are requested via `select=`, so the wide json_normalize frame
+# (hundreds of columns per author) is never built. host_venue is gone from the API and cannot be
+# selected; its column stays empty as before.
+WORKS_SELECT = ",".join([
+    "id", "doi", "display_name", "publication_year", "publication_date", "type", "cited_by_count",
+    "fwci", "open_access", "primary_location", "primary_topic", "biblio", "authorships", "concepts",
+])
 
-    write_header = not os.path.exists(path)
-    df.to_csv(path, index=False, header=write_header, mode=("w" if write_header else "a"))
+AUTHORSHIP_COLUMNS = [
+    "authorships__author_position", "authorships__institutions", "authorships__countries",
+    "authorships__is_corresponding", "authorships__raw_author_name", "authorships__raw_affiliation_strings",
+    "authorships__affiliations", "authorships__author__id", "authorships__author__display_name",
+    "authorships__author__orcid",
+    "authorships__institutions__ror", "authorships__institutions__display_name",
+    "authorships__institutions__country_code",
+]
 
 
-    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+# Name/ID fields are STRINGS ids (int); see StringTable.
+
+@dataclass(slots=True)
+class Institution:
+    ror: int            # without https://ror.org/
+    display_name: int
+    country_code: int   # ISO-2 uppercase
+
+
+@dataclass(slots=True)
+class Authorship:
+    author_position: int
+    is_corresponding: bool
+    raw_author_name: str
+    raw_affiliation_strings: str   # '; ' joined
+    author_id: int                 # A##########
+    author_display_name: int
+    author_orcid: int
+    institutions: Tuple[Institution, ...]
+
+
+@dataclass(slots=True)
+class Work:
+    id: Optional[str]
+    doi: Optional[str]
+    display_name: Optional[str]
+    publication_year: Any
+    publication_date: Optional[str]
+    type: Optional[str]
+    cited_by_count: Any
+    fwci: Any
+    oa_status: Optional[str]
+    source_display_name: Optional[str]
+    topic_display_name: Optional[str]
+    topic_field: Optional[str]
+    topic_subfield: Optional[str]
+    biblio_volume: Optional[str]
+    biblio_issue: Optional[str]
+    biblio_first_page: Optional[str]
+    biblio_last_page: Optional[str]
+    authorships: Tuple[Authorship, ...]
+    concepts: Tuple[int, ...]
+
+
+def _obj(d: Any, key: str) -> Dict[str, Any]:
+    v = d.get(key) if isinstance(d, dict) else None
+    return v if isinstance(v, dict) else {}
+
+
+def decode_institution(inst: Dict[str, Any]) -> Institution:
+    return Institution(
+        ror=STRINGS.intern((inst.get("ror") or "").replace("https://ror.org/", "")),
+        display_name=STRINGS.intern((inst.get("display_name") or "").strip()),
+        country_code=STRINGS.intern((inst.get("country_code") or "").strip().upper()),
+    )
 
-    if fixed_cols:
-        present = [col for col in fixed_cols if col in df.columns]
-        missing = [col for col in fixed_cols if col not in df.columns]
-        if missing:
-            logging.debug(f"append_df_to_csv: missing columns for {os.path.basename(path)}: {missing}")
-        df = df[present]
 
-    if not os.path.exists(path):
-        df.to_csv(path, index=False)
+def decode_authorship(a: Dict[str, Any]) -> Authorship:
+    insts = a.get("institutions") or []
+    raw_aff = a.get("raw_affiliation_strings")
+    if isinstance(raw_aff, list):
+        raw_aff_s = "; ".join([str(x).strip() for x in raw_aff if str(x).strip()])
     else:
-        df.to_csv(path, mode='a', index=False, header=False)
+        raw_aff_s = str(raw_aff or "").strip()
+    au = a.get("author") or {}
+    aid = (au.get("id") or "").strip()
+    if aid.startswith("https://openalex.org/"):
+        aid = aid.rsplit("/", 1)[-1]
+    return Authorship(
+        author_position=STRINGS.intern((a.get("author_position") or "").strip()),
+        is_corresponding=bool(a.get("is_corresponding")),
+        raw_author_name=(a.get("raw_author_name") or "").strip(),
+        raw_affiliation_strings=raw_aff_s,
+        author_id=STRINGS.intern(aid),
+        author_display_name=STRINGS.intern((au.get("display_name") or "").strip()),
+        author_orcid=STRINGS.intern((au.get("orcid") or "").strip()),
+        institutions=tuple(decode_institution(i) for i in insts if isinstance(i, dict)) if isinstance(insts, list) else (),
+    )
+
 
+def decode_work(w: Dict[str, Any]) -> Work:
+    """Decode one OpenAlex work object into a Work record, touching only the declared fields."""
+    topic = _obj(w, "primary_topic")
+    biblio = _obj(w, "biblio")
+    authorships = w.get("authorships")
+    concepts = w.get("concepts")
+    return Work(
+        id=w.get("id"),
+        doi=w.get("doi"),
+        display_name=w.get("display_name"),
+        publication_year=w.get("publication_year"),
+        publication_date=w.get("publication_date"),
+        type=w.get("type"),
+        cited_by_count=w.get("cited_by_count"),
+        fwci=w.get("fwci"),
+        oa_status=_obj(w, "open_access").get("oa_status"),
+        source_display_name=_obj(_obj(w, "primary_location"), "source").get("display_name"),
+        topic_display_name=topic.get("display_name"),
+        topic_field=_obj(topic, "field").get("display_name"),
+        topic_subfield=_obj(topic, "subfield").get("display_name"),
+        biblio_volume=biblio.get("volume"),
+        biblio_issue=biblio.get("issue"),
+        biblio_first_page=biblio.get("first_page"),
+        biblio_last_page=biblio.get("last_page"),
+        authorships=tuple(decode_authorship(a) for a in authorships if isinstance(a, dict)) if isinstance(authorships, list) else (),
+        concepts=tuple(STRINGS.intern((c.get("display_name") or "").strip()) for c in concepts if isinstance(c, dict)) if isinstance(concepts, list) else (),
+    )
 
 
-def deduplicate_compiled(input_csv_path: str, output_csv_path: str) -> None:
+def decode_page(payload: bytes) -> Tuple[List[Work], Optional[str]]:
+    """Parse one raw /works page into (records, next_cursor)."""
+    data = json.loads(payload)
+    works = [decode_work(w) for w in data.get("results") or [] if isinstance(w, dict)]
+    return works, (data.get("meta") or {}).get("next_cursor")
+
+
+def works_to_columns(works: List[Work]) -> Dict[str, List[Any]]:
+    """Build the output columns (including the convenience and pipe-joined authorship columns)
+    straight from records, in one pass per work. This is where interned ids are turned back
+    into strings."""
+    S = STRINGS
+    cols: Dict[str, List[Any]] = {c: [] for c in [
+        "id", "doi", "display_name", "publication_year", "publication_date", "type", "cited_by_count",
+        "open_access__oa_status", "primary_location__source__display_name",
+        "primary_topic__display_name", "primary_topic__field__display_name", "primary_topic__subfield__display_name",
+        "biblio__volume", "biblio__issue", "biblio__first_page", "biblio__last_page", "fwci",
+        "authors", "institutions", "concepts_list",
+    ] + AUTHORSHIP_COLUMNS}
+
+    for w in works:
+        cols["id"].append(w.id)
+        cols["doi"].append(w.doi)
+        cols["display_name"].append(w.display_name)
+        cols["publication_year"].append(w.publication_year)
+        cols["publication_date"].append(w.publication_date)
+        cols["type"].append(w.type)
+        cols["cited_by_count"].append(w.cited_by_count)
+        cols["open_access__oa_status"].append(w.oa_status)
+        cols["primary_location__source__display_name"].append(w.source_display_name)
+        cols["primary_topic__display_name"].append(w.topic_display_name)
+        cols["primary_topic__field__display_name"].append(w.topic_field)
+        cols["primary_topic__subfield__display_name"].append(w.topic_subfield)
+        cols["biblio__volume"].append(w.biblio_volume)
+        cols["biblio__issue"].append(w.biblio_issue)
+        cols["biblio__first_page"].append(w.biblio_first_page)
+        cols["biblio__last_page"].append(w.biblio_last_page)
+        cols["fwci"].append(w.fwci)
+
+        A = w.authorships
+        cols["authors"].append(S.safe_join(a.author_display_name for a in A))
+        cols["institutions"].append(S.safe_join(i.display_name for a in A for i in a.institutions))
+        cols["concepts_list"].append(S.safe_join(w.concepts))
+
+        inst_joined = ["; ".join(S.lookup(i.display_name) for i in a.institutions if i.display_name) for a in A]
+        firsts = [a.institutions[0] if a.institutions else None for a in A]
+        cols["authorships__author_position"].append(S.join(a.author_position for a in A))
+        cols["authorships__institutions"].append("|".join(inst_joined))
+        cols["authorships__countries"].append(
+            S.join(_first_nonempty(i.country_code for i in a.institutions) or 0 for a in A))
+        cols["authorships__is_corresponding"].append(
+            "|".join("true" if a.is_corresponding else "false" for a in A))
+        cols["authorships__raw_author_name"].append("|".join(a.raw_author_name for a in A))
+        cols["authorships__raw_affiliation_strings"].append("|".join(a.raw_affiliation_strings for a in A))
+        cols["authorships__affiliations"].append("|".join(inst_joined))  # alias
+        cols["authorships__author__id"].append(S.join(a.author_id for a in A))
+        cols["authorships__author__display_name"].append(S.join(a.author_display_name for a in A))
+        cols["authorships__author__orcid"].append(S.join(a.author_orcid for a in A))
+        cols["authorships__institutions__ror"].append(S.join(f.ror if f else 0 for f in firsts))
+        cols["authorships__institutions__display_name"].append(S.join(f.display_name if f else 0 for f in firsts))
+        cols["authorships__institutions__country_code"].append(S.join(f.country_code if f else 0 for f in firsts))
+
+    return cols
+
+
+def _csv_records(fh, offset: int = 0) -> Iterable[Tuple[int, bytes]]:
+    """(offset, raw bytes) of each record of a CSV opened in binary mode, starting at `offset`; a
+    record continues over newlines while it has an open quote."""
+    buf = b""
+    for line in iter(fh.readline, b""):
+        buf += line
+        if buf.count(b'"') % 2 == 0:
+            yield offset, buf
+            offset += len(buf)
+            buf = b""
+    if buf:
+        yield offset, buf
+
+
+class CompiledCSVSink:
+    """Single writer for one compiled CSV.
+
+    The file is opened once (as <path>.tmp), the header is written once, every frame is
+    reindexed to the fixed schema exactly once, and rows are buffered and written in large
+    blocks. close() flushes and atomically renames the temp file onto <path> (through the
+    publisher, if given, so an unchanged file is left alone); if no rows were written, no file
+    is created and a previously published one is removed. Use as a context manager so a failed
+    run leaves the previous file untouched. If sort_rows_by() was called before close(), the
+    written rows are put in that order before the file is published, without loading them.
     """
-    Merge-aware deduplication with authorship backfill.
-    1) Group by OpenAlex work id (fallback DOI) and select the row with richest authorship_* payload.
-    2) For any authorship_* column still empty, backfill from the lifetime compiled CSV if available.
-    """
-    if not os.path.exists(input_csv_path):
-        logging.warning(f"Input file for deduplication does not exist: {input_csv_path}")
-        return
 
-    df = pd.read_csv(input_csv_path)
-    if df.empty:
-        pd.DataFrame().to_csv(output_csv_path, index=False)
-        return
+    def __init__(self, path: str, fixed_cols: List[str], block_rows: int = 20000,
+                 publisher: Optional[ArtifactPublisher] = None) -> None:
+        self.path = path
+        self.publisher = publisher
+        self.fixed_cols = list(fixed_cols)
+        self.block_rows = block_rows
+        self.rows = 0
+        self.bytes = 0
+        self._buf: List[pd.DataFrame] = []
+        self._buffered = 0
+        self._sort: Optional[Tuple[str, Callable[[str], Any]]] = None
+        self._tmp = path + ".tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fh = open(self._tmp, "w", encoding="utf-8", newline="")
+        self._fh.write(pd.DataFrame(columns=self.fixed_cols).to_csv(index=False))
+
+    def write(self, df: pd.DataFrame) -> None:
+        if df is None or df.empty:
+            return
+        # Enforce the stable schema: missing columns become empty, extra columns are dropped
+        self._buf.append(df.reindex(columns=self.fixed_cols))
+        self._buffered += len(df)
+        if self._buffered >= self.block_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buf:
+            return
+        block = self._buf[0] if len(self._buf) == 1 else pd.concat(self._buf, ignore_index=True)
+        block.to_csv(self._fh, index=False, header=False)
+        self.rows += len(block)
+        self._buf, self._buffered = [], 0
+
+    def sort_rows_by(self, column: str, key: Callable[[str], Any]) -> None:
+        """On close(), stable-sort the rows by key(value of `column`)."""
+        self._sort = (column, key)
+
+    def _sort_file(self) -> None:
+        # Only (key, offset, length) per row is held in memory; the rows are copied as written
+        column, key = self._sort
+        col = self.fixed_cols.index(column)
+        order: List[Tuple[Any, int, int, int]] = []
+        with open(self._tmp, "rb") as fh:
+            header = fh.readline()
+            for i, (offset, record) in enumerate(_csv_records(fh, len(header))):
+                value = next(csv.reader(io.StringIO(record.decode("utf-8"), newline="")))[col]
+                order.append((key(value), i, offset, len(record)))
+            order.sort()
+            with open(self._tmp + ".sorted", "wb") as out:
+                out.write(header)
+                for _, _, offset, size in order:
+                    fh.seek(offset)
+                    out.write(fh.read(size))
+        os.replace(self._tmp + ".sorted", self._tmp)
+
+    def close(self) -> None:
+        self.flush()
+        self._fh.close()
+        if self.rows and self._sort is not None:
+            self._sort_file()
+        if self.rows:
+            self.bytes = os.path.getsize(self._tmp)
+            if self.publisher is not None:
+                changed = self.publisher.publish_file(self._tmp, self.path)
+            else:
+                os.replace(self._tmp, self.path)
+                changed = True
+            verb = "Wrote" if changed else "Unchanged, kept"
+            logging.info(f"{verb} {self.rows} rows ({self.bytes / 1e6:.2f} MB) to {self.path}")
+        else:
+            os.remove(self._tmp)
+            if self.publisher is not None:
+                self.publisher.remove(self.path)
+            logging.info(f"CompiledCSVSink: nothing to write to {self.path} (no rows).")
+
+    def abort(self) -> None:
+        self._buf = []
+        self._fh.close()
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+    def __enter__(self) -> "CompiledCSVSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
 
-    AUTH_COLS = [
-        "authorships__author_position",
-        "authorships__institutions",
-        "authorships__countries",
-        "authorships__is_corresponding",
-        "authorships__raw_author_name",
-        "authorships__raw_affiliation_strings",
-        "authorships__affiliations",
-        "authorships__author__id",
-        "authorships__author__display_name",
-        "authorships__author__orcid",
-    ]
-
-    def richness_score(row):
-        score = 0
-        for c in AUTH_COLS:
-            v = row.get(c)
-            if isinstance(v, str) and v:
-                score += v.count('|') + 1
-        return score
-
-    def pick_best(series):
-        best = None; best_tokens = -1; best_len = -1
-        for v in series:
-            if not isinstance(v, str) or not v.strip():
-                continue
-            tokens = v.count('|') + 1; L = len(v)
-            if tokens > best_tokens or (tokens == best_tokens and L > best_len):
-                best = v; best_tokens = tokens; best_len = L
-        if best is not None: return best
-        s = series.dropna().astype(str)
-        return s.iloc[0] if len(s) else ""
 
+DEDUP_AUTH_COLS = [
+    "authorships__author_position",
+    "authorships__institutions",
+    "authorships__countries",
+    "authorships__is_corresponding",
+    "authorships__raw_author_name",
+    "authorships__raw_affiliation_strings",
+    "authorships__affiliations",
+    "authorships__author__id",
+    "authorships__author__display_name",
+    "authorships__author__orcid",
+]
+LIFETIME_NAME = "openalex_all_authors_lifetime.csv"
+LAST5_NAME = "openalex_all_authors_last5y_key_fields.csv"
+PER_AUTHOR_NAME = "openalex_all_authors_last5y_key_fields_dedup_per_author.csv"
+
+
+def _richness_score(row):
+    score = 0
+    for c in DEDUP_AUTH_COLS:
+        v = row.get(c)
+        if isinstance(v, str) and v:
+            score += v.count('|') + 1
+    return score
+
+
+def _pick_best(series):
+    best = None; best_tokens = -1; best_len = -1
+    for v in series:
+        if not isinstance(v, str) or not v.strip():
+            continue
+        tokens = v.count('|') + 1; L = len(v)
+        if tokens > best_tokens or (tokens == best_tokens and L > best_len):
+            best = v; best_tokens = tokens; best_len = L
+    if best is not None: return best
+    s = series.dropna().astype(str)
+    return s.iloc[0] if len(s) else ""
+
+
+def _dedup_groups(df: pd.DataFrame, seq: Optional[pd.Series] = None) -> Tuple[pd.DataFrame, List[int]]:
+    """Group by OpenAlex work id (fallback DOI), keep the richest row and the best authorship_*
+    values, and add the cohort_union_* columns. Groups come out in order of first appearance;
+    with `seq` given, also returns each group's first seq (for merging partitions back in order)."""
     key = df['id'].fillna(df.get('doi'))
     groups = df.groupby(key, sort=False, dropna=False)
     rows = []
+    firsts: List[int] = []
     for k, g in groups:
-        idx_best = max(range(len(g)), key=lambda i: richness_score(g.iloc[i]))
+        idx_best = max(range(len(g)), key=lambda i: _richness_score(g.iloc[i]))
         best = g.iloc[idx_best].copy()
-        for c in AUTH_COLS:
+        for c in DEDUP_AUTH_COLS:
             if c in g.columns:
-                best[c] = pick_best(g[c])
+                best[c] = _pick_best(g[c])
 
         # === NEW: carry union of cohort authors who "own" this work across the cohort ===
         try:
             # Normalize to bare OpenAlex AIDs (A##########)
-            def _norm_aid(x):
-                s = str(x or '').strip()
-                s = re.sub(r'^https?://openalex\.org/authors/', '', s, flags=re.I)
-                s = re.sub(r'^https?://openalex\.org/', '', s, flags=re.I)
-                return s
             union_ids = sorted(set(_norm_aid(x) for x in g.get('author_openalex_id', []) if str(x).strip()))
             union_names = sorted(set(str(x).strip() for x in g.get('author_name', []) if str(x).strip()))
             best['cohort_union_author_ids'] = "|".join(union_ids)
@@ -471,37 +766,247 @@ def deduplicate_compiled(input_csv_path: str, output_csv_path: str) -> None:
             best['cohort_union_author_names'] = ''
             best['cohort_union_count'] = 0
         rows.append(best)
+        if seq is not None:
+            firsts.append(int(seq.loc[g.index[0]]))
+
+    return pd.DataFrame(rows), firsts
+
+
+def _backfill_from_lifetime(out: pd.DataFrame, life: pd.DataFrame) -> pd.DataFrame:
+    """Fill authorship_* values still empty in `out` from the best lifetime value per work id."""
+    # collapse lifetime to best per id
+    life_key = life['id']
+    agg = {}
+    for c in life.columns:
+        if c == 'id': continue
+        agg[c] = _pick_best
+    life_best = life.groupby(life_key, sort=False, dropna=False).agg(agg).reset_index()
+    # left-join and fill empties
+    out = out.merge(life_best, on='id', how='left', suffixes=('', '__life'))
+    for c in DEDUP_AUTH_COLS:
+        if c in out.columns and (c + '__life') in out.columns:
+            need = out[c].isna() | (out[c].astype(str).str.strip() == '')
+            out.loc[need, c] = out.loc[need, c + '__life']
+            out.drop(columns=[c + '__life'], inplace=True)
+    return out
+
+
+def deduplicate_compiled(input_csv_path: str, output_csv_path: str, memory_mb: int = 0, workers: int = 1,
+                         engine=None) -> None:
+    """
+    Merge-aware deduplication with authorship backfill.
+    1) Group by OpenAlex work id (fallback DOI) and select the row with richest authorship_* payload.
+    2) For any authorship_* column still empty, backfill from the lifetime compiled CSV if available.
+
+    With memory_mb > 0 and inputs estimated to exceed that budget in memory, the out-of-core path
+    (deduplicate_compiled_chunked, always pandas) is used instead; its output is identical.
+    `engine` runs steps 1 and 2 (default: PandasEngine).
+    """
+    engine = engine or PandasEngine()
+    if not os.path.exists(input_csv_path):
+        logging.warning(f"Input file for deduplication does not exist: {input_csv_path}")
+        return
+
+    life_path = os.path.join(os.path.dirname(input_csv_path) or ".", LIFETIME_NAME)
+    if memory_mb > 0:
+        need = max(_estimate_frame_bytes(p) for p in (input_csv_path, life_path) if os.path.exists(p))
+        if need > memory_mb * 1024 * 1024:
+            logging.info(f"Dedup inputs need ~{need / 1e6:.0f} MB in memory (budget {memory_mb} MB); using chunked dedup")
+            deduplicate_compiled_chunked(input_csv_path, output_csv_path, memory_mb, workers)
+            return
+
+    # low_memory=False: infer each column's type over the whole file (not per internal parser block),
+    # which is also what the chunked path reproduces
+    df = pd.read_csv(input_csv_path, low_memory=False)
+    if df.empty:
+        PUBLISHER.publish_csv(pd.DataFrame(), output_csv_path)
+        return
 
-    out = pd.DataFrame(rows)
+    out = engine.dedup(df)
 
     # === Backfill from lifetime if available ===
-    life_path = os.path.join(os.path.dirname(input_csv_path) or ".", "openalex_all_authors_lifetime.csv")
     if os.path.exists(life_path):
         try:
-            life = pd.read_csv(life_path, usecols=['id'] + [c for c in AUTH_COLS if c in df.columns])
-            # collapse lifetime to best per id
-            life_key = life['id']
-            agg = {}
-            for c in life.columns:
-                if c == 'id': continue
-                agg[c] = pick_best
-            life_best = life.groupby(life_key, sort=False, dropna=False).agg(agg).reset_index()
-            # left-join and fill empties
-            out = out.merge(life_best, on='id', how='left', suffixes=('', '__life'))
-            for c in AUTH_COLS:
-                if c in out.columns and (c + '__life') in out.columns:
-                    need = out[c].isna() | (out[c].astype(str).str.strip() == '')
-                    out.loc[need, c] = out.loc[need, c + '__life']
-                    out.drop(columns=[c + '__life'], inplace=True)
+            life = pd.read_csv(life_path, usecols=['id'] + [c for c in DEDUP_AUTH_COLS if c in df.columns], low_memory=False)
+            out = engine.backfill(out, life)
         except Exception:
             logging.exception("Lifetime backfill failed; continuing without backfill.")
 
     before, after = len(df), len(out)
-    logging.info(f"Deduplicating (merge-aware + backfill) {before} -> {after} rows")
-    os.makedirs(os.path.dirname(output_csv_path) or ".", exist_ok=True)
-    out.to_csv(output_csv_path, index=False)
+    logging.info(f"Deduplicating (merge-aware + backfill, {engine.name}) {before} -> {after} rows")
+    PUBLISHER.publish_csv(out, output_csv_path)
+
+
+# ----------------------------
+# Out-of-core dedup: hash-partitioned spill files, same rules per partition, ordered merge
+# ----------------------------
+# Pass 1 reads each input in chunks to learn every column's dtype (per-chunk inference unified the
+# way pandas concatenates), so partitions parse values exactly as one whole-file read would. Pass 2
+# spills rows (tagged with their global row number) into P files by a stable hash of the group key;
+# every group lands whole in one partition. Partitions are deduplicated independently (optionally
+# in parallel) and their results are merged back by each group's first row number, which is the
+# in-memory path's group order.
+
+def _estimate_frame_bytes(path: str, sample_rows: int = 2000) -> int:
+    """Rough in-memory size of a CSV as a DataFrame, from a sample's memory/disk ratio."""
+    sample = pd.read_csv(path, nrows=sample_rows, low_memory=False)
+    if sample.empty:
+        return 0
+    disk = len(sample.to_csv(index=False).encode("utf-8")) or 1
+    return int(os.path.getsize(path) * sample.memory_usage(deep=True).sum() / disk)
+
+
+def _scan_dtypes(path: str, chunk_rows: int, usecols: Optional[List[str]] = None) -> Tuple[Dict[str, Any], int]:
+    """Return ({column: dtype}, rows) with each column's dtype as a whole-file read would infer it."""
+    seen: Dict[str, List[Any]] = {}
+    rows = 0
+    for chunk in pd.read_csv(path, chunksize=chunk_rows, usecols=usecols, low_memory=False):
+        rows += len(chunk)
+        for c, dt in chunk.dtypes.items():
+            seen.setdefault(c, []).append(dt)
+    # Unify like pd.concat does: int64 + float64 -> float64, anything + text (or bool + non-bool) -> text
+    return {c: pd.concat([pd.Series([], dtype=d) for d in dict.fromkeys(dts)]).dtype
+            for c, dts in seen.items()}, rows
+
+
+def _partition_of(key: pd.Series, n: int) -> "pd.Series":
+    # hash_pandas_object uses a fixed hash key, so partitions are stable across runs and processes
+    return (pd.util.hash_pandas_object(key, index=False) % n).astype("int64")
+
+
+def _spill(path: str, dtypes: Dict[str, Any], chunk_rows: int, n: int, key_fn, out_paths: List[str],
+           usecols: Optional[List[str]] = None) -> None:
+    """Stream `path` into n spill files by partition, adding a __seq column (global row number)."""
+    handles = [open(p, "w", encoding="utf-8", newline="") for p in out_paths]
+    started = [False] * len(out_paths)
+    try:
+        seq = 0
+        for chunk in pd.read_csv(path, chunksize=chunk_rows, dtype=dtypes, usecols=usecols, low_memory=False):
+            chunk.insert(0, "__seq", range(seq, seq + len(chunk)))
+            seq += len(chunk)
+            for part, sub in chunk.groupby(key_fn(chunk, n), sort=True):
+                sub.to_csv(handles[part], index=False, header=not started[part])
+                started[part] = True
+    finally:
+        for fh in handles:
+            fh.close()
+
+
+def _read_spill(path: str, dtypes: Dict[str, Any]) -> Optional[pd.DataFrame]:
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    return pd.read_csv(path, dtype={"__seq": "int64", **dtypes}, low_memory=False)
+
+
+def _dedup_partition(spill_path: str, life_paths: List[str], dtypes: Dict[str, Any], life_dtypes: Dict[str, Any],
+                     columns: List[str], result_path: str) -> Tuple[int, int]:
+    """Deduplicate one partition and write its rows (prefixed by __first_seq) to result_path.
+    Top-level so the process pool can pickle it. Returns (rows in, rows out)."""
+    df = _read_spill(spill_path, dtypes)
+    if df is None:
+        return 0, 0
+    seq = df.pop("__seq")
+    out, firsts = _dedup_groups(df, seq)
+    lives = [f for f in (_read_spill(p, life_dtypes) for p in life_paths) if f is not None]
+    if lives:
+        try:
+            life = pd.concat(lives, ignore_index=True).sort_values("__seq", kind="stable").drop(columns="__seq")
+            out = _backfill_from_lifetime(out, life)
+        except Exception:
+            logging.exception("Lifetime backfill failed for a dedup partition; continuing without backfill.")
+    out = out.reindex(columns=columns)
+    out.insert(0, "__first_seq", firsts)
+    out.to_csv(result_path, index=False)
+    return len(df), len(out)
+
+
+def deduplicate_compiled_chunked(input_csv_path: str, output_csv_path: str, memory_mb: int, workers: int = 1) -> None:
+    """Out-of-core deduplicate_compiled: same rules and byte-identical output, with peak memory
+    bounded by roughly memory_mb (chunk size and partition count are derived from it)."""
+    import csv
+    import heapq
+    import math
+    import tempfile
+
+    budget = max(16, memory_mb) * 1024 * 1024
+    workers = max(1, workers)
+    life_path = os.path.join(os.path.dirname(input_csv_path) or ".", LIFETIME_NAME)
+    have_life = os.path.exists(life_path)
+
+    sample = pd.read_csv(input_csv_path, nrows=2000, low_memory=False)
+    if sample.empty:
+        PUBLISHER.publish_csv(pd.DataFrame(), output_csv_path)
+        return
+    row_bytes = max(1.0, sample.memory_usage(deep=True).sum() / len(sample))
+    chunk_rows = max(1000, int(budget / (4 * row_bytes)))
+    need = max(_estimate_frame_bytes(p) for p in ([input_csv_path] + ([life_path] if have_life else [])))
+    # ~4x working set per partition (frame, groups, output, backfill join), `workers` at a time
+    n = max(1, math.ceil(need * 4 * workers / budget))
+
+    dtypes, rows_in = _scan_dtypes(input_csv_path, chunk_rows)
+    life_cols = ['id'] + [c for c in DEDUP_AUTH_COLS if c in dtypes]
+    columns = list(dtypes) + ['cohort_union_author_ids', 'cohort_union_author_names', 'cohort_union_count']
+    logging.info(f"Chunked dedup: {rows_in} rows, {n} partitions, {chunk_rows} rows/chunk, {workers} workers")
+
+    def work_key(frame: pd.DataFrame, parts: int):
+        return _partition_of(frame['id'].fillna(frame.get('doi')), parts)
+
+    # Spill next to the output, so the final publish is a same-filesystem rename
+    with tempfile.TemporaryDirectory(prefix=".dedup_spill_", dir=os.path.dirname(output_csv_path) or ".") as tmp:
+        spills = [os.path.join(tmp, f"last5-{i}.csv") for i in range(n)]
+        _spill(input_csv_path, dtypes, chunk_rows, n, work_key, spills)
+
+        life_dtypes: Dict[str, Any] = {}
+        life_spills: List[List[str]] = [[] for _ in range(n)]
+        if have_life:
+            try:
+                life_dtypes, _ = _scan_dtypes(life_path, chunk_rows, usecols=life_cols)
+                # Rows without an id all form one lifetime group; it joins to every partition's
+                # id-less works, so it gets its own spill that every partition reads
+                life_out = [os.path.join(tmp, f"life-{i}.csv") for i in range(n)] + [os.path.join(tmp, "life-null.csv")]
+
+                def life_key(frame: pd.DataFrame, parts: int):
+                    return _partition_of(frame['id'], parts).where(frame['id'].notna(), parts).astype("int64")
+
+                _spill(life_path, life_dtypes, chunk_rows, n, life_key, life_out, usecols=life_cols)
+                life_spills = [[life_out[i], life_out[n]] for i in range(n)]
+            except Exception:
+                logging.exception("Lifetime backfill failed; continuing without backfill.")
+
+        results = [os.path.join(tmp, f"result-{i}.csv") for i in range(n)]
+        jobs = [(spills[i], life_spills[i], dtypes, life_dtypes, columns, results[i]) for i in range(n)]
+        if workers > 1 and n > 1:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                counts = list(pool.map(_dedup_partition, *zip(*jobs)))
+        else:
+            counts = [_dedup_partition(*job) for job in jobs]
+
+        # k-way merge of the partition results by first row number; rows are re-emitted with the
+        # csv module (same dialect as to_csv), so the text is unchanged
+        merged = os.path.join(tmp, "merged.csv")
+        readers, files = [], []
+        try:
+            for path in results:
+                if os.path.exists(path) and os.path.getsize(path):
+                    fh = open(path, encoding="utf-8", newline="")
+                    files.append(fh)
+                    rd = csv.reader(fh)
+                    next(rd)  # header (same columns for every partition)
+                    readers.append(((int(r[0]), r[1:]) for r in rd))
+            with open(merged, "w", encoding="utf-8", newline="") as out:
+                w = csv.writer(out, lineterminator="\n")
+                w.writerow(columns)
+                for _, row in heapq.merge(*readers, key=lambda t: t[0]):
+                    w.writerow(row)
+        finally:
+            for fh in files:
+                fh.close()
+        before, after = sum(c[0] for c in counts), sum(c[1] for c in counts)
+        logging.info(f"Deduplicating (merge-aware + backfill, chunked) {before} -> {after} rows")
+        PUBLISHER.publish_file(merged, output_csv_path)
 
 # --- NEW: per-author projection from dedup -----------------
+@lru_cache(maxsize=None)
 def _norm_aid(x: str) -> str:
     s = str(x or '').strip()
     s = re.sub(r'^https?://openalex\.org/authors/', '', s, flags=re.I)
@@ -523,6 +1028,9 @@ def build_aid_to_name_map(df_roster):
                 m[aid] = nm
     return m
 
+def _split_pipes(s):
+    return [str(x).strip() for x in str(s or '').split('|') if str(x).strip()]
+
 def make_dedup_per_author(dedup_df, df_roster):
     aid2name = build_aid_to_name_map(df_roster)
     union_field = 'cohort_union_author_ids' if 'cohort_union_author_ids' in dedup_df.columns else None
@@ -550,6 +1058,18 @@ def make_dedup_per_author(dedup_df, df_roster):
                 seen.add(a2)
                 uniq_aids.append(a2)
 
+        # --- NEW: per-paper authorship lists, parsed once per row (not once per cohort author) ---
+        # list of author IDs on the paper, normalized; first occurrence wins
+        raw_ids = _split_pipes(r.get('authorships__author__id', ''))
+        index_of = {}
+        for i, aid_i in enumerate(raw_ids):
+            index_of.setdefault(_norm_aid(aid_i), i)
+
+        # Parallel lists from ETL (positions & corresponding flags)
+        pos_list  = [p.lower().strip() for p in _split_pipes(r.get('authorships__author_position', ''))]
+        # NOTE: column name in your CSV is authorships__is_corresponding (no "author__")
+        corr_list = _split_pipes(r.get('authorships__is_corresponding', ''))
+
         for aid in uniq_aids:
             rr = r.copy()
             rr['author_openalex_id'] = aid
@@ -557,25 +1077,7 @@ def make_dedup_per_author(dedup_df, df_roster):
             rr['is_representative_owner'] = 'true' if aid == rep else 'false'
 
             # --- NEW: compute the cohort author's position on THIS paper ---
-            def _split_pipes(s):
-                return [str(x).strip() for x in str(s or '').split('|') if str(x).strip()]
-
-            # list of author IDs on the paper, normalized
-            raw_ids = _split_pipes(r.get('authorships__author__id', ''))
-            norm_ids = [re.sub(r'^https?://openalex\.org/(authors/)?', '', x, flags=re.I) for x in raw_ids]
-
-            # Parallel lists from ETL (positions & corresponding flags)
-            pos_list  = [p.lower().strip() for p in _split_pipes(r.get('authorships__author_position', ''))]
-            # NOTE: column name in your CSV is authorships__is_corresponding (no "author__")
-            corr_list = _split_pipes(r.get('authorships__is_corresponding', ''))
-
-            # position of THIS cohort author on this paper
-            norm_aid = re.sub(r'^https?://openalex\.org/(authors/)?', '', str(aid), flags=re.I)
-            idx = -1
-            for i, aid_i in enumerate(norm_ids):
-                if aid_i == norm_aid:
-                    idx = i
-                    break
+            idx = index_of.get(aid, -1)
 
             this_pos = ''
             this_corr = ''
@@ -600,37 +1102,764 @@ def make_dedup_per_author(dedup_df, df_roster):
         ]
     )
 
+# ----------------------------
+# Post-harvest engines: pandas (reference) or DuckDB for dedup, backfill and the per-author projection
+# ----------------------------
+# The DuckDB engine runs the grouping, best-value selection, lifetime join and per-author fan-out as
+# multi-threaded SQL. Parsing the compiled CSVs and rendering the result rows stay in pandas, so
+# column types (and therefore the written CSV text) are exactly the reference engine's; the SQL
+# reproduces the reference's Python string rules (str.strip whitespace, "nan" for missing values
+# where the pandas code calls str() on them). `compare-engines` checks the two byte for byte.
+class PandasEngine:
+    """Reference implementation: the pandas stages above, unchanged."""
+    name = "pandas"
+
+    def dedup(self, df: pd.DataFrame) -> pd.DataFrame:
+        return _dedup_groups(df)[0]
+
+    def backfill(self, out: pd.DataFrame, life: pd.DataFrame) -> pd.DataFrame:
+        return _backfill_from_lifetime(out, life)
+
+    def aid_to_name(self, roster: pd.DataFrame) -> Dict[str, str]:
+        return build_aid_to_name_map(roster)
+
+    def per_author(self, dedup_df: pd.DataFrame, roster: pd.DataFrame) -> pd.DataFrame:
+        return make_dedup_per_author(dedup_df, roster)
+
+
+def _str_values(s: pd.Series) -> pd.Series:
+    """The values `isinstance(v, str)` accepts; everything else None."""
+    if pd.api.types.is_string_dtype(s):
+        return s.astype(object).where(s.notna(), None)
+    return s.map(lambda v: v if isinstance(v, str) else None).astype(object)
+
+
+def _py_str(s: pd.Series, missing: Optional[str] = None) -> pd.Series:
+    """str(v) per value; missing values become `missing` ("nan" is what str(NaN) gives)."""
+    text = s.astype(object).map(str, na_action="ignore") if not pd.api.types.is_string_dtype(s) else s.astype(object)
+    return text.where(s.notna(), missing)
+
+
+class DuckDBEngine:
+    """Same stages as SQL over the parsed frames (optional dependency: pip install duckdb)."""
+    name = "duckdb"
+
+    def __init__(self) -> None:
+        try:
+            import duckdb
+        except ImportError as e:
+            raise RuntimeError("--engine duckdb needs the duckdb package (pip install duckdb)") from e
+        self.con = duckdb.connect()
+        # Python's str.strip() whitespace, so SQL trims exactly what the pandas code strips
+        ws = "".join(ch for ch in map(chr, range(0x3001)) if ch.isspace())
+        self.con.execute(f"CREATE MACRO pystrip(s) AS trim(s, '{ws}')")
+        self.con.execute("CREATE MACRO norm_aid(s) AS regexp_replace(regexp_replace(pystrip(s), "
+                         "'^https?://openalex\\.org/authors/', '', 'i'), '^https?://openalex\\.org/', '', 'i')")
+        self.con.execute("CREATE MACRO ntok(s) AS length(s) - length(replace(s, '|', '')) + 1")
+        self.con.execute("CREATE MACRO split_pipes(s) AS "
+                         "list_filter(list_transform(string_split(s, '|'), x -> pystrip(x)), x -> x <> '')")
+
+    def _query(self, sql: str, **frames: pd.DataFrame) -> pd.DataFrame:
+        for name, frame in frames.items():
+            self.con.register(name, frame)
+        try:
+            return self.con.execute(sql).df()
+        finally:
+            for name in frames:
+                self.con.unregister(name)
+
+    @staticmethod
+    def _pick_best_sql(c: str, fallback: str) -> str:
+        # _pick_best: most '|' tokens, then longest, first wins ties; else first non-null as str
+        return (f"COALESCE(arg_max(\"{c}\", [ntok(\"{c}\"), length(\"{c}\"), -rid]) FILTER (WHERE pystrip(\"{c}\") <> ''), "
+                f"arg_min(\"{fallback}\", rid) FILTER (WHERE \"{fallback}\" IS NOT NULL), '') AS \"{c}\"")
+
+    @staticmethod
+    def _auth_frame(df: pd.DataFrame, cols: List[str]) -> Tuple[Dict[str, pd.Series], Dict[str, str]]:
+        data: Dict[str, pd.Series] = {}
+        fallback: Dict[str, str] = {}
+        for c in cols:
+            data[c] = _str_values(df[c])
+            fallback[c] = c
+            if not pd.api.types.is_string_dtype(df[c]):
+                fallback[c] = c + "#fb"
+                data[c + "#fb"] = _py_str(df[c])
+        return data, fallback
+
+    def dedup(self, df: pd.DataFrame) -> pd.DataFrame:
+        cols = [c for c in DEDUP_AUTH_COLS if c in df.columns]
+        data, fallback = self._auth_frame(df, cols)
+        key = df['id'].fillna(df.get('doi'))
+        w = pd.DataFrame({"rid": range(len(df)), "k": _py_str(key).values,
+                          "aid": _py_str(df['author_openalex_id'], "nan").values if 'author_openalex_id' in df.columns else None,
+                          "nm": _py_str(df['author_name'], "nan").values if 'author_name' in df.columns else None,
+                          **{c: v.values for c, v in data.items()}})
+        score = " + ".join(f"CASE WHEN \"{c}\" <> '' THEN ntok(\"{c}\") ELSE 0 END" for c in cols) or "0"
+        picks = "".join(f", {self._pick_best_sql(c, fallback[c])}" for c in cols)
+        res = self._query(f"""
+            SELECT * EXCLUDE (ids, names), array_to_string(ids, '|') AS ids, len(ids) AS n_ids,
+                   array_to_string(names, '|') AS names
+            FROM (SELECT min(rid) AS first_rid, arg_max(rid, [score, -rid]) AS best_rid{picks},
+                         COALESCE(list_sort(list_distinct(list(norm_aid(aid)) FILTER (WHERE pystrip(aid) <> ''))), []) AS ids,
+                         COALESCE(list_sort(list_distinct(list(pystrip(nm)) FILTER (WHERE pystrip(nm) <> ''))), []) AS names
+                  FROM (SELECT *, {score} AS score FROM w)
+                  GROUP BY k)
+            ORDER BY first_rid""", w=w)
+
+        out = df.iloc[res["best_rid"].to_numpy()]
+        out = out.set_axis(range(len(out))).copy()
+        for c in cols:
+            out[c] = res[c].to_numpy()
+        out['cohort_union_author_ids'] = res["ids"].to_numpy()
+        out['cohort_union_author_names'] = res["names"].to_numpy()
+        out['cohort_union_count'] = res["n_ids"].to_numpy(dtype="int64")
+        return out
+
+    def backfill(self, out: pd.DataFrame, life: pd.DataFrame) -> pd.DataFrame:
+        cols = [c for c in DEDUP_AUTH_COLS if c in out.columns and c in life.columns]
+        data, fallback = self._auth_frame(life, cols)
+        lw = pd.DataFrame({"rid": range(len(life)), "id": _py_str(life['id']).values, **{c: v.values for c, v in data.items()}})
+        ow = pd.DataFrame({"pos": range(len(out)), "id": _py_str(out['id']).values})
+        if not cols:
+            return out
+        picks = ", ".join(self._pick_best_sql(c, fallback[c]) for c in cols)
+        fills = ", ".join(f"l.\"{c}\"" for c in cols)
+        res = self._query(f"""
+            WITH l AS (SELECT id, {picks} FROM lw GROUP BY id)
+            SELECT o.pos, {fills} FROM ow o LEFT JOIN l ON o.id IS NOT DISTINCT FROM l.id ORDER BY o.pos""", lw=lw, ow=ow)
+        out = out.set_axis(range(len(out))).copy()
+        for c in cols:
+            need = (out[c].isna() | (out[c].astype(str).str.strip() == '')).to_numpy()
+            if need.any():
+                out.loc[need, c] = res[c].to_numpy()[need]
+        return out
+
+    def _roster_frame(self, roster: pd.DataFrame) -> pd.DataFrame:
+        aid_cols = [c for c in roster.columns if 'author_openalex_id' in c.lower() or c.lower()=='openalex_id']
+        name_cols = [c for c in roster.columns if 'author_name' in c.lower() or c.lower()=='name']
+        if not aid_cols:
+            return pd.DataFrame({"rid": pd.Series([], dtype="int64"), "aid": pd.Series([], dtype=object),
+                                 "nm": pd.Series([], dtype=object)})
+        return pd.DataFrame({"rid": range(len(roster)), "aid": _py_str(roster[aid_cols[0]], "nan").values,
+                             "nm": _py_str(roster[name_cols[0]], "nan").values if name_cols else ""})
+
+    _NAMES_SQL = ("SELECT norm_aid(aid) AS aid, arg_max(pystrip(nm), rid) AS nm FROM rw "
+                  "WHERE norm_aid(aid) <> '' GROUP BY 1")
+
+    def aid_to_name(self, roster: pd.DataFrame) -> Dict[str, str]:
+        res = self._query(self._NAMES_SQL, rw=self._roster_frame(roster))
+        return dict(zip(res["aid"], res["nm"]))
+
+    def per_author(self, dedup_df: pd.DataFrame, roster: pd.DataFrame) -> pd.DataFrame:
+        def text(col: str, missing: str = "nan") -> Any:
+            return _py_str(dedup_df[col], missing).values if col in dedup_df.columns else ""
+
+        w = pd.DataFrame({"rid": range(len(dedup_df)), "rep": text('author_openalex_id'),
+                          "u": text('cohort_union_author_ids'), "raw": text('authorships__author__id'),
+                          "pos": text('authorships__author_position'), "corr": text('authorships__is_corresponding')})
+        res = self._query(f"""
+            WITH names AS ({self._NAMES_SQL}),
+            b AS (
+                SELECT rid, norm_aid(rep) AS rep, split_pipes(u) AS ul,
+                       list_transform(split_pipes(raw), x -> norm_aid(x)) AS raw_ids,
+                       list_transform(split_pipes(pos), x -> pystrip(lower(x))) AS pos_l,
+                       split_pipes(corr) AS corr_l
+                FROM w),
+            c AS (
+                SELECT *, CASE WHEN len(ul) > 0 THEN ul WHEN rep <> '' THEN [rep] ELSE raw_ids END AS aids FROM b),
+            e AS (
+                SELECT rid, rep, raw_ids, pos_l, corr_l, unnest(aids) AS a, generate_subscripts(aids, 1) AS o
+                FROM c),
+            f AS (
+                SELECT rid, norm_aid(a) AS aid, min(o) AS o, any_value(rep) AS rep, any_value(list_position(raw_ids, norm_aid(a))) AS idx,
+                       any_value(pos_l) AS pos_l, any_value(corr_l) AS corr_l
+                FROM e WHERE norm_aid(a) <> '' GROUP BY rid, norm_aid(a))
+            SELECT f.rid, f.aid, names.aid IS NOT NULL AS named, names.nm,
+                   CASE WHEN f.aid = f.rep THEN 'true' ELSE 'false' END AS is_rep,
+                   COALESCE(pos_l[idx], '') AS this_pos, COALESCE(corr_l[idx], '') AS this_corr
+            FROM f LEFT JOIN names ON f.aid = names.aid
+            ORDER BY f.rid, f.o""", w=w, rw=self._roster_frame(roster))
+
+        out = dedup_df.iloc[res["rid"].to_numpy()]
+        out = out.set_axis(range(len(out))).copy()
+        if 'author_openalex_id' in out.columns:
+            out['author_openalex_id'] = res["aid"].to_numpy()
+        if 'author_name' in out.columns:
+            named = res["named"].to_numpy(dtype=bool)
+            out['author_name'] = [nm if hit else orig for nm, hit, orig in zip(res["nm"], named, out['author_name'])]
+        out['is_representative_owner'] = res["is_rep"].to_numpy()
+        out['this_author_position'] = res["this_pos"].to_numpy()
+        out['this_author_is_corresponding'] = res["this_corr"].to_numpy()
+        return out
+
+
+def get_engine(name: str):
+    if name == "duckdb":
+        return DuckDBEngine()
+    return PandasEngine()
+
+
+def _best_of(fn: Callable[[], Any], runs: int) -> Tuple[float, Any]:
+    best = None
+    for _ in range(max(1, runs)):
+        t0 = time.perf_counter()
+        value = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, value
+
+
+def compare_engines(compiled_last5_path: str, roster: pd.DataFrame, engine: str, runs: int = 3) -> bool:
+    """Run dedup (+ lifetime backfill), the name map and the per-author projection through pandas
+    and `engine` on the current compiled files; log best-of-`runs` timings and whether the rendered
+    output is byte-identical. Nothing is written. Returns True if every stage matched."""
+    df = pd.read_csv(compiled_last5_path, low_memory=False)
+    life_path = os.path.join(os.path.dirname(compiled_last5_path) or ".", LIFETIME_NAME)
+    life = None
+    if os.path.exists(life_path):
+        life = pd.read_csv(life_path, usecols=['id'] + [c for c in DEDUP_AUTH_COLS if c in df.columns], low_memory=False)
+
+    results: Dict[str, Dict[str, Tuple[float, str]]] = {}
+    for name in ("pandas", engine):
+        eng = get_engine(name)
+        t_dedup, out = _best_of(lambda: eng.backfill(eng.dedup(df), life) if life is not None else eng.dedup(df), runs)
+        dedup_csv = out.to_csv(index=False)
+        dedup_df = pd.read_csv(io.StringIO(dedup_csv))  # read back, as finalize_outputs does
+        t_names, names = _best_of(lambda: eng.aid_to_name(roster), runs)
+        t_pa, per_author = _best_of(lambda: eng.per_author(dedup_df, roster), runs)
+        results[name] = {"dedup+backfill": (t_dedup, dedup_csv),
+                         "aid_to_name": (t_names, json.dumps(names, sort_keys=True)),
+                         "per_author": (t_pa, per_author.to_csv(index=False))}
+
+    ok = True
+    logging.info(f"[engines] {len(df)} compiled rows, {0 if life is None else len(life)} lifetime rows, "
+                 f"best of {max(1, runs)} runs")
+    for stage, (t_ref, ref) in results["pandas"].items():
+        t_alt, alt = results[engine][stage]
+        ok &= alt == ref
+        logging.info(f"[engines] {stage:<15} pandas {t_ref:8.3f}s  {engine} {t_alt:8.3f}s  "
+                     f"x{t_ref / t_alt if t_alt else float('inf'):.1f}  {'identical' if alt == ref else 'DIFFERENT'}")
+    return ok
+
+
+# ----------------------------
+# Local corpus store (corpus.py)
+# ----------------------------
+def write_corpus_store(dedup_path: str, roster: pd.DataFrame, db_path: str) -> bool:
+    """(Re)build the SQLite corpus store from the dedup file; roster names label the cohort authors."""
+    pairs = None
+    if {"OpenAlexID", "Name"} <= set(roster.columns):
+        pairs = zip(roster["OpenAlexID"].fillna("").astype(str), roster["Name"].fillna("").astype(str))
+    return build_corpus_store(dedup_path, db_path, pairs)
+
+
+# ----------------------------
+# Dashboard artifacts: prebuilt publication search index
+# ----------------------------
+# normalize_text / stem / tokenize mirror normalizeText / stem / tokenize in dashboard.js exactly;
+# change them together, or the client's posting-list lookups stop agreeing with fuzzyQueryMatch.
+SEARCH_INDEX_NAME = "openalex_search_index.json"
+
+_COMBINING_RE = re.compile("[\u0300-\u036f]")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_text(t: Any) -> str:
+    if t is None or (isinstance(t, float) and t != t):
+        return ""
+    s = unicodedata.normalize("NFKD", str(t))
+    s = _COMBINING_RE.sub("", s).lower()
+    return " ".join(_NON_ALNUM_RE.sub(" ", s).split())
+
+
+def stem(w: str) -> str:
+    """Conservative stemmer: plurals and common verb endings only."""
+    if not w or len(w) <= 3:
+        return w
+    s = w
+    if s.endswith("sses"):
+        s = s[:-2]
+    elif s.endswith("ies") and len(s) > 4:
+        s = s[:-3] + "y"
+    elif s.endswith("s") and not s.endswith("ss") and len(s) > 3:
+        s = s[:-1]
+    if s.endswith("ing") and len(s) > 5:
+        s = s[:-3]
+        if len(s) > 3 and s[-1] == s[-2]:
+            s = s[:-1]
+    elif s.endswith("ed") and len(s) > 4:
+        s = s[:-2]
+        if len(s) > 3 and s[-1] == s[-2]:
+            s = s[:-1]
+    return s
+
+
+def tokenize(text: Any) -> List[str]:
+    return list(dict.fromkeys(stem(w) for w in normalize_text(text).split()))
+
+
+def build_search_index(dedup_df: pd.DataFrame, roster: pd.DataFrame) -> Dict[str, Any]:
+    """Inverted index over the same haystack the dashboard searches (concepts, subfield, primary
+    topic, title, and the roster names of cohort authors on the work).
+
+    Returns {"version", "docs": [work id, ...], "postings": {token: [doc index, ...]}}; posting lists
+    are ascending, so the client can intersect them directly.
+    """
+    name_tokens: Dict[str, List[str]] = {}
+    for _, r in roster.iterrows():
+        aid = _norm_aid(r.get("OpenAlexID") if isinstance(r.get("OpenAlexID"), str) else "")
+        if aid:
+            name_tokens[aid] = normalize_text(r.get("Name") if isinstance(r.get("Name"), str) else "").split()
+
+    def cell(r: pd.Series, col: str) -> str:
+        v = r.get(col)
+        return v if isinstance(v, str) else ""
+
+    docs: List[str] = []
+    postings: Dict[str, List[int]] = {}
+    for _, r in dedup_df.iterrows():
+        wid = cell(r, "id")
+        if not wid:
+            continue
+        ids = [_norm_aid(x) for x in cell(r, "cohort_union_author_ids").split("|") if _norm_aid(x)]
+        if not ids:
+            ids = [_norm_aid(x) for x in cell(r, "authorships__author__id").split("|") if _norm_aid(x)]
+        names = [t for aid in ids for t in name_tokens.get(aid, [])]
+        hay = " ".join([
+            cell(r, "concepts_list"), cell(r, "primary_topic__subfield__display_name"),
+            cell(r, "primary_topic__display_name"), cell(r, "display_name"), " ".join(names),
+        ])
+        doc = len(docs)
+        docs.append(wid)
+        for tok in tokenize(hay):
+            postings.setdefault(tok, []).append(doc)
+
+    return {"version": 1, "docs": docs, "postings": postings}
+
+
+def write_search_index(dedup_path: str, roster: pd.DataFrame, out_path: str) -> None:
+    dedup_df = pd.read_csv(dedup_path, dtype=str, keep_default_na=False)
+    index = build_search_index(dedup_df, roster)
+    PUBLISHER.publish_json(index, out_path, separators=(",", ":"))
+    logging.info(f"[ok] Wrote search index: {out_path} ({len(index['docs'])} works, {len(index['postings'])} tokens)")
+
+
+# ----------------------------
+# Dashboard artifacts: word-cloud term tables
+# ----------------------------
+# Term extraction mirrors wc_collectTermsBySource in dashboard.js: "topics" = primary topic + subfield,
+# "concepts" = concepts_list split on | ; , — lowercased and counted once per work.
+TERM_TABLES_NAME = "openalex_wordcloud_terms.json"
+_TERM_SPLIT_RE = re.compile(r"[|;,]")
+
+
+def work_terms(r: pd.Series, source: str) -> List[str]:
+    def cell(col: str) -> str:
+        v = r.get(col)
+        return v if isinstance(v, str) else ""
+    if source == "topics":
+        terms = [cell("primary_topic__display_name").strip(), cell("primary_topic__subfield__display_name").strip()]
+    else:
+        terms = [t.strip() for t in _TERM_SPLIT_RE.split(cell("concepts_list"))]
+    return list(dict.fromkeys(t.lower() for t in terms if t))
+
+
+def _year_key(v: Any) -> str:
+    try:
+        return str(int(float(v)))
+    except (TypeError, ValueError):
+        return ""
+
+
+def build_term_tables(dedup_df: pd.DataFrame, per_author_df: Optional[pd.DataFrame]) -> Dict[str, Any]:
+    """Interned term ids per work for both word-cloud sources, plus sparse document-frequency
+    tables per author x publication year:
+
+    - author_year_df: keyed by the dedup row's representative author (the unfocused dashboard view)
+    - owner_year_df:  keyed by every cohort owner from the per-author projection (focused view)
+
+    Shape: {"terms": [...], "docs": [work id, ...], "concepts": [[term id, ...] per doc], "topics": [...],
+            "author_year_df": {source: {author: {year: {"n": works, "df": {term id: works}}}}},
+            "owner_year_df": {...}}
+
+    The dashboard adds a cell's "df" vector whole when its filter keeps all "n" works of that
+    author-year, and falls back to the per-work lists otherwise.
+    """
+    sources = ("concepts", "topics")
+    vocab = StringTable()
+    docs: List[str] = []
+    per_doc: Dict[str, List[List[int]]] = {s: [] for s in sources}
+    doc_of: Dict[str, int] = {}
+
+    for _, r in dedup_df.iterrows():
+        wid = r.get("id")
+        if not isinstance(wid, str) or not wid or wid in doc_of:
+            continue
+        doc_of[wid] = len(docs)
+        docs.append(wid)
+        for s in sources:
+            per_doc[s].append([vocab.intern(t) for t in work_terms(r, s)])
+
+    def df_table(frame: Optional[pd.DataFrame]) -> Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]:
+        table: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]] = {s: {} for s in sources}
+        if frame is None or frame.empty:
+            return table
+        seen: set = set()
+        for wid, aid, year in zip(frame["id"], frame["author_openalex_id"], frame["publication_year"]):
+            doc = doc_of.get(wid) if isinstance(wid, str) else None
+            aid, year = _norm_aid(aid if isinstance(aid, str) else ""), _year_key(year)
+            if doc is None or not aid or not year or (aid, year, doc) in seen:
+                continue
+            seen.add((aid, year, doc))
+            for s in sources:
+                cell = table[s].setdefault(aid, {}).setdefault(year, {"n": 0, "df": {}})
+                cell["n"] += 1
+                df = cell["df"]
+                for tid in per_doc[s][doc]:
+                    df[str(tid)] = df.get(str(tid), 0) + 1
+        return table
+
+    return {
+        "version": 1,
+        "terms": [vocab.lookup(i) for i in range(len(vocab))],
+        "docs": docs,
+        **per_doc,
+        "author_year_df": df_table(dedup_df),
+        "owner_year_df": df_table(per_author_df),
+    }
+
+
+def write_term_tables(dedup_path: str, per_author_df: Optional[pd.DataFrame], out_path: str) -> None:
+    dedup_df = pd.read_csv(dedup_path, dtype=str, keep_default_na=False)
+    tables = build_term_tables(dedup_df, per_author_df)
+    PUBLISHER.publish_json(tables, out_path, separators=(",", ":"))
+    logging.info(f"[ok] Wrote word-cloud term tables: {out_path} ({len(tables['docs'])} works, {len(tables['terms'])} terms)")
+
+
+# ----------------------------
+# Dashboard artifacts: partitioned files + manifest
+# ----------------------------
+PARTITIONS_DIR = "partitions"
+PARTITION_MANIFEST_NAME = "manifest.json"
+
+
+def _write_partition_set(frame: pd.DataFrame, keys: pd.Series, dataset: str, prefix: str,
+                         out_dir: str) -> List[Dict[str, Any]]:
+    """Write one CSV per distinct key under <out_dir>/<dataset>/ and return manifest entries.
+    Files for keys that no longer exist are removed."""
+    ds_dir = os.path.join(out_dir, dataset)
+    os.makedirs(ds_dir, exist_ok=True)
+    entries = []
+    written = set()
+    for key, part in frame.groupby(keys, sort=True):
+        fn = f"{prefix}={key}.csv"
+        data = part.to_csv(index=False).encode("utf-8")
+        PUBLISHER.publish_bytes(os.path.join(ds_dir, fn), data)
+        written.add(fn)
+        entries.append({
+            "key": str(key),
+            "path": f"{PARTITIONS_DIR}/{dataset}/{fn}",
+            "rows": int(len(part)),
+            "bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        })
+    for fn in os.listdir(ds_dir):
+        if fn.endswith(".csv") and fn not in written:
+            PUBLISHER.remove(os.path.join(ds_dir, fn))
+    return entries
+
+
+def write_partitions(dedup_path: str, per_author_path: Optional[str], out_dir: str) -> Dict[str, Any]:
+    """Partition the dedup table by publication year and the per-author projection by cohort
+    author, and write a manifest with keys, row counts, byte sizes and sha256 content hashes.
+
+    The dashboard reads the manifest first and fetches only the partitions the current filter
+    needs; the hashes let browsers keep unchanged partitions cached across nightly runs.
+    """
+    # No timestamp in the manifest: it only changes when some partition's content does
+    manifest: Dict[str, Any] = {"version": 1, "datasets": {}}
+    dedup_df = pd.read_csv(dedup_path, dtype=str, keep_default_na=False)
+    years = dedup_df["publication_year"].map(lambda v: _year_key(v) or "unknown")
+    manifest["datasets"]["dedup"] = {
+        "partition_key": "publication_year",
+        "partitions": _write_partition_set(dedup_df, years, "dedup", "year", out_dir),
+    }
+    if per_author_path and os.path.exists(per_author_path):
+        pa_df = pd.read_csv(per_author_path, dtype=str, keep_default_na=False)
+        authors = pa_df["author_openalex_id"].map(lambda v: _norm_aid(v) or "unknown")
+        manifest["datasets"]["per_author"] = {
+            "partition_key": "author_openalex_id",
+            "partitions": _write_partition_set(pa_df, authors, "per_author", "author", out_dir),
+        }
+    PUBLISHER.publish_json(manifest, os.path.join(out_dir, PARTITION_MANIFEST_NAME), indent=1)
+    n = sum(len(d["partitions"]) for d in manifest["datasets"].values())
+    logging.info(f"[ok] Wrote {n} partitions + manifest under {out_dir}")
+    return manifest
+
+
+# ----------------------------
+# Dashboard artifacts: content-hashed, precompressed bundle (assets.py)
+# ----------------------------
+def write_static_assets(force: bool = False) -> bool:
+    """Rebuild <output dir>/static/ from the dashboard files: with `force` (--static-assets), or
+    whenever a bundle already exists, so its manifest never points at stale copies."""
+    if not force and not os.path.exists(asset_manifest_path(OUTPUT_DIR)):
+        return False
+    try:
+        build_static_assets(OUTPUT_DIR, publisher=PUBLISHER)
+    except Exception:
+        # Without the manifest the dashboard fetches the plain files, which are current
+        logging.exception("Failed to build the static bundle; removing its manifest.")
+        PUBLISHER.remove(asset_manifest_path(OUTPUT_DIR))
+        return False
+    return True
+
+
+# ----------------------------
+# Per-author works cache, keyed by a cheap fingerprint (Works_count + Last_work_year)
+# ----------------------------
+CACHE_DIR_NAME = "cache"
+FINGERPRINTS_NAME = "author_fingerprints.json"
+DEAD_LETTERS_NAME = "dead_letters.json"
+
+
+def roster_works_count(row: pd.Series) -> Optional[int]:
+    """The roster's Works_count for an author (added by fetch_author_metrics.py); None if missing."""
+    try:
+        wc = row.get("Works_count")
+        return None if pd.isna(wc) else int(float(wc))
+    except (TypeError, ValueError):
+        return None
+
+
+def roster_fingerprint(row: pd.Series) -> Optional[str]:
+    """Fingerprint of an author from the metrics columns fetch_author_metrics.py adds to the roster:
+    works_count and the latest publication year with works. Both only move when works are added,
+    removed or re-dated (Updated_date is bumped by any citation change, so it is not part of it;
+    citation drift is bounded by --cache-max-age-days instead).
+
+    None when Works_count is missing (failed metrics lookup); such authors are always fetched and
+    never cached, since there is nothing to validate the cache against later. A missing
+    Last_work_year (no works in OpenAlex's counts_by_year window, older roster) is left empty.
+    """
+    wc, last = row.get("Works_count"), row.get("Last_work_year")
+    if pd.isna(wc):
+        return None
+    try:
+        wc = int(float(wc))
+        last = "" if last is None or pd.isna(last) else str(int(float(last)))
+    except (TypeError, ValueError):
+        return None
+    return f"{wc}|{last}"
+
+
+def works_cache_path(author_id: str) -> str:
+    return os.path.join(OUTPUT_DIR, CACHE_DIR_NAME, "works", f"{_norm_aid(author_id).upper()}.csv.gz")
+
+
+def fingerprints_path(shard: Optional[Tuple[int, int]] = None) -> str:
+    path = os.path.join(OUTPUT_DIR, CACHE_DIR_NAME, FINGERPRINTS_NAME)
+    return shard_path(path, shard) if shard else path
+
+
+def read_works_cache(path: str) -> pd.DataFrame:
+    # Text in, text out (like merge_shards), so a cached author serializes exactly as a fetched one
+    return pd.read_csv(path, dtype=str, keep_default_na=False, compression="gzip")
+
+
+def write_works_cache(df_all: pd.DataFrame, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    df_all.to_csv(tmp, index=False, compression="gzip")
+    os.replace(tmp, path)
+
+
+def load_fingerprints(path: str) -> Dict[str, Dict[str, str]]:
+    """Return {AUTHOR_ID: {"fingerprint", "fetched"}} from the previous run (empty if none)."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh).get("authors", {})
+    except (OSError, ValueError, AttributeError):
+        logging.warning(f"Unreadable fingerprint file {path}; every author will be fetched")
+        return {}
+
+
+def save_fingerprints(path: str, entries: Dict[str, Dict[str, str]]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({"version": 1, "authors": dict(sorted(entries.items()))}, fh, indent=1)
+    os.replace(tmp, path)
+
+
+def dead_letters_path(shard: Optional[Tuple[int, int]] = None) -> str:
+    path = os.path.join(OUTPUT_DIR, CACHE_DIR_NAME, DEAD_LETTERS_NAME)
+    return shard_path(path, shard) if shard else path
+
+
+def load_dead_letters(path: str) -> Dict[str, Dict[str, Any]]:
+    """Return {AUTHOR_ID: {"name", "pages", "error", "runs", "since", "last"}} (empty if none)."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh).get("authors", {})
+    except (OSError, ValueError, AttributeError):
+        logging.warning(f"Unreadable dead-letter file {path}; ignoring it")
+        return {}
+
+
+def save_dead_letters(path: str, failures: List[Dict[str, Any]], previous: Dict[str, Dict[str, Any]]) -> None:
+    """Persist this run's still-failing authors for the next run (which fetches them again: they have
+    no fingerprint); `runs` counts consecutive failing runs. No failures: the file is removed."""
+    now = datetime.now().isoformat(timespec="seconds")
+    entries = {}
+    for d in failures:
+        prev = previous.get(d["id"], {})
+        entries[d["id"]] = {**{k: v for k, v in d.items() if k != "id"}, "runs": int(prev.get("runs", 0)) + 1,
+                            "since": prev.get("since", now), "last": now}
+    if entries:
+        save_fingerprints(path, entries)  # same {"version", "authors"} file layout
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def completeness_pct(complete: int, roster_rows: int) -> Optional[float]:
+    return round(100.0 * complete / roster_rows, 1) if roster_rows else None
+
+
+def cache_is_fresh(entry: Optional[Dict[str, str]], fingerprint: Optional[str], max_age_days: int) -> bool:
+    """True when the author's fingerprint is unchanged and the cached rows are not too old.
+
+    The age cap bounds how stale per-work citation counts can get, since those change without
+    touching the author's works_count."""
+    if not entry or fingerprint is None or entry.get("fingerprint") != fingerprint:
+        return False
+    try:
+        fetched = datetime.fromisoformat(entry.get("fetched", ""))
+    except ValueError:
+        return False
+    return (datetime.now() - fetched).days < max_age_days
+
+
+# ----------------------------
+# Refresh scheduling (--budget-requests / --budget-minutes): stalest authors first, within a budget
+# ----------------------------
+MIN_REFRESH_AGE_DAYS = 1.0  # an unchanged author fetched more recently than this is never due
+
+
+def staleness_score(entry: Optional[Dict[str, Any]], fingerprint: Optional[str], max_age_days: int,
+                    now: Optional[datetime] = None) -> float:
+    """How much refreshing a cached author is worth: inf without a usable cache entry (it must be
+    fetched), otherwise the sum of
+      - 1 + the works_count increase, if the roster fingerprint changed (known new/changed works);
+      - the author's last-5y publication rate (works/year, kept in the fingerprint entry) times the
+        years since the last fetch (expected works missed);
+      - days since the last fetch / max_age_days (citation counts drifting).
+    0 for an unchanged author fetched less than MIN_REFRESH_AGE_DAYS ago."""
+    if not entry or fingerprint is None:
+        return float("inf")
+    try:
+        age = ((now or datetime.now()) - datetime.fromisoformat(entry.get("fetched", ""))).total_seconds() / 86400
+    except ValueError:
+        return float("inf")
+    changed = entry.get("fingerprint") != fingerprint
+    if not changed and age < MIN_REFRESH_AGE_DAYS:
+        return 0.0
+    score = age / max(1, max_age_days) + float(entry.get("rate") or 0) * age / 365.25
+    if changed:
+        try:
+            grown = int(fingerprint.split("|", 1)[0]) - int(str(entry.get("fingerprint")).split("|", 1)[0])
+        except ValueError:
+            grown = 0
+        score += 1 + max(0, grown)
+    return score
+
+
+def fetch_cost(works_count: Optional[int], split_min_works: int = SPLIT_MIN_WORKS) -> int:
+    """Estimated /works requests to download an author: one per page, plus the year probe if split."""
+    wc = works_count or 0
+    return max(1, -(-wc // PER_PAGE)) + (1 if split_min_works > 0 and wc >= split_min_works else 0)
+
+
+def schedule_refresh(candidates: List[Tuple[str, float, int]], budget: int) -> Tuple[set, int]:
+    """Pick (author_id, score, cost) candidates by descending score while their estimated requests fit
+    in `budget`. Authors with score inf (no usable cache) are always picked and counted, so the
+    returned requests can exceed `budget`: the budget is a cap on refreshes, not on new authors.
+    Returns (ids, requests)."""
+    picked: set = set()
+    spent = 0
+    for aid, score, cost in sorted(candidates, key=lambda c: -c[1]):
+        if score <= 0:
+            break
+        if score == float("inf") or spent + cost <= budget:
+            picked.add(aid)
+            spent += cost
+    return picked, spent
+
+
 # ----------------------------
 # OpenAlex fetch (cursor pagination + backoff) — self-contained in this file
 # ----------------------------
 
-def fetch_author_works_filtered(full_author_id: str, years_back: int = 5) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    """Fetch all works for an author using OpenAlex cursor pagination, flatten with sep="__",
-    return (df_all, df_lastN). Adds author tags to df_lastN. Does NOT throw on HTTP errors; logs instead."""
-    author_uri = _ensure_openalex_uri(full_author_id)
-    if not author_uri:
-        logging.warning("fetch_author_works_filtered: empty/invalid author id")
-        return pd.DataFrame(), pd.DataFrame()
+_CURSOR_RE = re.compile(rb'"next_cursor"\s*:\s*(?:null|"([^"]*)")')
+_EMPTY_RESULTS_RE = re.compile(rb'"results"\s*:\s*\[\s*\]')
 
-    current_year = datetime.now().year
-    min_year = current_year - years_back + 1
 
+def _page_cursor(payload: bytes) -> Tuple[bool, Optional[str]]:
+    """Return (has_results, next_cursor) for a raw page without decoding it.
+
+    OpenAlex puts "meta" before "results", so only the head of the payload is scanned; the full
+    decode is left to the transform stage. Falls back to json.loads if the layout is unexpected.
+    """
+    head_end = payload.find(b'"results"')
+    m = _CURSOR_RE.search(payload, 0, head_end) if head_end >= 0 else None
+    if m is None:
+        data = json.loads(payload)
+        return bool(data.get("results")), (data.get("meta") or {}).get("next_cursor")
+    cursor = m.group(1).decode("utf-8") if m.group(1) is not None else None
+    return _EMPTY_RESULTS_RE.match(payload, head_end) is None, cursor
+
+
+@dataclass
+class PageFetch:
+    """Raw /works pages downloaded for one author. complete=False: pagination stopped at `cursor`
+    (the page that failed, i.e. where to resume) because of `error`. A year-split download
+    (fetch_author_pages_split, split=True) instead keeps {year filter: cursor} for each unfinished
+    range in `resume`."""
+    pages: List[bytes]
+    complete: bool
+    cursor: str = "*"
+    error: str = ""
+    resume: Dict[str, str] = field(default_factory=dict)
+    split: bool = False
+
+
+def fetch_author_pages(author_uri: str, cursor: str = "*", years: str = "") -> PageFetch:
+    """Download every /works page for an author from `cursor` on (cursor pagination + backoff) and
+    return the raw payloads undecoded; `years` is an extra publication_year filter (see year_ranges).
+    Does NOT throw on HTTP errors; logs instead and returns the pages fetched so far with
+    complete=False and the cursor to resume from."""
     params = {
-        "filter": f"author.id:{author_uri}",
+        "filter": f"author.id:{author_uri}" + (f",{years}" if years else ""),
+        "select": WORKS_SELECT,
         "per-page": PER_PAGE,
-        "cursor": "*",
+        "cursor": cursor,
     }
 
-    works_all: List[Dict[str, Any]] = []
+    pages: List[bytes] = []
     retries = 0
-
-    logging.info(f"OpenAlex fetch for {author_uri} (last {years_back} years >= {min_year})")
+    complete = False
+    error = ""
 
     while True:
         try:
-            resp = requests.get(BASE_URL, params=params, headers=HEADERS, timeout=TIMEOUT)
+            resp = openalex_get(BASE_URL, params)
         except requests.RequestException as e:
             logging.exception(f"OpenAlex request exception: {e}")
+            error = f"{type(e).__name__}: {e}"
             break
 
         if resp.status_code in RETRIABLE_STATUS:
@@ -642,6 +1871,7 @@ def fetch_author_works_filtered(full_author_id: str, years_back: int = 5) -> Tup
             retries += 1
             if retries > MAX_RETRIES:
                 logging.error("Max retries exceeded; aborting fetch for this author.")
+                error = f"HTTP {resp.status_code} after {MAX_RETRIES} retries"
                 break
             continue
 
@@ -649,33 +1879,165 @@ def fetch_author_works_filtered(full_author_id: str, years_back: int = 5) -> Tup
             resp.raise_for_status()
         except requests.HTTPError as e:
             logging.exception(f"HTTP error from OpenAlex: {e}")
+            error = f"HTTP {resp.status_code}"
             break
 
-        data = resp.json()
-        results = data.get("results", [])
-        logging.debug(f"Fetched {len(results)} results at cursor {params.get('cursor')!r}")
-        if not results:
+        payload = resp.content
+        has_results, next_cursor = _page_cursor(payload)
+        logging.debug(f"Fetched {len(payload)} bytes at cursor {params.get('cursor')!r}")
+        if not has_results:
+            complete = True
             break
 
-        works_all.extend(results)
-        next_cursor = data.get("meta", {}).get("next_cursor")
+        pages.append(payload)
         if not next_cursor:
+            complete = True
             break
 
         params["cursor"] = next_cursor
         retries = 0  # reset after success
 
-    if not works_all:
-        logging.info("No works returned from OpenAlex for this author.")
-        return pd.DataFrame(), pd.DataFrame()
+    return PageFetch(pages, complete, params["cursor"], error)
+
 
-    # Flatten nested JSON into columns using the __ separator
-    df_all = pd.json_normalize(works_all, sep="__")
+def probe_year_counts(author_uri: str) -> Optional[Tuple[int, Dict[int, int]]]:
+    """(works count, {publication_year: works}) for an author from one group_by=publication_year
+    request; None if the request fails."""
+    params = {"filter": f"author.id:{author_uri}", "group_by": "publication_year"}
+    try:
+        resp = openalex_get(BASE_URL, params)
+        resp.raise_for_status()
+        data = resp.json()
+    except (requests.RequestException, ValueError) as e:
+        logging.warning(f"publication_year probe failed for {author_uri} ({e}); fetching it in one pass")
+        return None
+    years: Dict[int, int] = {}
+    for group in data.get("group_by") or []:
+        try:
+            years[int(group["key"])] = int(group["count"])
+        except (KeyError, TypeError, ValueError):
+            continue  # "unknown" year
+    return int((data.get("meta") or {}).get("count") or 0), years
+
+
+def year_ranges(year_counts: Dict[int, int], target: int = SPLIT_RANGE_WORKS,
+                max_ranges: int = SPLIT_MAX_RANGES) -> List[str]:
+    """Cut consecutive years into at most max_ranges runs of about `target` works and return them as
+    disjoint publication_year filters. The first range is open below and the last open above, so
+    together they match every work with a year, including years the probe did not see; a single
+    year is never split. [] if one range would do."""
+    years = sorted(y for y, n in year_counts.items() if n > 0)
+    total = sum(year_counts[y] for y in years)
+    parts = min(max_ranges, -(-total // max(1, target)))
+    if parts < 2 or len(years) < 2:
+        return []
+    bounds: List[int] = []  # last year of every range but the final one
+    acc = 0
+    for y in years[:-1]:
+        acc += year_counts[y]
+        if acc >= total * (len(bounds) + 1) / parts and len(bounds) < parts - 1:
+            bounds.append(y)
+    filters, lo = [], None
+    for hi in bounds + [None]:
+        clauses = ([f"publication_year:>{lo}"] if lo is not None else []) + \
+                  ([f"publication_year:<{hi + 1}"] if hi is not None else [])
+        filters.append(",".join(clauses))
+        lo = hi
+    return filters if len(filters) > 1 else []
+
+
+_SPLIT_POOL: Optional[ThreadPoolExecutor] = None
+_SPLIT_POOL_LOCK = threading.Lock()
+
+
+def _split_pool() -> ThreadPoolExecutor:
+    global _SPLIT_POOL
+    with _SPLIT_POOL_LOCK:
+        if _SPLIT_POOL is None:
+            _SPLIT_POOL = ThreadPoolExecutor(max_workers=max(1, SPLIT_WORKERS), thread_name_prefix="fetch-range")
+        return _SPLIT_POOL
+
+
+def _fetch_ranges(author_uri: str, cursors: Dict[str, str]) -> PageFetch:
+    """Page every {year filter: cursor} range concurrently; pages are merged in range order."""
+    futures = [(years, _split_pool().submit(fetch_author_pages, author_uri, cursor, years))
+               for years, cursor in cursors.items()]
+    pages: List[bytes] = []
+    resume: Dict[str, str] = {}
+    errors: List[str] = []
+    for years, fut in futures:
+        try:
+            f = fut.result()
+        except Exception as e:
+            logging.exception(f"Error fetching {author_uri} [{years}]")
+            f = PageFetch([], False, cursors[years], f"{type(e).__name__}: {e}")
+        pages.extend(f.pages)
+        if not f.complete:
+            resume[years] = f.cursor
+            errors.append(f"[{years}] {f.error}")
+    return PageFetch(pages, not resume, "*", "; ".join(errors), resume, split=True)
+
+
+def fetch_author_pages_split(author_uri: str, works_count: Optional[int] = None,
+                             min_works: int = SPLIT_MIN_WORKS) -> PageFetch:
+    """fetch_author_pages for a prolific author: when works_count (the roster's Works_count) is at least
+    min_works, a group_by=publication_year probe sizes disjoint year ranges (year_ranges), which are
+    paged concurrently, so the author's latency is bounded by its largest range rather than its whole
+    bibliography. Falls back to one cursor pass for smaller or unknown authors, a failed probe, or
+    works without a publication_year (no range filter would match them). The ranges are disjoint, and
+    the transform keeps one row per work id (unique=True), should a year correction move a work
+    between ranges mid-fetch."""
+    if not works_count or min_works <= 0 or works_count < min_works:
+        return fetch_author_pages(author_uri)
+    probe = probe_year_counts(author_uri)
+    ranges = year_ranges(probe[1]) if probe and sum(probe[1].values()) == probe[0] else []
+    if not ranges:
+        return fetch_author_pages(author_uri)
+    logging.info(f"Fetching {author_uri} ({probe[0]} works) as {len(ranges)} publication_year ranges")
+    return _fetch_ranges(author_uri, {years: "*" for years in ranges})
+
+
+def resume_author_pages(author_uri: str, prev: PageFetch) -> PageFetch:
+    """The pages after where `prev` stopped: its unfinished year ranges, or its cursor."""
+    if prev.resume:
+        return _fetch_ranges(author_uri, prev.resume)
+    return fetch_author_pages(author_uri, cursor=prev.cursor)
+
+
+def transform_author_pages(pages: Optional[List[bytes]], author_uri: str, years_back: int = 5,
+                           cache_path: Optional[str] = None, unique: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Decode raw pages into Work records and build the flat sep="__" columns from them; return
+    (df_all, df_lastN). Adds author tags to df_lastN. CPU-only, so it can run in a worker process.
+    unique=True keeps only the first record of each work id (pages merged from year ranges).
+
+    With pages=None the lifetime frame is read back from cache_path instead (fingerprint hit);
+    otherwise a non-empty df_all is written to cache_path when one is given."""
+    if pages is None:
+        df_all = read_works_cache(cache_path)
+    else:
+        works_all: List[Work] = []
+        seen: set = set()
+        for payload in pages:
+            for w in decode_page(payload)[0]:
+                if not unique or w.id is None or w.id not in seen:
+                    seen.add(w.id)
+                    works_all.append(w)
+
+        if not works_all:
+            logging.info("No works returned from OpenAlex for this author.")
+            return pd.DataFrame(), pd.DataFrame()
+
+        # Build the output columns directly from the decoded records
+        df_all = pd.DataFrame(works_to_columns(works_all))
+        logging.debug(f"String table: {len(STRINGS)} distinct names/ids interned in this process")
 
     # Normalize/ensure key convenience columns exist (year + date)
     df_all["publication_year"] = pd.to_numeric(df_all.get("publication_year"), errors="coerce")
     # NOTE: keep timezone-aware parsing; store as date for cheap comparisons
     df_all["publication_date"] = pd.to_datetime(df_all.get("publication_date"), errors="coerce", utc=True).dt.date
+
+    if pages is not None and cache_path:
+        write_works_cache(df_all, cache_path)
     
     # Rolling 5-year window by publication DATE (preferred)
     today = pd.Timestamp.utcnow().normalize().date()
@@ -693,14 +2055,6 @@ def fetch_author_works_filtered(full_author_id: str, years_back: int = 5) -> Tup
     
         df_last = df_all[mask_date | mask_year].copy()
 
-
-    # Add convenience columns (authors, institutions, concepts_list, fwci placeholder)
-    df_all = add_convenience_columns(df_all)
-    df_last = add_convenience_columns(df_last)
-
-    df_all = build_authorship_columns(df_all)
-    df_last = build_authorship_columns(df_last)
-
     # Tag with author for downstream grouping
     df_last["author_name"] = author_uri.rsplit("/", 1)[-1]
     df_last["author_openalex_id"] = author_uri
@@ -713,111 +2067,1398 @@ def fetch_author_works_filtered(full_author_id: str, years_back: int = 5) -> Tup
     return df_all, df_last
 
 
+def fetch_author_works_filtered(full_author_id: str, years_back: int = 5,
+                                works_count: Optional[int] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Fetch and transform one author in the calling thread; return (df_all, df_lastN). With the
+    author's works_count, prolific authors are fetched in year ranges (fetch_author_pages_split)."""
+    author_uri = _ensure_openalex_uri(full_author_id)
+    if not author_uri:
+        logging.warning("fetch_author_works_filtered: empty/invalid author id")
+        return pd.DataFrame(), pd.DataFrame()
+
+    min_year = datetime.now().year - years_back + 1
+    logging.info(f"OpenAlex fetch for {author_uri} (last {years_back} years >= {min_year})")
+    fetched = fetch_author_pages_split(author_uri, works_count)
+    return transform_author_pages(fetched.pages, author_uri, years_back, unique=fetched.split)
+
+
 # ----------------------------
-# Main
+# Staged harvest pipeline: fetchers -> transform pool -> single writer
 # ----------------------------
 
-def main() -> None:
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    log_dir = os.path.join(OUTPUT_DIR, "logs")
-    os.makedirs(log_dir, exist_ok=True)
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    busy_s: float = 0.0
+    max_depth: int = 0   # deepest the stage's input queue got
+
+    def add(self, seconds: float) -> None:
+        self.items += 1
+        self.busy_s += seconds
+
+    def summary(self, wall_s: float) -> str:
+        rate = self.items / wall_s if wall_s > 0 else 0.0
+        return f"{self.name}: {self.items} items, {rate:.2f}/s, busy {self.busy_s:.1f}s, max queue {self.max_depth}"
+
+
+def _transform_task(pages: Optional[List[bytes]], author_uri: str, cache_path: Optional[str],
+                    unique: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # Top-level so the process pool can pickle it
+    return transform_author_pages(pages, author_uri, cache_path=cache_path, unique=unique)
+
+
+def _init_transform_worker(log_queue, level: int, levels: Dict[str, int]) -> None:
+    # Spawned workers start with an unconfigured root logger: queue their records to the parent,
+    # which writes them through its own handlers (console + JSON run log)
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+    for name, lvl in levels.items():
+        logging.getLogger(name).setLevel(lvl)
+
+
+class _ForwardToLogger(logging.Handler):
+    """Hands a record from a worker process to the same-named logger here."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        logging.getLogger(record.name).handle(record)
+
+
+def run_harvest_pipeline(tasks: List[Tuple[str, str]], write_result,
+                         fetch_workers: int = 4, transform_workers: int = 2, queue_size: int = 8,
+                         report_every_s: float = 30.0,
+                         cache_lookup: Optional[Callable[[str], Tuple[Optional[str], bool]]] = None,
+                         dead_letter_retries: int = 2, dead_letter_backoff: float = 30.0,
+                         works_count: Optional[Callable[[str], Optional[int]]] = None,
+                         split_min_works: int = SPLIT_MIN_WORKS) -> List[Dict[str, Any]]:
+    """Overlap downloads and transforms for a list of (author_name, author_id) tasks.
+
+    - fetch_workers threads download raw pages (network-bound) into a bounded raw queue;
+    - a dispatcher hands raw pages to a process pool of transform_workers (CPU-bound decode and
+      column building; 0 = transform in the dispatcher thread);
+    - the calling thread is the single writer: write_result(name, id, df_all, df_last, origin) is
+      called in task (roster) order, with (None, None) for authors whose fetch or transform failed.
+      origin is "cache" (rows reused), "fetched" (complete download), "partial" (download cut
+      short by errors; rows are written but not cached) or "stale" (download failed for good; the
+      author's earlier cached rows are written instead of a partial or empty result).
+
+    cache_lookup(author_id) -> (cache_path, reuse) lets fetchers skip the download of unchanged
+    authors (reuse=True, rows are read from cache_path) and tells the transform where to cache a
+    complete download (cache_path, or None to not cache). works_count(author_id) -> the roster's
+    Works_count: authors with at least split_min_works works are downloaded as concurrent
+    publication_year ranges (fetch_author_pages_split; 0 = never).
+
+    At most queue_size authors are in flight between the first fetch and the write, which bounds
+    memory regardless of how far ahead the fetchers get. Per-stage throughput and queue depth are
+    logged every report_every_s seconds and at the end. All fetchers share RATE_LIMIT
+    (OPENALEX_MAX_RPS), and transform workers log through the parent's handlers.
+
+    Downloads that fail or stop early go to a dead-letter queue instead of being written: a
+    DeadLetterRetrier thread retries them (resuming at the failed cursor) while the main pass goes
+    on, and they are written after the other authors. Returns the dead letters that still failed. dead_letter_retries=0 writes
+    partial downloads in order and counts raised fetches as failures, as before (both are returned).
+    Either way, an author that stays incomplete but has a cached earlier download is written from
+    that cache ("stale") rather than dropped or cut short.
+    """
+    task_q: "queue.Queue[Optional[Tuple[int, str, str]]]" = queue.Queue()
+    raw_q: "queue.Queue[Optional[Tuple[int, str, Optional[List[bytes]], Optional[str], bool]]]" = queue.Queue(maxsize=queue_size)
+    done_q: "queue.Queue[Tuple[int, Any]]" = queue.Queue()
+    in_flight = threading.Semaphore(max(queue_size, fetch_workers))
+    stats = {k: StageStats(k) for k in ("fetch", "transform", "write")}
+    stats_lock = threading.Lock()
+    pages_fetched = [0, 0]  # pages, bytes
+    origins: Dict[int, str] = {}
+    dead: Dict[int, Optional[str]] = {}  # dead-lettered task seq -> cache path
+    retrier = DeadLetterRetrier(tasks, dead_letter_retries, dead_letter_backoff) if dead_letter_retries > 0 else None
+    cut_short: List[Dict[str, Any]] = []  # dead_letter_retries=0: incomplete downloads, not retried
+    deferred = object()  # done_q marker: this author was dead-lettered, write nothing now
+
+    def stale_path(aid: str) -> Optional[str]:
+        # A complete earlier download to fall back on when this one gives up
+        path = works_cache_path(aid) if cache_lookup else None
+        return path if path and os.path.exists(path) else None
+
+    for seq, (name, aid) in enumerate(tasks):
+        task_q.put((seq, name, aid))
+    for _ in range(fetch_workers):
+        task_q.put(None)
+
+    def fetcher() -> None:
+        while True:
+            # Take the slot before the task, so the oldest unwritten author always holds one
+            in_flight.acquire()
+            item = task_q.get()
+            if item is None:
+                in_flight.release()
+                return
+            seq, name, aid = item
+            with stats_lock:
+                # Authors still waiting for a fetcher (the end-of-input markers left are not tasks)
+                stats["fetch"].max_depth = max(stats["fetch"].max_depth,
+                                               max(0, task_q.qsize() - fetch_workers))
+            t0 = time.perf_counter()
+            uri = _ensure_openalex_uri(aid)
+            cache_path, reuse = cache_lookup(aid) if cache_lookup else (None, False)
+            if reuse:
+                logging.info(f"Reusing cached works for {uri}")
+                with stats_lock:
+                    origins[seq] = "cache"
+                raw_q.put((seq, uri, None, cache_path, False))
+                continue
+            try:
+                logging.info(f"OpenAlex fetch for {uri}")
+                fetched = fetch_author_pages_split(uri, works_count(aid) if works_count else None, split_min_works)
+            except Exception as e:
+                logging.exception(f"Error fetching works for {name} ({aid})")
+                fetched = PageFetch([], False, "*", f"{type(e).__name__}: {e}")
+                if dead_letter_retries <= 0:
+                    with stats_lock:
+                        cut_short.append(dead_letter_entry(name, aid, fetched))
+                    stale = stale_path(aid)
+                    if stale:
+                        with stats_lock:
+                            origins[seq] = "stale"
+                        raw_q.put((seq, uri, None, stale, False))
+                    else:
+                        done_q.put((seq, None))
+                    continue
+            with stats_lock:
+                stats["fetch"].add(time.perf_counter() - t0)
+                pages_fetched[0] += len(fetched.pages)
+                pages_fetched[1] += sum(len(p) for p in fetched.pages)
+                origins[seq] = "fetched" if fetched.complete else "partial"
+                if not fetched.complete and dead_letter_retries > 0:
+                    dead[seq] = cache_path
+                elif not fetched.complete:
+                    cut_short.append(dead_letter_entry(name, aid, fetched))
+            stale = stale_path(aid) if not fetched.complete and seq not in dead else None
+            if stale:
+                with stats_lock:
+                    origins[seq] = "stale"
+                raw_q.put((seq, uri, None, stale, False))
+                continue
+            if seq in dead:
+                where = f"ranges {sorted(fetched.resume)}" if fetched.resume else f"cursor {fetched.cursor!r}"
+                logging.warning(f"Dead-lettered {name} ({aid}) at {where}: {fetched.error}")
+                retrier.add(seq, fetched)
+                done_q.put((seq, deferred))
+                continue
+            raw_q.put((seq, uri, fetched.pages, cache_path if fetched.complete else None, fetched.split))
+            with stats_lock:
+                stats["transform"].max_depth = max(stats["transform"].max_depth, raw_q.qsize())
 
-    log_path = os.path.join(log_dir, f"etl_run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="[%(asctime)s] %(levelname)s: %(message)s",
-        handlers=[
-            logging.FileHandler(log_path),
-            logging.StreamHandler(sys.stdout),  # show in GH Actions console too
-        ],
-    )
+    def on_transformed(seq: int, t0: float, fut) -> None:
+        try:
+            res = fut.result()
+        except Exception:
+            name, aid = tasks[seq]
+            logging.exception(f"Error transforming works for {name} ({aid})")
+            res = None
+        with stats_lock:
+            stats["transform"].add(time.perf_counter() - t0)
+        done_q.put((seq, res))
+
+    def dispatcher(pool) -> None:
+        remaining = fetch_workers
+        while remaining:
+            item = raw_q.get()
+            if item is None:
+                remaining -= 1
+                continue
+            seq, uri, pages, cache_path, unique = item
+            t0 = time.perf_counter()
+            if pool is None:
+                fut: Future = Future()
+                try:
+                    fut.set_result(transform_author_pages(pages, uri, cache_path=cache_path, unique=unique))
+                except Exception as e:
+                    fut.set_exception(e)
+                on_transformed(seq, t0, fut)
+            else:
+                pool.submit(_transform_task, pages, uri, cache_path, unique).add_done_callback(
+                    lambda f, seq=seq, t0=t0: on_transformed(seq, t0, f))
+
+    started = time.perf_counter()
+    pool = log_listener = None
+    if transform_workers > 0:
+        ctx = multiprocessing.get_context("spawn")
+        log_q = ctx.Queue()
+        log_listener = logging.handlers.QueueListener(log_q, _ForwardToLogger())
+        log_listener.start()
+        levels = {name: logging.getLogger(name).level for name in QUIET_LOGGERS}
+        pool = ProcessPoolExecutor(max_workers=transform_workers, mp_context=ctx, initializer=_init_transform_worker,
+                                   initargs=(log_q, logging.getLogger().level, levels))
+    fetchers = [threading.Thread(target=fetcher, name=f"fetch-{i}", daemon=True) for i in range(fetch_workers)]
+    disp = threading.Thread(target=dispatcher, args=(pool,), name="dispatch", daemon=True)
+    for t in fetchers:
+        t.start()
+    disp.start()
+
+    def closer() -> None:
+        # Tell the dispatcher that fetching is over once every fetcher has exited
+        for t in fetchers:
+            t.join()
+        for _ in range(fetch_workers):
+            raw_q.put(None)
+    threading.Thread(target=closer, name="fetch-closer", daemon=True).start()
+
+    pending: Dict[int, Any] = {}
+    next_seq = 0
+    last_report = time.perf_counter()
+    try:
+        while next_seq < len(tasks):
+            try:
+                seq, res = done_q.get(timeout=1.0)
+                pending[seq] = res
+            except queue.Empty:
+                pass
+            stats["write"].max_depth = max(stats["write"].max_depth, len(pending))
+            while next_seq in pending:
+                res = pending.pop(next_seq)
+                name, aid = tasks[next_seq]
+                t0 = time.perf_counter()
+                with stats_lock:
+                    origin = origins.pop(next_seq, "fetched")
+                if res is not deferred:
+                    df_all, df_last = res if res is not None else (None, None)
+                    write_result(name, aid, df_all, df_last, origin)
+                    stats["write"].add(time.perf_counter() - t0)
+                in_flight.release()
+                next_seq += 1
+            if time.perf_counter() - last_report >= report_every_s:
+                last_report = time.perf_counter()
+                logging.info(f"[pipeline] {next_seq}/{len(tasks)} written; queues: raw={raw_q.qsize()} "
+                             f"reorder={len(pending)} remaining={task_q.qsize()}")
+        if retrier is not None:
+            best = retrier.results()
+            failures = write_dead_letters(best, dead, tasks, write_result, dead_letter_retries,
+                                          stale_path=stale_path) if best else []
+        else:
+            failures = cut_short
+    finally:
+        disp.join(timeout=5)
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        if log_listener is not None:
+            log_listener.stop()
+
+    wall = time.perf_counter() - started
+    logging.info(f"[pipeline] {len(tasks)} authors in {wall:.1f}s "
+                 f"(fetch_workers={fetch_workers}, transform_workers={transform_workers}, queue_size={queue_size}); "
+                 f"{pages_fetched[0]} pages, {pages_fetched[1] / 1e6:.1f} MB")
+    for st in stats.values():
+        logging.info(f"[pipeline] {st.summary(wall)}")
+    return failures
+
+
+def dead_letter_entry(name: str, aid: str, fetched: PageFetch) -> Dict[str, Any]:
+    # No cursor: the partial pages are not kept, so the next run fetches the author from the start
+    # (and a cursor would have expired by then anyway)
+    return {"id": _norm_aid(aid).upper(), "name": name, "pages": len(fetched.pages), "error": fetched.error}
+
+
+class DeadLetterRetrier:
+    """Retries dead-lettered downloads on its own thread while the main pass goes on.
+
+    Each author is retried backoff * 2**round after its previous attempt, up to `retries` rounds:
+    it resumes at the cursor (or year ranges) it failed on, or starts over in one pass if resuming
+    yielded nothing (cursors expire). Only this thread waits out the backoff; fetchers and the
+    writer never do. results() waits for the outstanding rounds and returns {task seq: best fetch}."""
+
+    def __init__(self, tasks: List[Tuple[str, str]], retries: int = 2, backoff: float = 30.0) -> None:
+        self.tasks = tasks
+        self.retries = retries
+        self.backoff = backoff
+        self.best: Dict[int, PageFetch] = {}
+        self._rounds: Dict[int, int] = {}
+        self._restart: Dict[int, bool] = {}
+        self._due: List[Tuple[float, int]] = []  # heap of (monotonic due time, seq)
+        self._cv = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="dead-letter", daemon=True)
+        self._thread.start()
+
+    def add(self, seq: int, fetched: PageFetch) -> None:
+        with self._cv:
+            self.best[seq] = fetched
+            self._rounds[seq] = 0
+            self._restart[seq] = False
+            heapq.heappush(self._due, (time.monotonic() + self.backoff, seq))
+            self._cv.notify()
+
+    def results(self) -> Dict[int, PageFetch]:
+        with self._cv:
+            self._closed = True
+            if self._due:
+                wait = max(0.0, self._due[0][0] - time.monotonic())
+                logging.info(f"[dead-letter] {len(self._due)} authors still to retry (next in {wait:.0f}s)")
+            self._cv.notify()
+        self._thread.join()
+        return self.best
+
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                while True:
+                    if not self._due:
+                        if self._closed:
+                            return
+                        self._cv.wait()
+                        continue
+                    wait = self._due[0][0] - time.monotonic()
+                    if wait <= 0:
+                        seq = heapq.heappop(self._due)[1]
+                        break
+                    self._cv.wait(wait)
+            self._attempt(seq)
+
+    def _attempt(self, seq: int) -> None:
+        name, aid = self.tasks[seq]
+        prev = self.best[seq]
+        rnd = self._rounds[seq] + 1
+        fresh = self._restart[seq] or (prev.cursor == "*" and not prev.resume)
+        logging.info(f"[dead-letter] retrying {name} ({aid}), round {rnd}/{self.retries}")
+        try:
+            uri = _ensure_openalex_uri(aid)
+            more = fetch_author_pages(uri) if fresh else resume_author_pages(uri, prev)
+        except Exception as e:
+            logging.exception(f"Error fetching works for {name} ({aid})")
+            more = PageFetch([], False, "*" if fresh else prev.cursor, f"{type(e).__name__}: {e}",
+                             {} if fresh else dict(prev.resume))
+        got = more if fresh else PageFetch(prev.pages + more.pages, more.complete, more.cursor, more.error,
+                                           more.resume, split=prev.split)
+        with self._cv:
+            if got.complete or len(got.pages) > len(prev.pages):
+                self.best[seq] = got
+                self._restart[seq] = False
+            else:
+                prev.error = more.error or prev.error
+                self._restart[seq] = True
+            self._rounds[seq] = rnd
+            if not self.best[seq].complete and rnd < self.retries:
+                heapq.heappush(self._due, (time.monotonic() + self.backoff * 2 ** rnd, seq))
+
+
+def write_dead_letters(best: Dict[int, PageFetch], cache_paths: Dict[int, Optional[str]],
+                       tasks: List[Tuple[str, str]], write_result, retries: int,
+                       stale_path: Optional[Callable[[str], Optional[str]]] = None) -> List[Dict[str, Any]]:
+    """Transform and write the retried authors in task order, as "fetched" (complete now, and cached),
+    "stale" (still incomplete; the rows cached by an earlier run, when stale_path(author_id) finds them)
+    or "partial" (pages so far), or as a failure if nothing was downloaded. Returns the still-incomplete ones."""
+    failures: List[Dict[str, Any]] = []
+    for seq in sorted(best):
+        name, aid = tasks[seq]
+        f, cache_path = best[seq], cache_paths.get(seq)
+        uri = _ensure_openalex_uri(aid)
+        stale = stale_path(aid) if stale_path and not f.complete else None
+        origin = "fetched" if f.complete else "stale" if stale else "partial"
+        df_all = df_last = None
+        if f.complete or f.pages or stale:
+            try:
+                if stale:
+                    df_all, df_last = transform_author_pages(None, uri, cache_path=stale)
+                else:
+                    df_all, df_last = transform_author_pages(f.pages, uri, cache_path=cache_path if f.complete else None,
+                                                             unique=f.split)
+            except Exception:
+                logging.exception(f"Error transforming works for {name} ({aid})")
+        write_result(name, aid, df_all, df_last, origin)
+        if f.complete:
+            logging.info(f"[dead-letter] recovered {name} ({aid}): {len(f.pages)} pages")
+        else:
+            failures.append(dead_letter_entry(name, aid, f))
+    if failures:
+        logging.warning(f"[dead-letter] {len(failures)}/{len(best)} authors still incomplete after {retries} "
+                        f"retry rounds: {', '.join(d['id'] for d in failures)}")
+    else:
+        logging.info(f"[dead-letter] all {len(best)} dead-lettered authors recovered")
+    return failures
 
-    compiled_lifetime_path = os.path.join(OUTPUT_DIR, "openalex_all_authors_lifetime.csv")
-    compiled_last5_path   = os.path.join(OUTPUT_DIR, "openalex_all_authors_last5y_key_fields.csv")
 
-    # Start fresh each run to avoid legacy headers/rows mismatch from previous runs
-    for p in (compiled_lifetime_path, compiled_last5_path, OUTPUT_LAST5_DEDUP):
-        try:
-            os.remove(p)
-            logging.info(f"Removed old artifact: {p}")
-        except FileNotFoundError:
-            pass
+# ----------------------------
+# Sharding (stable hash partition of the roster) + merge
+# ----------------------------
 
-    # Load roster
-    logging.info(f"Reading roster from {INPUT_ROSTER}")
-    try:
-        roster = pd.read_csv(INPUT_ROSTER)
-    except Exception as e:
-        logging.exception(f"Failed to read roster CSV: {e}")
-        sys.exit(1)
+def parse_shard(spec: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Parse '--shard I/N' (0-based I) into (I, N); None when not sharding."""
+    if not spec:
+        return None
+    m = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", spec)
+    if not m or int(m.group(2)) < 1 or int(m.group(1)) >= int(m.group(2)):
+        raise ValueError(f"--shard must look like I/N with 0 <= I < N (got {spec!r})")
+    return int(m.group(1)), int(m.group(2))
 
-    # Detect columns for name and OpenAlexID
-    def get_row_identifiers(row: pd.Series) -> Tuple[str, str]:
-        author_id = row.get("OpenAlexID")
-        name = row.get("Name") or row.get("Author") or row.get("FullName") or ""
-        if not isinstance(name, str) or not name.strip():
-            name = str(author_id or "").strip() or "Unknown"
-        return name, str(author_id or "").strip()
 
-    processed = 0
-    skipped_missing_id = 0
+def shard_of(author_id: str, n: int) -> int:
+    """Stable shard for an author: independent of roster order and of Python's hash seed."""
+    key = _norm_aid(author_id).upper()
+    return int(hashlib.sha1(key.encode("utf-8")).hexdigest(), 16) % n
+
+
+def shard_path(path: str, shard: Tuple[int, int]) -> str:
+    base, ext = os.path.splitext(path)
+    return f"{base}.shard-{shard[0]}-of-{shard[1]}{ext}"
 
-    for idx, row in roster.iterrows():
-        author_name, author_id = get_row_identifiers(row)
-        if not author_id:
-            skipped_missing_id += 1
-            logging.info(f"Skipping row {idx} — missing OpenAlexID")
+
+def shard_marker_path(shard: Tuple[int, int]) -> str:
+    return os.path.join(OUTPUT_DIR, f"openalex_harvest.shard-{shard[0]}-of-{shard[1]}.json")
+
+
+def find_shard_markers() -> Dict[int, Dict[str, Any]]:
+    """Return {shard index: marker} for the completed shards in OUTPUT_DIR. All markers must agree on N
+    and all N shards must be present, otherwise merging would silently drop authors."""
+    pat = re.compile(r"openalex_harvest\.shard-(\d+)-of-(\d+)\.json$")
+    markers: Dict[int, Dict[str, Any]] = {}
+    counts = set()
+    for fn in sorted(os.listdir(OUTPUT_DIR)):
+        m = pat.match(fn)
+        if not m:
             continue
+        with open(os.path.join(OUTPUT_DIR, fn), encoding="utf-8") as fh:
+            markers[int(m.group(1))] = json.load(fh)
+        counts.add(int(m.group(2)))
+    if not markers:
+        raise ValueError(f"No shard markers found in {OUTPUT_DIR}; run the harvest with --shard first.")
+    if len(counts) > 1:
+        raise ValueError(f"Shard markers disagree on the shard count: {sorted(counts)}")
+    n = counts.pop()
+    missing = sorted(set(range(n)) - set(markers))
+    if missing:
+        raise ValueError(f"Missing shards {missing} of {n}; refusing to merge a partial roster.")
+    return markers
+
+
+def concat_csv_files(paths: List[str], out_path: str) -> None:
+    """Concatenate CSVs that share one header, streaming (header written once); published only if changed."""
+    tmp = out_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as out:
+        header_written = False
+        for p in paths:
+            with open(p, encoding="utf-8", newline="") as fh:
+                header = fh.readline()
+                if not header_written:
+                    out.write(header)
+                    header_written = True
+                shutil.copyfileobj(fh, out)
+    PUBLISHER.publish_file(tmp, out_path)
+
+
+def roster_rank(roster: pd.DataFrame, registry: Optional[AuthorRegistry] = None) -> Dict[str, int]:
+    """Normalized OpenAlex ID -> position of its first roster row (merged IDs are mapped to the
+    surviving one the harvest used, if `registry` knows the merge)."""
+    rank: Dict[str, int] = {}
+    for i, (_, aid) in enumerate(roster.apply(get_row_identifiers, axis=1)):
+        rank.setdefault(registry.canonical(aid) if registry else normalize_openalex_id(aid), i)
+    return rank
+
+
+def sort_by_roster(df: pd.DataFrame, rank: Dict[str, int]) -> pd.DataFrame:
+    """Stable sort of compiled rows into roster order (unknown authors last), which is the row
+    order dedup's tie-breaks were made against."""
+    order = df["author_openalex_id"].map(lambda a: rank.get(normalize_openalex_id(a), len(rank)))
+    return df.iloc[order.argsort(kind="stable")]
+
+
+def merge_shards(compiled_lifetime_path: str, compiled_last5_path: str, roster: pd.DataFrame,
+                 keep_shards: bool = False) -> Dict[str, Any]:
+    """Combine the shard-local compiled files into the regular compiled paths.
+
+    last-5y rows are put back into roster order (stable), so dedup sees the same row order as an
+    unsharded run. Returns the shard markers' counts summed (processed = authors with last-5y
+    output) and the overall completeness_pct.
+    """
+    markers = find_shard_markers()
+    n = len(markers)
+    shards = [(i, n) for i in range(n)]
+    logging.info(f"Merging {n} shards from {OUTPUT_DIR}")
+    registry = AuthorRegistry.load(registry_path())
+    for s in shards:
+        if os.path.exists(registry_path(s)):
+            registry.merge(AuthorRegistry.load(registry_path(s)))
+    registry.save()
+
+    life_parts = [shard_path(compiled_lifetime_path, s) for s in shards if os.path.exists(shard_path(compiled_lifetime_path, s))]
+    last5_parts = [shard_path(compiled_last5_path, s) for s in shards if os.path.exists(shard_path(compiled_last5_path, s))]
+
+    if life_parts:
+        concat_csv_files(life_parts, compiled_lifetime_path)
+    else:
+        PUBLISHER.remove(compiled_lifetime_path)
+    if not last5_parts:
+        PUBLISHER.remove(compiled_last5_path)
+    else:
+        # Text in, text out: no dtype inference, so values are passed through byte-for-byte
+        last5 = pd.concat([pd.read_csv(p, dtype=str, keep_default_na=False) for p in last5_parts], ignore_index=True)
+        last5 = sort_by_roster(last5, roster_rank(roster, registry))
+        PUBLISHER.publish_csv(last5, compiled_last5_path)
+        logging.info(f"Merged {len(last5)} last-5y rows from {len(last5_parts)} shard files")
+
+    plans = []
+    for s in shards:
+        if os.path.exists(plan_path(s)):
+            with open(plan_path(s), encoding="utf-8") as fh:
+                plans.append(json.load(fh))
+
+    # Previous entries of authors no shard harvested are carried forward, as in an unsharded run
+    attempted = {_norm_aid(a["id"]).upper() for p in plans for a in p["authors"]}
+    fingerprints = {k: v for k, v in load_fingerprints(fingerprints_path()).items() if k not in attempted}
+    dead_letters: Dict[str, Dict[str, Any]] = {}
+    for s in shards:
+        fingerprints.update(load_fingerprints(fingerprints_path(s)))
+        dead_letters.update(load_dead_letters(dead_letters_path(s)))
+    save_fingerprints(fingerprints_path(), fingerprints)
+    if dead_letters:
+        save_fingerprints(dead_letters_path(), dead_letters)
+    elif os.path.exists(dead_letters_path()):
+        os.remove(dead_letters_path())
+
+    if plans:
+        merged = WorkPlan(sorted((a for p in plans for a in p["authors"]), key=lambda a: a["row"]),
+                          sorted((r for p in plans for r in p["rejected"]), key=lambda r: r["row"]),
+                          all(p["checked"] for p in plans))
+        write_plan(merged)
+
+    if not keep_shards:
+        for s in shards:
+            for p in (shard_path(compiled_lifetime_path, s), shard_path(compiled_last5_path, s), shard_marker_path(s),
+                      fingerprints_path(s), plan_path(s), dead_letters_path(s), registry_path(s)):
+                if os.path.exists(p):
+                    os.remove(p)
+
+    totals = {k: sum(int(m.get(k, 0)) for m in markers.values()) for k in ("assigned", "processed", "complete", "rejected")}
+    totals["completeness_pct"] = completeness_pct(totals["complete"], totals["assigned"] + totals["rejected"])
+    return totals
 
-        logging.info(f"Processing {author_name} ({author_id})")
+
+# ----------------------------
+# Logging: queue-based (callers never wait on I/O), JSON run files, rotation, run summary
+# ----------------------------
+LOG_MAX_BYTES = int(os.getenv("OPENALEX_LOG_MAX_BYTES", str(2 * 1024 * 1024)))
+LOG_BACKUPS = 1
+QUIET_LOGGERS = {"urllib3": "WARNING", "requests": "WARNING", "charset_normalizer": "WARNING"}
+RUN_SUMMARIES_NAME = "etl_runs.jsonl"
+
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per line; tracebacks are kept whole under "exc"."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, ensure_ascii=False)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """The usual one-line format; exceptions collapse to "[Type: message]" (full traceback is in the JSON log)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        exc_info, exc_text = record.exc_info, record.exc_text
+        record.exc_info = record.exc_text = None
         try:
-            df_all, df_last5 = fetch_author_works_filtered(author_id)
-        except Exception:
-            logging.exception(f"Error fetching works for {author_name} ({author_id})")
+            line = super().format(record)
+        finally:
+            record.exc_info, record.exc_text = exc_info, exc_text
+        if exc_info and exc_info[1] is not None:
+            line += f" [{type(exc_info[1]).__name__}: {exc_info[1]}]"
+        return line
+
+
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    # The listener is a thread in this process, so the record can travel as-is: only the message is
+    # resolved here (args may change later); traceback formatting happens on the listener thread.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg, record.args = record.getMessage(), None
+        return record
+
+
+class LevelCounter(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__(logging.DEBUG)
+        self.counts: Dict[str, int] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.counts[record.levelname] = self.counts.get(record.levelname, 0) + 1
+
+
+def prune_run_logs(log_dir: str, keep: int) -> int:
+    """Delete all but the newest `keep` run logs (etl_run_<ts>.log / .jsonl and their rotations)."""
+    pat = re.compile(r"etl_run_(\d{8}_\d{6})\.(?:log|jsonl)(?:\.\d+)?$")
+    runs: Dict[str, List[str]] = {}
+    for fn in os.listdir(log_dir):
+        m = pat.match(fn)
+        if m:
+            runs.setdefault(m.group(1), []).append(fn)
+    removed = 0
+    for stamp in sorted(runs)[:-keep] if keep > 0 else sorted(runs):
+        for fn in runs[stamp]:
+            os.remove(os.path.join(log_dir, fn))
+            removed += 1
+    return removed
+
+
+def setup_logging(log_dir: str, run_stamp: str, level: str = "INFO", overrides: str = "",
+                  keep: int = 0) -> LevelCounter:
+    """Route all records through a queue to a listener thread that writes the console (INFO+, one
+    line per record) and a size-bounded JSON-lines run file. Returns the per-level counter.
+    keep > 0 prunes all but the newest `keep` run logs (this one included); 0 keeps them all."""
+    os.makedirs(log_dir, exist_ok=True)
+    removed = prune_run_logs(log_dir, keep - 1) if keep > 0 else 0
+
+    console = logging.StreamHandler(sys.stdout)  # show in GH Actions console too
+    console.setLevel(logging.INFO)
+    console.setFormatter(ConsoleFormatter("[%(asctime)s] %(levelname)s: %(message)s"))
+    run_file = logging.handlers.RotatingFileHandler(
+        os.path.join(log_dir, f"etl_run_{run_stamp}.jsonl"), maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUPS, encoding="utf-8")
+    run_file.setFormatter(JsonLogFormatter())
+    counter = LevelCounter()
+
+    q: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(q, console, run_file, counter, respect_handler_level=True)
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(_InProcessQueueHandler(q))
+    root.setLevel(level.upper())
+
+    levels = dict(QUIET_LOGGERS)
+    for item in filter(None, (x.strip() for x in overrides.split(","))):
+        name, _, lvl = item.partition("=")
+        levels[name.strip()] = lvl.strip().upper() or "INFO"
+    for name, lvl in levels.items():
+        logging.getLogger(name).setLevel(lvl)
+
+    listener.start()
+    atexit.register(listener.stop)  # drains the queue, including records logged right before sys.exit
+    if removed:
+        logging.info(f"Pruned {removed} old run log files from {log_dir} (keeping {keep})")
+    return counter
+
+
+def write_run_summary(log_dir: str, summary: Dict[str, Any], counter: Optional[LevelCounter]) -> None:
+    """Log one compact summary line and append it to logs/etl_runs.jsonl (one line per run)."""
+    if counter is not None:
+        summary["warnings"] = counter.counts.get("WARNING", 0)
+        summary["errors"] = counter.counts.get("ERROR", 0) + counter.counts.get("CRITICAL", 0)
+    logging.info("[summary] " + " ".join(f"{k}={v}" for k, v in summary.items()))
+    with open(os.path.join(log_dir, RUN_SUMMARIES_NAME), "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(summary) + "\n")
+
+
+# ----------------------------
+# Roster validation: canonical ids, batched existence check, work plan
+# ----------------------------
+AUTHORS_URL = "https://api.openalex.org/authors"
+VALIDATION_BATCH = 50  # ids per /authors?filter=openalex:A|B|... request
+PLAN_NAME = "harvest_plan.json"
+
+
+@dataclass
+class WorkPlan:
+    authors: List[Dict[str, Any]]    # {"row" (0-based roster position), "name", "id"}: what the harvest fetches
+    rejected: List[Dict[str, Any]]   # {"row", "name", "value", "reason"}
+    checked: bool                    # existence verified against OpenAlex (all batches answered)
+
+    def to_json(self, shard: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        return {"version": 1, "shard": f"{shard[0]}/{shard[1]}" if shard else None, "checked": self.checked,
+                "authors": self.authors, "rejected": self.rejected}
+
+
+def _get_json(url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """GET with the harvest's retry/backoff rules; None if the request ultimately failed (logged)."""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            resp = openalex_get(url, params)
+        except requests.RequestException as e:
+            logging.warning(f"OpenAlex request exception: {e}")
+            return None
+        if resp.status_code in RETRIABLE_STATUS and attempt < MAX_RETRIES:
+            time.sleep(BACKOFF_BASE ** attempt)
+            continue
+        if resp.status_code >= 400:
+            logging.warning(f"OpenAlex {resp.status_code} for {url} ({params.get('filter', '')[:80]})")
+            return None
+        try:
+            return resp.json()
+        except ValueError:
+            logging.warning(f"Unreadable OpenAlex response for {url}")
+            return None
+    return None
+
+
+def existing_author_ids(ids: List[str], batch_size: int = VALIDATION_BATCH) -> Tuple[set, List[str]]:
+    """Look `ids` up in batched /authors filter calls. Returns (ids OpenAlex has, ids whose batch
+    could not be checked)."""
+    found: set = set()
+    unchecked: List[str] = []
+    for i in range(0, len(ids), batch_size):
+        batch = ids[i:i + batch_size]
+        payload = _get_json(AUTHORS_URL, {"filter": "openalex:" + "|".join(batch), "select": "id",
+                                          "per-page": len(batch), "mailto": MAILTO})
+        if payload is None:
+            unchecked.extend(batch)
+            continue
+        for rec in payload.get("results") or []:
+            aid = normalize_openalex_id(rec.get("id"))
+            if aid:
+                found.add(aid)
+    return found, unchecked
+
+
+def registry_path(shard: Optional[Tuple[int, int]] = None) -> str:
+    path = os.path.join(OUTPUT_DIR, CACHE_DIR_NAME, REGISTRY_NAME)
+    return shard_path(path, shard) if shard else path
+
+
+def validate_roster(roster: pd.DataFrame, shard: Optional[Tuple[int, int]] = None, check_exists: bool = True,
+                    registry: Optional[AuthorRegistry] = None) -> WorkPlan:
+    """Normalize every roster id and keep only the authors worth a request: missing, malformed and
+    duplicate ids are rejected up front, and (unless check_exists=False) so are ids OpenAlex does not
+    know. Ids in batches that could not be checked are kept. With `shard`, only that shard's authors
+    are planned; id-less rows are reported by shard 0 only.
+
+    With a `registry`, merged ids are replaced by the surviving one (known merges cost no request),
+    only ids it has not verified recently are checked, and ids the batched check does not list are
+    looked up one by one: OpenAlex answers a merged-away id with the record it was merged into."""
+    registry = registry if registry is not None else AuthorRegistry()
+    authors: List[Dict[str, Any]] = []
+    rejected: List[Dict[str, Any]] = []
+    first_row: Dict[str, Any] = {}
+
+    def plan(idx: int, name: str, raw: Any, aid: str) -> None:
+        if aid in first_row:
+            rejected.append({"row": idx, "name": name, "value": raw, "reason": f"duplicate of row {first_row[aid]}"})
+            return
+        first_row[aid] = idx
+        authors.append({"row": idx, "name": name, "id": aid})
+
+    for idx, (_, row) in enumerate(roster.iterrows()):
+        name, raw = get_row_identifiers(row)
+        aid = registry.canonical(raw)
+        if aid is None:
+            if not shard or shard[0] == 0:
+                rejected.append({"row": idx, "name": name, "value": raw, "reason": "missing" if not raw else "malformed"})
             continue
+        if shard and shard_of(aid, shard[1]) != shard[0]:
+            continue
+        if aid != normalize_openalex_id(raw):
+            logging.info(f"Roster row {idx} ({name}): {normalize_openalex_id(raw)} was merged into {aid}; harvesting {aid}")
+        plan(idx, name, raw, aid)
+
+    checked = False
+    if check_exists and authors:
+        todo = registry.stale(a["id"] for a in authors)
+        found, unchecked = existing_author_ids(todo) if todo else (set(), [])
+        registry.confirm(found)
+        merged: Dict[str, str] = {}
+        for aid in todo:
+            if aid in found or aid in unchecked:
+                continue
+            payload = _get_json(f"{AUTHORS_URL}/{aid}", {"select": "id,orcid,display_name", "mailto": MAILTO})
+            survivor = registry.observe(aid, payload) if payload else None
+            if survivor:
+                found.add(survivor)
+                if survivor != aid:
+                    merged[aid] = survivor
+        logging.info(f"Author registry: {len(authors) - len(todo)}/{len(authors)} ids verified recently, "
+                     f"{len(todo)} checked with OpenAlex, {len(merged)} newly found merged")
+        checked = not unchecked
+        if unchecked:
+            logging.warning(f"Could not verify {len(unchecked)} roster ids with OpenAlex; fetching them anyway")
+        keep = found | set(unchecked)
+        planned, authors = authors, []
+        first_row.clear()
+        for a in planned:
+            if a["id"] in merged:
+                logging.info(f"Roster row {a['row']} ({a['name']}): {a['id']} was merged into {merged[a['id']]}; "
+                             f"harvesting {merged[a['id']]}")
+                plan(a["row"], a["name"], a["id"], merged[a["id"]])
+            elif a["id"] in keep or a["id"] not in todo:
+                plan(a["row"], a["name"], a["id"], a["id"])
+            else:
+                rejected.append({"row": a["row"], "name": a["name"], "value": a["id"], "reason": "not found in OpenAlex"})
+    for a in authors:
+        registry.place(a["id"], a["row"], a["name"])
 
-        if not df_all.empty:
-            append_df_to_csv(df_all, compiled_lifetime_path, fixed_cols=KEY_FIELDS_FOR_OUTPUT_WITH_TAGS)
-            logging.info(f"Appended {len(df_all)} lifetime works for {author_name}")
-        else:
-            logging.info(f"No lifetime works for {author_name}")
+    for r in sorted(rejected, key=lambda r: r["row"]):
+        log = logging.info if r["reason"] == "missing" else logging.warning
+        log(f"Skipping roster row {r['row']} ({r['name']}), OpenAlexID {r['value']!r}: {r['reason']}")
+    rejected.sort(key=lambda r: r["row"])
+    return WorkPlan(authors, rejected, checked)
 
-        if not df_last5.empty:
-            append_df_to_csv(df_last5, compiled_last5_path, fixed_cols=KEY_FIELDS_FOR_OUTPUT_WITH_TAGS)
-            logging.info(f"Appended {len(df_last5)} last-5y works for {author_name}")
-            processed += 1
-        else:
-            logging.info(f"No last-5y works for {author_name}")
 
-    logging.info(f"Total skipped rows due to missing ID: {skipped_missing_id}")
+def plan_path(shard: Optional[Tuple[int, int]] = None) -> str:
+    path = os.path.join(OUTPUT_DIR, PLAN_NAME)
+    return shard_path(path, shard) if shard else path
 
-    # Deduplicate compiled last5 into the requested --output file
-    if os.path.exists(compiled_last5_path):
+
+def write_plan(plan: WorkPlan, shard: Optional[Tuple[int, int]] = None) -> None:
+    if shard:
+        # shard-local, like the marker; merge folds the shard plans into one
+        with open(plan_path(shard), "w", encoding="utf-8") as fh:
+            json.dump(plan.to_json(shard), fh, indent=1, default=str)
+    else:
+        PUBLISHER.publish_text(plan_path(), json.dumps(plan.to_json(), indent=1, default=str))
+
+
+# ----------------------------
+# Citation-only refresh (--refresh-citations): patch the fields that drift between harvests
+# ----------------------------
+REFRESH_BATCH = 50  # work ids per /works?filter=openalex:W1|W2|... request
+REFRESH_SELECT = "id,cited_by_count,fwci,open_access"
+REFRESH_COLUMNS = ["cited_by_count", "fwci", "open_access__oa_status"]
+
+
+def _work_key(value: Any) -> str:
+    return str(value or "").strip().rstrip("/").rsplit("/", 1)[-1].upper()
+
+
+def _citation_fields(rec: Dict[str, Any]) -> Dict[str, str]:
+    # Same text the harvest writes: int counts, plain float fwci, "" for missing
+    fwci = rec.get("fwci")
+    return {
+        "cited_by_count": str(int(rec.get("cited_by_count") or 0)),
+        "fwci": "" if fwci is None else str(float(fwci)),
+        "open_access__oa_status": str((rec.get("open_access") or {}).get("oa_status") or ""),
+    }
+
+
+def fetch_citation_fields(work_ids: List[str], batch_size: int = REFRESH_BATCH,
+                          workers: int = 4) -> Tuple[Dict[str, Dict[str, str]], List[str]]:
+    """Look the works up in batched /works?filter=openalex:... calls selecting only the citation fields.
+    Returns ({WORK_KEY: {column: text}}, ids whose batch failed)."""
+    keys = sorted({_work_key(w) for w in work_ids if _work_key(w)})
+    batches = [keys[i:i + batch_size] for i in range(0, len(keys), batch_size)]
+
+    def lookup(batch: List[str]) -> Optional[Dict[str, Any]]:
+        return _get_json(BASE_URL, {"filter": "openalex:" + "|".join(batch), "select": REFRESH_SELECT,
+                                    "per-page": len(batch), "mailto": MAILTO})
+
+    found: Dict[str, Dict[str, str]] = {}
+    failed: List[str] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="refresh") as pool:
+        for batch, payload in zip(batches, pool.map(lookup, batches)):
+            if payload is None:
+                failed.extend(batch)
+                continue
+            for rec in payload.get("results") or []:
+                found[_work_key(rec.get("id"))] = _citation_fields(rec)
+    logging.info(f"Citation refresh: {len(found)}/{len(keys)} works returned by {len(batches)} requests"
+                 f"{f', {len(failed)} ids in failed batches' if failed else ''}")
+    return found, failed
+
+
+def _patch_frame(df: pd.DataFrame, fields: Dict[str, Dict[str, str]]) -> Tuple[int, int]:
+    """Overwrite REFRESH_COLUMNS of a text frame in place from `fields`; works missing from `fields`
+    keep their values. Returns (rows patched, cells changed)."""
+    if "id" not in df.columns:
+        return 0, 0
+    keys = df["id"].map(_work_key)
+    hit = keys.isin(fields.keys())
+    changed = 0
+    for col in REFRESH_COLUMNS:
+        if col not in df.columns:
+            continue
+        new = [fields[k][col] if h else v for k, h, v in zip(keys, hit, df[col])]
+        changed += int((df[col] != pd.Series(new, index=df.index)).sum())
+        df[col] = new
+    return int(hit.sum()), changed
+
+
+def patch_citation_fields(path: str, fields: Dict[str, Dict[str, str]]) -> Tuple[int, int]:
+    """Rewrite REFRESH_COLUMNS of the CSV at `path` (dedup, per-author or compiled) from `fields`,
+    leaving every other cell as written. Published only if something changed. Returns (rows patched,
+    cells changed)."""
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    rows, changed = _patch_frame(df, fields)
+    if changed:
+        PUBLISHER.publish_csv(df, path)
+    return rows, changed
+
+
+def patch_works_cache(fields: Dict[str, Dict[str, str]]) -> Tuple[int, int]:
+    """Patch the per-author works cache the same way, so the next harvest's cache hits (and the
+    dedup built from them) carry the refreshed values. Returns (files rewritten, cells changed)."""
+    cache_dir = os.path.join(OUTPUT_DIR, CACHE_DIR_NAME, "works")
+    files = cells = 0
+    for fn in sorted(os.listdir(cache_dir)) if os.path.isdir(cache_dir) else []:
+        if not fn.endswith(".csv.gz"):
+            continue
+        path = os.path.join(cache_dir, fn)
+        df = read_works_cache(path)
+        _, changed = _patch_frame(df, fields)
+        if changed:
+            write_works_cache(df, path)
+            files += 1
+            cells += changed
+    return files, cells
+
+
+def refresh_citations(dedup_path: str, per_author_path: Optional[str] = None, roster: Optional[pd.DataFrame] = None,
+                      batch_size: int = REFRESH_BATCH, workers: int = 4) -> Dict[str, Any]:
+    """Refresh cited_by_count, fwci and OA status of the works already in the dedup output (and the
+    per-author projection) without re-paging any bibliography: one request per batch_size work ids.
+    The compiled lifetime/last-5y files and the per-author works cache get the same values, so a
+    later harvest that reuses cached authors (and re-runs dedup) does not bring the old ones back.
+    When values changed, the partitions and the corpus store (the artifacts that embed them) are
+    rebuilt. Returns the counts for the run summary."""
+    ids = pd.read_csv(dedup_path, dtype=str, keep_default_na=False, usecols=["id"])["id"].tolist()
+    keys = {_work_key(w) for w in ids} - {""}
+    fields, failed = fetch_citation_fields(ids, batch_size=batch_size, workers=workers)
+    counts: Dict[str, Any] = {"works": len(keys), "requests": -(-len(keys) // max(1, batch_size)),
+                              "refreshed": len(fields), "unrefreshed": len(keys - fields.keys())}
+    changed = 0
+    for path in filter(None, [dedup_path, per_author_path]):
+        if os.path.exists(path):
+            rows, cells = patch_citation_fields(path, fields)
+            changed += cells
+            logging.info(f"[ok] {os.path.basename(path)}: {rows} rows refreshed, {cells} values changed")
+    counts["values_changed"] = changed
+    upstream = 0
+    for path in [os.path.join(OUTPUT_DIR, LAST5_NAME), os.path.join(OUTPUT_DIR, LIFETIME_NAME)]:
+        if os.path.exists(path):
+            upstream += patch_citation_fields(path, fields)[1]
+    cache_files, cache_cells = patch_works_cache(fields)
+    counts.update(compiled_values_changed=upstream, cache_files_patched=cache_files)
+    logging.info(f"[ok] Compiled files: {upstream} values changed; works cache: {cache_cells} values in "
+                 f"{cache_files} authors' files")
+    if changed:
+        pa = per_author_path if per_author_path and os.path.exists(per_author_path) else None
         try:
-            deduplicate_compiled(compiled_last5_path, OUTPUT_LAST5_DEDUP)
-            logging.info(f"Deduplicated file written to {OUTPUT_LAST5_DEDUP}")
+            write_partitions(dedup_path, pa, os.path.join(OUTPUT_DIR, PARTITIONS_DIR))
         except Exception:
-            logging.exception("Deduplication failed while reading compiled CSV. "
-                              "This usually means a schema mismatch.")
-            sys.exit(1)
-    else:
+            logging.exception("Failed to write partitioned artifacts; the dashboard falls back to the full CSVs.")
+        if roster is not None:
+            try:
+                write_corpus_store(dedup_path, roster, os.path.join(OUTPUT_DIR, CORPUS_NAME))
+            except Exception:
+                logging.exception("Failed to build the corpus store; corpus.py queries use the previous one.")
+        write_static_assets()
+    if failed:
+        logging.warning(f"{len(failed)} works kept their previous citation values (lookups failed)")
+    return counts
+
+
+# ----------------------------
+# Library API (re-exported lazily by etl/__init__.py)
+# ----------------------------
+def _as_frame(data: Any) -> pd.DataFrame:
+    return pd.read_csv(data) if isinstance(data, (str, os.PathLike)) else data
+
+
+def fetch_works(roster: Any, output_dir: str = "data", *, fetch_workers: int = 4, transform_workers: int = 0,
+                queue_size: int = 8, use_cache: bool = True, cache_max_age_days: int = 30,
+                check_ids: bool = True, split_min_works: int = SPLIT_MIN_WORKS) -> Dict[str, Any]:
+    """Harvest the works of every author in `roster` (DataFrame or CSV path) into the compiled lifetime
+    and last-5y CSVs under `output_dir`, as the `harvest` command does before dedup. Returns the run's
+    counts. transform_workers > 0 starts worker processes, which needs an `if __name__ == "__main__"`
+    guard in the calling script."""
+    configure(output_dir)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    counts = harvest_roster(_as_frame(roster), os.path.join(OUTPUT_DIR, LIFETIME_NAME), os.path.join(OUTPUT_DIR, LAST5_NAME),
+                            fetch_workers=fetch_workers, transform_workers=transform_workers, queue_size=queue_size,
+                            use_cache=use_cache, cache_max_age_days=cache_max_age_days, check_ids=check_ids,
+                            split_min_works=split_min_works)
+    PUBLISHER.save()
+    return counts
+
+
+def refresh(dedup_csv: str, roster: Any = None, *, batch_size: int = REFRESH_BATCH, workers: int = 4) -> Dict[str, Any]:
+    """Citation-only refresh of an existing dedup output and the per-author file next to it, as
+    --refresh-citations does. Returns the run's counts."""
+    configure(os.path.dirname(dedup_csv))
+    counts = refresh_citations(dedup_csv, os.path.join(OUTPUT_DIR, PER_AUTHOR_NAME),
+                               _as_frame(roster) if roster is not None else None, batch_size=batch_size, workers=workers)
+    PUBLISHER.save()
+    return counts
+
+
+def dedup(compiled_csv: str, output_csv: str, *, engine: str = "pandas", memory_mb: int = 0, workers: int = 1) -> pd.DataFrame:
+    """Deduplicate a compiled last-5y CSV into `output_csv` (backfilling from the lifetime file next to
+    it, if any) and return the result."""
+    configure(os.path.dirname(output_csv))
+    deduplicate_compiled(compiled_csv, output_csv, memory_mb=memory_mb, workers=max(1, workers), engine=get_engine(engine))
+    PUBLISHER.save()
+    return pd.read_csv(output_csv) if os.path.exists(output_csv) else pd.DataFrame()
+
+
+def project_per_author(dedup_df: Any, roster: Any, *, engine: str = "pandas") -> pd.DataFrame:
+    """One row per (work, cohort author) from a dedup frame or CSV path; writes nothing."""
+    return get_engine(engine).per_author(_as_frame(dedup_df), _as_frame(roster))
+
+
+# ----------------------------
+# Main
+# ----------------------------
+
+def get_row_identifiers(row: pd.Series) -> Tuple[str, str]:
+    """Detect (name, OpenAlexID) for a roster row; a missing id (NaN, or the text 'nan'/'None' a
+    roster that did not go through read_csv may hold) comes back as ''."""
+    author_id = row.get("OpenAlexID")
+    if author_id is not None and not isinstance(author_id, str) and pd.isna(author_id):
+        author_id = None
+    elif isinstance(author_id, str) and author_id.strip() in ("nan", "NaN", "None"):
+        author_id = None
+    name = row.get("Name") or row.get("Author") or row.get("FullName") or ""
+    if not isinstance(name, str) or not name.strip():
+        name = str(author_id or "").strip() or "Unknown"
+    return name, str(author_id or "").strip()
+
+
+def dedup_stage(compiled_last5_path: str, output_path: str, eng: "PandasEngine", memory_mb: int = 0,
+                workers: int = 1) -> bool:
+    """Deduplicate the compiled last-5y file into `output_path`; without one, remove the published
+    dedup file. Returns whether a dedup file exists afterwards. Errors propagate."""
+    if not os.path.exists(compiled_last5_path):
         logging.warning(f"No compiled last-5y file found at {compiled_last5_path}; nothing to deduplicate.")
+        PUBLISHER.remove(output_path)
+        return False
+    deduplicate_compiled(compiled_last5_path, output_path, memory_mb=max(0, memory_mb), workers=max(1, workers), engine=eng)
+    logging.info(f"Deduplicated file written to {output_path}")
+    return True
+
+
+def per_author_stage(output_path: str, roster: pd.DataFrame, eng: "PandasEngine") -> pd.DataFrame:
+    """Build and publish the per-author projection of the dedup file; returns it. Errors propagate."""
+    per_author_df = eng.per_author(pd.read_csv(output_path), roster)
+    out_pa = os.path.join(OUTPUT_DIR, PER_AUTHOR_NAME)
+    PUBLISHER.publish_csv(per_author_df, out_pa)
+    logging.info(f"[ok] Wrote per-author projection: {out_pa} (rows={len(per_author_df)})")
+    return per_author_df
+
+
+def finalize_outputs(compiled_last5_path: str, roster: pd.DataFrame, output_path: str, engine: str = "pandas",
+                     memory_mb: int = 0, workers: int = 1, static_assets: bool = False) -> None:
+    """Dedup the compiled last-5y file into `output_path` (--output) and build the per-author projection
+    and dashboard artifacts (the static bundle too with `static_assets`, or if one exists)."""
+    try:
+        eng = get_engine(engine)
+    except RuntimeError as e:
+        logging.error(str(e))
+        sys.exit(2)
+    # Deduplicate compiled last5 into the requested --output file
+    try:
+        dedup_stage(compiled_last5_path, output_path, eng, memory_mb=memory_mb, workers=workers)
+    except Exception:
+        logging.exception("Deduplication failed while reading compiled CSV. "
+                          "This usually means a schema mismatch.")
+        sys.exit(1)
 
-   
-  
     # === NEW: Build per-author projection from the dedup file (only if it exists) ===
-    if os.path.exists(OUTPUT_LAST5_DEDUP):
+    if os.path.exists(output_path):
+        per_author_df = None
         try:
-            dedup_df = pd.read_csv(OUTPUT_LAST5_DEDUP)
-            # Use your actual roster DataFrame variable name here (likely 'roster')
-            per_author_df = make_dedup_per_author(dedup_df, roster)
-            out_pa = os.path.join(OUTPUT_DIR, "openalex_all_authors_last5y_key_fields_dedup_per_author.csv")
-            per_author_df.to_csv(out_pa, index=False)
-            logging.info(f"[ok] Wrote per-author projection: {out_pa} (rows={len(per_author_df)})")
+            per_author_df = per_author_stage(output_path, roster, eng)
         except Exception:
             logging.exception("Failed to build per-author projection from dedup; continuing without it.")
+        try:
+            write_search_index(output_path, roster, os.path.join(OUTPUT_DIR, SEARCH_INDEX_NAME))
+        except Exception:
+            logging.exception("Failed to build the search index; the dashboard falls back to scanning.")
+        try:
+            write_term_tables(output_path, per_author_df, os.path.join(OUTPUT_DIR, TERM_TABLES_NAME))
+        except Exception:
+            logging.exception("Failed to build word-cloud term tables; the dashboard falls back to re-tokenizing.")
+        try:
+            out_pa = os.path.join(OUTPUT_DIR, PER_AUTHOR_NAME)
+            write_partitions(output_path, out_pa if per_author_df is not None else None,
+                             os.path.join(OUTPUT_DIR, PARTITIONS_DIR))
+        except Exception:
+            logging.exception("Failed to write partitioned artifacts; the dashboard falls back to the full CSVs.")
+        try:
+            write_corpus_store(output_path, roster, os.path.join(OUTPUT_DIR, CORPUS_NAME))
+        except Exception:
+            logging.exception("Failed to build the corpus store; corpus.py queries use the previous one.")
+        write_static_assets(static_assets)
     else:
-        logging.warning(f"Expected dedup file not found at {OUTPUT_LAST5_DEDUP}; skipping per-author projection.")
+        logging.warning(f"Expected dedup file not found at {output_path}; skipping per-author projection.")
+    PUBLISHER.save()
+
+
+def harvest_roster(roster: pd.DataFrame, compiled_lifetime_path: str, compiled_last5_path: str,
+                   shard: Optional[Tuple[int, int]] = None, *, fetch_workers: int = 4, transform_workers: int = 0,
+                   queue_size: int = 8, use_cache: bool = True, cache_max_age_days: int = 30,
+                   check_ids: bool = True, dead_letter_retries: int = 2, dead_letter_backoff: float = 30.0,
+                   registry: Optional[AuthorRegistry] = None, split_min_works: int = SPLIT_MIN_WORKS,
+                   budget_requests: int = 0, budget_minutes: float = 0.0) -> Dict[str, Any]:
+    """Validate the roster (validate_roster; the plan is written to harvest_plan.json), then fetch (or
+    reuse from the works cache) the planned authors' works, or only those in `shard`, into the two
+    compiled CSVs. use_cache=False fetches everyone but still refreshes the cache. Authors whose
+    download still fails after the dead-letter retries are saved to cache/dead_letters.json.
+    Returns the run's counts; completeness_pct is complete authors over roster rows (incl. rejected).
+
+    budget_requests > 0 replaces the fingerprint/age rule with a schedule: cached authors are ranked by
+    staleness_score and only the top ones whose estimated requests fit the budget are fetched; the
+    rest reuse their cached rows (counted as deferred) and rank higher next time. Authors without a
+    usable cache are always fetched. budget_minutes > 0 stops starting downloads of cached authors
+    once that much time has passed (they reuse their cache too)."""
+    # Shard-local files start fresh each run. The regular outputs are not removed up front: the
+    # sinks replace them only if their content changed, and remove them if a run has no rows.
+    stale = [compiled_lifetime_path, compiled_last5_path, shard_marker_path(shard), plan_path(shard),
+             dead_letters_path(shard), registry_path(shard)] if shard else []
+    for p in stale:
+        try:
+            os.remove(p)
+            logging.info(f"Removed old artifact: {p}")
+        except FileNotFoundError:
+            pass
+
+    STRINGS.clear()  # ids never outlive a transform; just don't keep last harvest's names around
+    if registry is None:
+        registry = AuthorRegistry.load(registry_path())
+    plan = validate_roster(roster, shard, check_exists=check_ids, registry=registry)
+    registry.save(registry_path(shard))
+    write_plan(plan, shard)
+    skipped_missing_id = sum(r["reason"] == "missing" for r in plan.rejected)
+    logging.info(f"Work plan: {len(plan.authors)} authors to harvest, {len(plan.rejected)} roster rows rejected"
+                 f"{'' if plan.checked or not check_ids else ' (existence not fully verified)'}")
+
+    processed = 0
+    cache_hits = 0
+    failed = 0
+    complete = 0
+    tasks: List[Tuple[str, str]] = []
+    fp_file = load_fingerprints(fingerprints_path())
+    fp_prev = fp_file if use_cache else {}
+    fp_now: Dict[str, Optional[str]] = {}
+    fp_next: Dict[str, Dict[str, str]] = {}
+
+    written_upto = -1  # roster row of the last author written; recovered dead letters come later
+    out_of_order = False
+    task_row = {a["id"]: a["row"] for a in plan.authors}
+
+    sizes: Dict[str, Optional[int]] = {}
+    for a in plan.authors:
+        tasks.append((a["name"], a["id"]))
+        fp_now[a["id"]] = roster_fingerprint(roster.iloc[a["row"]])
+        sizes[a["id"]] = roster_works_count(roster.iloc[a["row"]])
+    assigned = len(tasks)
+    dead_prev = load_dead_letters(dead_letters_path())
+    carried = [a["id"] for a in plan.authors if a["id"] in dead_prev]
+    if carried:
+        logging.info(f"{len(carried)} authors were incomplete after the last run; fetching them again: {', '.join(carried)}")
+    if not any(fp_now.values()):
+        logging.info("Roster has no Works_count fingerprints; every author will be fetched")
+
+    def cached(key: str, author_id: str) -> bool:
+        return key in fp_prev and fp_now.get(key) is not None and os.path.exists(works_cache_path(author_id))
+
+    scheduled: Optional[set] = None
+    if budget_requests > 0 and use_cache:
+        now = datetime.now()
+        candidates = []
+        for _, aid in tasks:
+            key = _norm_aid(aid).upper()
+            score = staleness_score(fp_prev.get(key), fp_now.get(key), cache_max_age_days, now) if cached(key, aid) \
+                else float("inf")
+            candidates.append((aid, score, fetch_cost(sizes.get(aid), split_min_works)))
+        scheduled, spent = schedule_refresh(candidates, budget_requests)
+        must = sum(score == float("inf") for _, score, _ in candidates)
+        waiting = sum(score > 0 and aid not in scheduled for aid, score, _ in candidates)
+        logging.info(f"Refresh schedule: fetching {len(scheduled)}/{assigned} authors (~{spent} requests, budget "
+                     f"{budget_requests}; {must} without a usable cache), {waiting} more waiting their turn")
+    deadline = time.monotonic() + budget_minutes * 60 if budget_minutes > 0 else None
+    deferred: List[str] = []
+
+    def cache_lookup(author_id: str) -> Tuple[Optional[str], bool]:
+        key = _norm_aid(author_id).upper()
+        if fp_now.get(key) is None:
+            return None, False
+        path = works_cache_path(author_id)
+        fresh = cache_is_fresh(fp_prev.get(key), fp_now[key], cache_max_age_days) and os.path.exists(path)
+        # scheduled: picked authors are fetched, the rest wait their turn
+        reuse = fresh if scheduled is None else author_id not in scheduled
+        if not reuse and deadline is not None and time.monotonic() > deadline:
+            reuse = True  # time budget spent
+        if reuse and not fresh:
+            if not cached(key, author_id):
+                return path, False  # nothing to fall back on
+            deferred.append(key)
+        return path, reuse
+
+    def write_result(author_name: str, author_id: str, df_all: Optional[pd.DataFrame], df_last5: Optional[pd.DataFrame],
+                     origin: str) -> None:
+        nonlocal processed, cache_hits, failed, complete, written_upto, out_of_order
+        row = task_row.get(author_id, written_upto)
+        out_of_order = out_of_order or row < written_upto
+        written_upto = max(written_upto, row)
+        if df_all is None:
+            failed += 1
+            return  # fetch/transform failure, already logged
+        if origin not in ("partial", "stale"):
+            complete += 1
+
+        key = _norm_aid(author_id).upper()
+        if origin == "cache":
+            cache_hits += 1
+            fp_next[key] = fp_prev[key]
+        elif origin == "stale" and key in fp_file:
+            fp_next[key] = fp_file[key]  # unchanged: the cached rows are still the last complete download
+        elif origin == "fetched" and fp_now.get(key) and not df_all.empty:
+            fp_next[key] = {"fingerprint": fp_now[key], "fetched": datetime.now().isoformat(timespec="seconds"),
+                            "rate": round(len(df_last5) / 5, 2)}  # last-5y works/year, for staleness_score
+
+        if not df_all.empty:
+            life_sink.write(df_all)
+        if not df_last5.empty:
+            last5_sink.write(df_last5)
+            processed += 1
+        logging.info(f"{author_name}: {len(df_all)} lifetime / {len(df_last5)} last-5y works ({origin})")
+
+    logging.info(f"Harvesting {assigned} authors")
+    publisher = None if shard else PUBLISHER
+    with CompiledCSVSink(compiled_lifetime_path, KEY_FIELDS_FOR_OUTPUT_WITH_TAGS, publisher=publisher) as life_sink, \
+            CompiledCSVSink(compiled_last5_path, KEY_FIELDS_FOR_OUTPUT_WITH_TAGS, publisher=publisher) as last5_sink:
+        dead_letters = run_harvest_pipeline(tasks, write_result, fetch_workers=max(1, fetch_workers),
+                                            transform_workers=max(0, transform_workers), queue_size=max(1, queue_size),
+                                            cache_lookup=cache_lookup, dead_letter_retries=max(0, dead_letter_retries),
+                                            dead_letter_backoff=max(0.0, dead_letter_backoff),
+                                            works_count=sizes.get, split_min_works=split_min_works)
+        if out_of_order:
+            # Recovered dead letters were written last; dedup's tie-breaks depend on last-5y row order
+            # (lifetime rows carry no author tag and only feed per-work lookups, so they stay as written)
+            rank = roster_rank(roster, registry)
+            last5_sink.sort_rows_by("author_openalex_id", lambda a: rank.get(normalize_openalex_id(a), len(rank)))
+    if not shard:
+        # Authors this run did not harvest (rejected this time, not yet verified) keep their entries;
+        # a shard writes only its own, and merge_shards carries the rest forward
+        attempted = {_norm_aid(aid).upper() for _, aid in tasks}
+        fp_next = {**{k: v for k, v in fp_file.items() if k not in attempted}, **fp_next}
+    save_fingerprints(fingerprints_path(shard), fp_next)
+    save_dead_letters(dead_letters_path(shard), dead_letters, dead_prev)
+    roster_rows = assigned + len(plan.rejected)
+    logging.info(f"Completeness: {complete}/{roster_rows} roster authors complete "
+                 f"({completeness_pct(complete, roster_rows)}%), {len(dead_letters)} dead letters kept for the next run")
+    logging.info(f"Reused cached works for {cache_hits}/{assigned} authors with unchanged fingerprints"
+                 f"{f' or deferred refreshes ({len(deferred)} deferred)' if deferred else ''}")
+    logging.info(f"Compiled outputs: lifetime {life_sink.rows} rows / {life_sink.bytes} bytes, "
+                 f"last-5y {last5_sink.rows} rows / {last5_sink.bytes} bytes")
+    logging.info(f"Total skipped rows due to missing ID: {skipped_missing_id}")
+    return {"assigned": assigned, "processed": processed, "failed": failed, "cache_hits": cache_hits,
+            "skipped_missing_id": skipped_missing_id, "rejected": len(plan.rejected), "complete": complete,
+            "dead_letters": len(dead_letters), "completeness_pct": completeness_pct(complete, roster_rows),
+            "lifetime_rows": life_sink.rows, "last5_rows": last5_sink.rows, "deferred": len(deferred)}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    configure(os.path.dirname(args.output))
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    log_dir = os.path.join(OUTPUT_DIR, "logs")
+    started = datetime.now()
+    counter = setup_logging(log_dir, started.strftime('%Y%m%d_%H%M%S'), level=args.log_level,
+                            overrides=args.log_levels, keep=max(0, args.keep_logs))
+    summary: Dict[str, Any] = {"started": started.isoformat(timespec="seconds"), "command": args.command}
+
+    try:
+        shard = parse_shard(args.shard)
+    except ValueError as e:
+        logging.error(str(e))
+        sys.exit(2)
+    if shard and args.command != "harvest":
+        logging.error(f"--shard applies to the harvest, not to {args.command}.")
+        sys.exit(2)
+
+    compiled_lifetime_path = os.path.join(OUTPUT_DIR, LIFETIME_NAME)
+    compiled_last5_path   = os.path.join(OUTPUT_DIR, LAST5_NAME)
+    dedup_options = dict(engine=args.engine, memory_mb=args.dedup_memory_mb, workers=args.dedup_workers,
+                         static_assets=args.static_assets)
+
+    # Load roster
+    logging.info(f"Reading roster from {args.input}")
+    try:
+        roster = pd.read_csv(args.input)
+    except Exception as e:
+        logging.exception(f"Failed to read roster CSV: {e}")
+        sys.exit(1)
+
+    if args.refresh_citations:
+        if args.command != "harvest" or shard:
+            logging.error("--refresh-citations replaces the harvest; it takes no command or --shard.")
+            sys.exit(2)
+        if not os.path.exists(args.output):
+            logging.error(f"No dedup output at {args.output} to refresh; run a harvest first.")
+            sys.exit(1)
+        counts = refresh_citations(args.output, os.path.join(OUTPUT_DIR, PER_AUTHOR_NAME), roster,
+                                   workers=args.fetch_workers)
+        PUBLISHER.save()
+        summary.update(command="refresh-citations", **counts, artifacts_changed=len(PUBLISHER.changed),
+                       duration_s=round((datetime.now() - started).total_seconds(), 1))
+        write_run_summary(log_dir, summary, counter)
+        return
+
+    if args.command == "compare-engines":
+        if not os.path.exists(compiled_last5_path):
+            logging.error(f"No compiled last-5y file at {compiled_last5_path}; run a harvest first.")
+            sys.exit(1)
+        try:
+            same = compare_engines(compiled_last5_path, roster, args.engine if args.engine != "pandas" else "duckdb",
+                                   runs=args.bench_runs)
+        except RuntimeError as e:
+            logging.error(str(e))
+            sys.exit(2)
+        if not same:
+            logging.error("Engines disagree; the pandas output is the reference.")
+            sys.exit(1)
+        return
+
+    if args.command == "merge":
+        try:
+            totals = merge_shards(compiled_lifetime_path, compiled_last5_path, roster, keep_shards=args.keep_shards)
+        except ValueError as e:
+            logging.error(str(e))
+            sys.exit(1)
+        finalize_outputs(compiled_last5_path, roster, args.output, **dedup_options)
+        summary.update(**totals, artifacts_changed=len(PUBLISHER.changed), duration_s=round((datetime.now() - started).total_seconds(), 1))
+        write_run_summary(log_dir, summary, counter)
+        if totals["processed"] == 0:
+            logging.error("No authors processed with last-5y output — failing run so CI flags it.")
+            sys.exit(1)
+        return
+
+    if shard:
+        # Shard-local outputs; dedup and the per-author projection happen once, in `merge`
+        compiled_lifetime_path = shard_path(compiled_lifetime_path, shard)
+        compiled_last5_path = shard_path(compiled_last5_path, shard)
+        logging.info(f"Harvesting shard {shard[0]}/{shard[1]}")
+
+    counts = harvest_roster(roster, compiled_lifetime_path, compiled_last5_path, shard,
+                            fetch_workers=args.fetch_workers, transform_workers=args.transform_workers,
+                            queue_size=args.queue_size, use_cache=not args.no_cache,
+                            cache_max_age_days=args.cache_max_age_days, check_ids=not args.no_id_check,
+                            dead_letter_retries=args.dead_letter_retries, dead_letter_backoff=args.dead_letter_backoff,
+                            split_min_works=args.split_min_works, budget_requests=args.budget_requests,
+                            budget_minutes=args.budget_minutes)
+    assigned, processed = counts["assigned"], counts["processed"]
+    summary.update(shard=f"{shard[0]}/{shard[1]}" if shard else None, **counts)
+
+    if shard:
+        with open(shard_marker_path(shard), "w", encoding="utf-8") as fh:
+            json.dump({"shard": shard[0], "of": shard[1], "assigned": assigned, "processed": processed,
+                       "complete": counts["complete"], "rejected": counts["rejected"],
+                       "finished": datetime.now().isoformat(timespec="seconds")}, fh)
+        logging.info(f"Shard {shard[0]}/{shard[1]} done: {processed}/{assigned} authors with last-5y output")
+        summary["duration_s"] = round((datetime.now() - started).total_seconds(), 1)
+        write_run_summary(log_dir, summary, counter)
+        if assigned and processed == 0:
+            logging.error("No authors processed with last-5y output in this shard — failing so CI flags it.")
+            sys.exit(1)
+        return
+
+    finalize_outputs(compiled_last5_path, roster, args.output, **dedup_options)
+    summary["artifacts_changed"] = len(PUBLISHER.changed)
+    summary["duration_s"] = round((datetime.now() - started).total_seconds(), 1)
+    write_run_summary(log_dir, summary, counter)
 
     if processed == 0:
         logging.error("No authors processed with last-5y output — failing run so CI flags it.")
@@ -0,0 +1,43 @@
+"""
+UC_BioSci ETL as a library. The scripts stay runnable as before (python etl/UC_BioSci_works.py ...,
+python etl/fetch_author_metrics.py ...); this package exposes their stages without the CLI:
+
+    import etl
+    etl.fetch_metrics("data/roster.csv", "data/roster_with_metrics.csv")
+    etl.fetch_works("data/roster_with_metrics.csv", "data")
+    dedup_df = etl.dedup("data/openalex_all_authors_last5y_key_fields.csv",
+                         "data/openalex_all_authors_last5y_key_fields_dedup.csv", engine="duckdb")
+    per_author = etl.project_per_author(dedup_df, "data/roster_with_metrics.csv")
+    etl.refresh("data/openalex_all_authors_last5y_key_fields_dedup.csv", "data/roster_with_metrics.csv")
+    etl.AuthorRegistry.load("data/cache/author_registry.json").canonical("A5023888391")
+    etl.CorpusStore("data/openalex_corpus.sqlite").find_works(author="A5023888391", since=2022)
+
+Importing the package loads neither script (nor pandas/requests); each name is resolved on first use.
+"""
+
+from importlib import import_module
+from typing import Any
+
+_API = {
+    "fetch_works": "UC_BioSci_works",
+    "dedup": "UC_BioSci_works",
+    "refresh": "UC_BioSci_works",
+    "project_per_author": "UC_BioSci_works",
+    "fetch_metrics": "fetch_author_metrics",
+    "AuthorRegistry": "identity",
+    "CorpusStore": "corpus",
+}
+
+__all__ = list(_API)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _API:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_API[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,37 @@
+"""
+_lazy.py — deferred imports for the ETL scripts
+
+pandas and requests take ~0.5 s to import, which `--help`, argument errors and `import etl` should
+not pay. A LazyModule stands in for the module until the first attribute access, then imports it
+and (given the namespace that holds it) replaces itself there, so later lookups hit the real
+module directly.
+
+    pd = LazyModule("pandas", globals(), "pd")
+"""
+
+from __future__ import annotations
+
+import importlib
+from types import ModuleType
+from typing import Any, Dict, Optional
+
+
+class LazyModule:
+    """Import `name` on first attribute access."""
+
+    def __init__(self, name: str, namespace: Optional[Dict[str, Any]] = None, alias: Optional[str] = None) -> None:
+        self._name = name
+        self._namespace = namespace
+        self._alias = alias or name
+
+    def _load(self) -> ModuleType:
+        module = importlib.import_module(self._name)
+        if self._namespace is not None and self._namespace.get(self._alias) is self:
+            self._namespace[self._alias] = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self._name!r}>"
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+assets.py — content-hashed, precompressed copies of the dashboard's data files, and a preview server
+
+The dashboard fetches its CSV/JSON files by fixed names, so every nightly commit that touches one
+makes browsers download it again, and nothing is compressed unless the host does it. The static
+bundle (python etl/pipeline.py --static-assets ..., or `build` below) writes, under <data>/static/:
+
+    roster_with_metrics.<sha12>.csv (+ .gz, + .br)     one per dashboard file and data partition
+    partitions/dedup/year=2021.<sha12>.csv (+ ...)      <sha12>: first 12 hex digits of its sha256
+    manifest.json (+ .gz, + .br)                        {"version": 1, "assets": {name: entry}}
+
+where each manifest entry is {"path": "static/...", "sha256", "bytes", "encodings": {"br": n,
+"gzip": n}} keyed by the path relative to <data> that dashboard.js would fetch. dashboard.js reads
+the manifest first (revalidating it on every load) and fetches the hashed names, which never change
+content, so hosts can cache them for good; without a manifest it fetches the plain names as before.
+
+Once built, the bundle is refreshed by every ETL run that publishes dashboard files (as long as
+<data>/static/manifest.json exists), so it never points at stale data; delete the directory to stop.
+Compressed siblings are deterministic (gzip mtime 0), so unchanged files are not rewritten. Brotli
+needs the optional brotli package (pip install brotli); without it only .gz siblings are written.
+
+    python etl/assets.py build --data data
+    python etl/assets.py serve --root . --port 8000
+
+`serve` is a local preview server for measuring the effect offline: it answers with the .br or .gz
+sibling when the client accepts it (Content-Encoding, Vary), an ETag with If-None-Match -> 304, and
+Cache-Control "immutable" for content-hashed names (and ?v=<hash> partition URLs), "no-cache" for
+everything else. On exit it prints requests, 304s and bytes sent against the uncompressed size.
+Standard library only (plus brotli if installed).
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import sys
+import threading
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import brotli
+except ImportError:  # optional: .gz siblings only
+    brotli = None
+
+try:  # imported as part of the etl package
+    from .publish import ArtifactPublisher
+except ImportError:  # run as a script: python etl/assets.py
+    from publish import ArtifactPublisher
+
+STATIC_DIR = "static"
+ASSET_MANIFEST_NAME = "manifest.json"
+HASH_CHARS = 12
+MIN_COMPRESS_BYTES = 1024  # smaller files are served as they are
+
+# The files dashboard.js fetches, relative to the data directory (partition files are added from
+# partitions/manifest.json)
+DASHBOARD_FILES = [
+    "roster_with_metrics.csv",
+    "openalex_all_authors_last5y_key_fields_dedup.csv",
+    "openalex_all_authors_last5y_key_fields.csv",
+    "openalex_all_authors_last5y_key_fields_dedup_per_author.csv",
+    "openalex_search_index.json",
+    "openalex_wordcloud_terms.json",
+    "partitions/manifest.json",
+]
+
+_HASHED_RE = re.compile(r"\.[0-9a-f]{%d}\.[^./]+$" % HASH_CHARS)
+# Preference order when the client accepts several
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def asset_manifest_path(data_dir: str) -> str:
+    return os.path.join(data_dir, STATIC_DIR, ASSET_MANIFEST_NAME)
+
+
+def hashed_name(name: str, digest: str) -> str:
+    """static/<dir>/<stem>.<sha12><ext> for the data file `name` (relative, "/"-separated)."""
+    stem, ext = os.path.splitext(name)
+    return f"{STATIC_DIR}/{stem}.{digest[:HASH_CHARS]}{ext}"
+
+
+def compressed_variants(data: bytes) -> Dict[str, bytes]:
+    """{".gz": ..., ".br": ...} for `data`, keeping only variants smaller than the original."""
+    if len(data) < MIN_COMPRESS_BYTES:
+        return {}
+    out = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        out[".br"] = brotli.compress(data, quality=11)
+    return {suffix: blob for suffix, blob in out.items() if len(blob) < len(data)}
+
+
+def dashboard_files(data_dir: str) -> List[str]:
+    """DASHBOARD_FILES that exist under `data_dir`, plus the partitions the partition manifest lists."""
+    names = [n for n in DASHBOARD_FILES if os.path.exists(os.path.join(data_dir, n))]
+    try:
+        with open(os.path.join(data_dir, "partitions", "manifest.json"), encoding="utf-8") as fh:
+            datasets = json.load(fh).get("datasets", {})
+    except (OSError, ValueError, AttributeError):
+        datasets = {}
+    for ds in datasets.values():
+        for e in ds.get("partitions", []):
+            if os.path.exists(os.path.join(data_dir, e["path"])):
+                names.append(e["path"])
+    return names
+
+
+def _publish_with_variants(publisher: ArtifactPublisher, path: str, data: bytes,
+                           written: set) -> Dict[str, int]:
+    publisher.publish_bytes(path, data)
+    written.add(os.path.normpath(path))
+    encodings = {}
+    variants = compressed_variants(data)
+    for encoding, suffix in ENCODINGS:
+        if suffix in variants:
+            publisher.publish_bytes(path + suffix, variants[suffix])
+            written.add(os.path.normpath(path + suffix))
+            encodings[encoding] = len(variants[suffix])
+    return encodings
+
+
+def build_static_assets(data_dir: str, names: Optional[List[str]] = None,
+                        publisher: Optional[ArtifactPublisher] = None) -> Dict[str, Any]:
+    """Write content-hashed copies (+ compressed siblings) of `names` (default: dashboard_files) under
+    <data_dir>/static/ and the manifest mapping each name to its copy; files of earlier bundles that
+    are no longer referenced are removed. Returns the manifest."""
+    own = publisher is None
+    publisher = publisher or ArtifactPublisher(data_dir)
+    static_dir = os.path.join(data_dir, STATIC_DIR)
+    written: set = set()
+    assets: Dict[str, Any] = {}
+    raw = compressed = 0
+    for name in names if names is not None else dashboard_files(data_dir):
+        with open(os.path.join(data_dir, name), "rb") as fh:
+            data = fh.read()
+        digest = hashlib.sha256(data).hexdigest()
+        rel = hashed_name(name, digest)
+        encodings = _publish_with_variants(publisher, os.path.join(data_dir, rel), data, written)
+        assets[name] = {"path": rel, "sha256": digest, "bytes": len(data), "encodings": encodings}
+        raw += len(data)
+        compressed += min([len(data), *encodings.values()])
+
+    # No timestamp: the manifest only changes when some file's content does
+    manifest = {"version": 1, "assets": assets}
+    text = json.dumps(manifest, separators=(",", ":"), sort_keys=True)
+    _publish_with_variants(publisher, asset_manifest_path(data_dir), text.encode("utf-8"), written)
+
+    for dirpath, _, files in os.walk(static_dir):
+        for fn in files:
+            path = os.path.normpath(os.path.join(dirpath, fn))
+            if path not in written and not fn.endswith(".tmp"):
+                publisher.remove(path)
+    logging.info(f"[ok] Static bundle: {len(assets)} files, {raw} bytes -> {compressed} bytes compressed "
+                 f"({'br+gzip' if brotli is not None else 'gzip'}) under {static_dir}")
+    if own:
+        publisher.save()
+    return manifest
+
+
+# ----------------------------
+# Preview server
+# ----------------------------
+def accepted_encodings(header: str) -> set:
+    """Content codings an Accept-Encoding header allows (q=0 excluded)."""
+    out = set()
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        q = re.search(r"q\s*=\s*([0-9.]+)", params)
+        if token and not (q and float(q.group(1)) == 0):
+            out.add(token.strip().lower())
+    return out
+
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    """Static files with precompressed siblings, ETags and immutable caching of hashed names."""
+
+    stats = {"requests": 0, "not_modified": 0, "bytes_sent": 0, "bytes_identity": 0}
+    _lock = threading.Lock()
+    _etags: Dict[Tuple[str, int, int], str] = {}
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for key, n in deltas.items():
+                self.stats[key] += n
+
+    def _etag(self, path: str, encoding: Optional[str]) -> str:
+        m = _HASHED_RE.search(path)
+        if m:
+            tag = m.group(0).split(".")[1]
+        else:
+            st = os.stat(path)
+            key = (path, st.st_mtime_ns, st.st_size)
+            if key not in self._etags:
+                with open(path, "rb") as fh:
+                    self._etags[key] = hashlib.sha256(fh.read()).hexdigest()[:16]
+            tag = self._etags[key]
+        return f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+
+    def _cache_control(self, path: str) -> str:
+        if _HASHED_RE.search(path) or re.search(r"(^|&)v=", urlsplit(self.path).query):
+            return "public, max-age=31536000, immutable"
+        return "no-cache"
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split("?")[0].endswith("/"):
+            index = os.path.join(path, "index.html")
+            path = index if os.path.isfile(index) else path
+        if not os.path.isfile(path):
+            return super().send_head()  # directory listing, redirect or 404
+
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding", ""))
+        encoding, served = None, path
+        for name, suffix in ENCODINGS:
+            if name in accepted and os.path.isfile(path + suffix):
+                encoding, served = name, path + suffix
+                break
+        etag = self._etag(path, encoding)
+        cache_control = self._cache_control(path)
+        identity = os.path.getsize(path)
+
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", cache_control)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            self._count(requests=1, not_modified=1)
+            return None
+
+        fh = open(served, "rb")
+        size = os.fstat(fh.fileno()).st_size
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", mimetypes.guess_type(path)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(size))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", cache_control)
+        self.send_header("Last-Modified", self.date_time_string(int(os.path.getmtime(path))))
+        self.end_headers()
+        self._count(requests=1, bytes_sent=size, bytes_identity=identity)
+        return fh
+
+
+def serve(root: str, port: int = 8000, bind: str = "127.0.0.1") -> None:
+    handler = lambda *a, **kw: PreviewHandler(*a, directory=root, **kw)  # noqa: E731
+    server = ThreadingHTTPServer((bind, port), handler)
+    logging.info(f"Serving {os.path.abspath(root)} at http://{bind}:{port}/ (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        s = PreviewHandler.stats
+        saved = 1 - s["bytes_sent"] / s["bytes_identity"] if s["bytes_identity"] else 0.0
+        logging.info(f"{s['requests']} requests ({s['not_modified']} not modified), {s['bytes_sent']} bytes sent "
+                     f"for {s['bytes_identity']} uncompressed ({saved:.0%} saved)")
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Build the dashboard's static bundle, or preview it locally.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("build", help="Write content-hashed, precompressed copies of the dashboard files")
+    b.add_argument("--data", default="data", help="Data directory the dashboard reads (default data)")
+
+    s = sub.add_parser("serve", help="Preview server with Content-Encoding, ETag and cache headers")
+    s.add_argument("--root", default=".", help="Directory holding index.html (default .)")
+    s.add_argument("--port", type=int, default=8000)
+    s.add_argument("--bind", default="127.0.0.1")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s: %(message)s")
+    if args.command == "build":
+        if not os.path.isdir(args.data):
+            logging.error(f"No data directory at {args.data}")
+            sys.exit(1)
+        build_static_assets(args.data)
+    else:
+        serve(args.root, args.port, args.bind)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+corpus.py — indexed local copy of the deduplicated corpus (SQLite) with a query CLI/API
+
+The dedup CSV is wide and pipe-joined (one "|"-separated value per authorship in every
+authorships__* column), so any question the dashboard does not answer means re-reading and
+re-splitting it. The ETL therefore also writes <output dir>/openalex_corpus.sqlite (not committed),
+normalized into:
+
+    works                   one row per work (id, doi, title, year, type, citations, OA, source, topic...)
+    authorships             (work_id, seq) -> author id/name/ORCID, position, corresponding, country
+    institutions            ror, display name, country (one row per distinct institution)
+    authorship_institutions (work_id, seq) -> institution
+    topics                  (work_id, kind, name); kind: primary_topic, field, subfield, concept
+    cohort                  (work_id, author_id): the roster authors who own the work (cohort_union_author_ids)
+    cohort_authors          roster author id -> name (when the roster is given)
+    meta                    digest of the dedup file (+ roster names) and build time
+
+with indexes on the lookup columns, so e.g. "works where cohort author X was corresponding author
+with a partner at ROR Y since 2022" is a few index probes:
+
+    python etl/corpus.py query --db data/openalex_corpus.sqlite \
+        --author A5023888391 --corresponding --partner-ror 03yjb2x39 --since 2022
+    python etl/corpus.py sql --db data/openalex_corpus.sqlite "SELECT type, COUNT(*) FROM works GROUP BY type"
+    python etl/corpus.py build --dedup data/openalex_all_authors_last5y_key_fields_dedup.csv \
+        --roster data/roster_with_metrics.csv --db data/openalex_corpus.sqlite
+
+    from etl.corpus import CorpusStore
+    rows = CorpusStore("data/openalex_corpus.sqlite").find_works(author="A5023888391", since=2022)
+
+The store is rebuilt (into a temp file, then swapped in) only when the dedup file or the roster names changed.
+Standard library only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:  # imported as part of the etl package
+    from .identity import normalize_openalex_id
+except ImportError:  # run as a script: python etl/corpus.py
+    from identity import normalize_openalex_id
+
+CORPUS_NAME = "openalex_corpus.sqlite"
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE works (
+    work_id TEXT PRIMARY KEY, doi TEXT, title TEXT, year INTEGER, date TEXT, type TEXT,
+    cited_by_count INTEGER, oa_status TEXT, source TEXT, fwci REAL,
+    primary_topic TEXT, field TEXT, subfield TEXT, representative_author_id TEXT
+);
+CREATE TABLE authorships (
+    work_id TEXT NOT NULL, seq INTEGER NOT NULL, author_id TEXT, author_name TEXT, orcid TEXT,
+    position TEXT, is_corresponding INTEGER NOT NULL, raw_author_name TEXT, country TEXT,
+    PRIMARY KEY (work_id, seq)
+);
+CREATE TABLE institutions (
+    inst_id INTEGER PRIMARY KEY, ror TEXT, display_name TEXT NOT NULL, country_code TEXT
+);
+CREATE TABLE authorship_institutions (
+    work_id TEXT NOT NULL, seq INTEGER NOT NULL, inst_id INTEGER NOT NULL,
+    PRIMARY KEY (work_id, seq, inst_id)
+);
+CREATE TABLE topics (work_id TEXT NOT NULL, kind TEXT NOT NULL, name TEXT NOT NULL);
+CREATE TABLE cohort (
+    work_id TEXT NOT NULL, author_id TEXT NOT NULL, is_representative INTEGER NOT NULL,
+    PRIMARY KEY (author_id, work_id)
+);
+CREATE TABLE cohort_authors (author_id TEXT PRIMARY KEY, name TEXT);
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+INDEXES = """
+CREATE INDEX works_year ON works (year);
+CREATE INDEX authorships_author ON authorships (author_id, work_id);
+CREATE INDEX institutions_ror ON institutions (ror);
+CREATE INDEX institutions_name ON institutions (display_name);
+CREATE INDEX authorship_institutions_inst ON authorship_institutions (inst_id, work_id);
+CREATE INDEX topics_name ON topics (name, kind);
+CREATE INDEX topics_work ON topics (work_id);
+CREATE INDEX cohort_work ON cohort (work_id);
+"""
+
+
+# ------------------------- Build -------------------------
+
+def _digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _split(value: str, sep: str = "|") -> List[str]:
+    return value.split(sep) if value else []
+
+
+def _int(value: str) -> Optional[int]:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_ror(value: Any) -> str:
+    """Bare ROR id ('03yjb2x39') from a bare id or https://ror.org/ URL; '' if missing."""
+    s = str(value or "").strip()
+    for prefix in ("https://ror.org/", "http://ror.org/", "ror.org/"):
+        if s.lower().startswith(prefix):
+            s = s[len(prefix):]
+    return s.strip("/").lower()
+
+
+def store_digest(db_path: str) -> Optional[str]:
+    """Digest of the inputs the store at `db_path` was built from (None if absent/unreadable)."""
+    if not os.path.exists(db_path):
+        return None
+    try:
+        with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as con:
+            row = con.execute("SELECT value FROM meta WHERE key = 'source_sha256'").fetchone()
+        return row[0] if row else None
+    except sqlite3.Error:
+        return None
+
+
+def _rows(dedup_path: str) -> Iterable[Dict[str, str]]:
+    with open(dedup_path, encoding="utf-8", newline="") as fh:
+        yield from csv.DictReader(fh)
+
+
+def build_corpus_store(dedup_path: str, db_path: str, roster: Optional[Iterable[Tuple[str, str]]] = None,
+                       force: bool = False) -> bool:
+    """(Re)build the store at `db_path` from the dedup CSV; `roster` is (OpenAlex id, name) pairs for
+    cohort_authors. Skipped when the store was built from the same dedup content and names (force=False).
+    Returns True if the store was rebuilt."""
+    names: Dict[str, str] = {}
+    for aid, name in roster or ():
+        key = normalize_openalex_id(aid)
+        if key and key not in names:
+            names[key] = name
+    source = _digest(dedup_path)
+    if names:
+        source += "+" + hashlib.sha256(json.dumps(sorted(names.items())).encode("utf-8")).hexdigest()[:16]
+    if not force and store_digest(db_path) == source:
+        logging.info(f"[ok] Corpus store {db_path} is up to date")
+        return False
+
+    tmp = db_path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    con = sqlite3.connect(tmp)
+    try:
+        con.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;" + SCHEMA)
+        works, authorships, affiliations, topics, cohort = [], [], [], [], []
+        seen = set()
+        for r in _rows(dedup_path):
+            wid = r.get("id", "")
+            if not wid or wid in seen:
+                continue
+            seen.add(wid)
+            rep = normalize_openalex_id(r.get("author_openalex_id"))
+            works.append((wid, r.get("doi") or None, r.get("display_name"), _int(r.get("publication_year", "")),
+                          r.get("publication_date") or None, r.get("type") or None,
+                          _int(r.get("cited_by_count", "")), r.get("open_access__oa_status") or None,
+                          r.get("primary_location__source__display_name") or None, _float(r.get("fwci", "")),
+                          r.get("primary_topic__display_name") or None, r.get("primary_topic__field__display_name") or None,
+                          r.get("primary_topic__subfield__display_name") or None, rep))
+
+            ids = _split(r.get("authorships__author__id", ""))
+            cols = {c: _split(r.get(f"authorships__{c}", "")) for c in (
+                "author__display_name", "author__orcid", "author_position", "is_corresponding", "raw_author_name",
+                "countries", "institutions", "institutions__ror", "institutions__display_name",
+                "institutions__country_code")}
+            for seq, aid in enumerate(ids):
+                def at(c: str) -> str:
+                    v = cols[c]
+                    return v[seq] if seq < len(v) else ""
+                authorships.append((wid, seq, normalize_openalex_id(aid) or aid or None, at("author__display_name") or None,
+                                    at("author__orcid") or None, at("author_position") or None,
+                                    1 if at("is_corresponding") == "true" else 0, at("raw_author_name") or None,
+                                    at("countries") or None))
+                # every institution name of the authorship; the ROR/country columns only describe the first one
+                first = (at("institutions__display_name"), normalize_ror(at("institutions__ror")),
+                         at("institutions__country_code"))
+                inst_names = [n.strip() for n in at("institutions").split(";") if n.strip()]
+                if first[0] and first[0] not in inst_names:
+                    inst_names.insert(0, first[0])
+                affiliations.extend((wid, seq, n) + (first[1:] if n == first[0] else ("", "")) for n in inst_names)
+
+            for kind, col in (("primary_topic", "primary_topic__display_name"), ("field", "primary_topic__field__display_name"),
+                              ("subfield", "primary_topic__subfield__display_name")):
+                if r.get(col):
+                    topics.append((wid, kind, r[col]))
+            topics.extend((wid, "concept", c.strip()) for c in r.get("concepts_list", "").split(";") if c.strip())
+
+            owners = {normalize_openalex_id(a) for a in _split(r.get("cohort_union_author_ids", ""))} - {None}
+            if rep:
+                owners.add(rep)
+            cohort.extend((wid, a, 1 if a == rep else 0) for a in sorted(owners))
+
+        con.executemany("INSERT INTO works VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", works)
+        con.executemany("INSERT INTO authorships VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", authorships)
+        # one institution per ROR id; a name never seen with a ROR is its own institution
+        ror_of: Dict[str, str] = {}
+        for _, _, name, ror, _ in affiliations:
+            if ror:
+                ror_of.setdefault(name, ror)
+        inst_ids: Dict[str, int] = {}
+        institutions, links = [], []
+        for wid, seq, name, ror, country in affiliations:
+            key = ror or ror_of.get(name) or f"name:{name}"
+            if key not in inst_ids:
+                inst_ids[key] = len(inst_ids) + 1
+                institutions.append([inst_ids[key], ror or ror_of.get(name), name, country or None])
+            elif country and institutions[inst_ids[key] - 1][3] is None:
+                institutions[inst_ids[key] - 1][3] = country
+            links.append((wid, seq, inst_ids[key]))
+        con.executemany("INSERT INTO institutions VALUES (?, ?, ?, ?)", institutions)
+        con.executemany("INSERT OR IGNORE INTO authorship_institutions VALUES (?, ?, ?)", links)
+        con.executemany("INSERT INTO topics VALUES (?, ?, ?)", topics)
+        con.executemany("INSERT INTO cohort VALUES (?, ?, ?)", cohort)
+        con.executemany("INSERT INTO cohort_authors VALUES (?, ?)", sorted(names.items()))
+        con.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("schema_version", str(SCHEMA_VERSION)), ("source", os.path.basename(dedup_path)), ("source_sha256", source),
+            ("built", datetime.now().isoformat(timespec="seconds"))])
+        con.executescript(INDEXES + "ANALYZE;")
+        con.commit()
+    finally:
+        con.close()
+    os.replace(tmp, db_path)
+    logging.info(f"[ok] Wrote corpus store: {db_path} ({len(works)} works, {len(authorships)} authorships, "
+                 f"{len(inst_ids)} institutions, {len(cohort)} cohort links)")
+    return True
+
+
+def read_roster_pairs(path: str) -> List[Tuple[str, str]]:
+    """(OpenAlexID, Name) pairs from a roster CSV, for cohort_authors."""
+    with open(path, encoding="utf-8-sig", newline="") as fh:
+        return [(r.get("OpenAlexID") or "", r.get("Name") or "") for r in csv.DictReader(fh)]
+
+
+# ------------------------- Query -------------------------
+
+class CorpusStore:
+    """Read-only queries against a built store."""
+
+    def __init__(self, db_path: str) -> None:
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"No corpus store at {db_path}; run the ETL or `corpus.py build` first")
+        self.con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        self.con.row_factory = sqlite3.Row
+
+    def close(self) -> None:
+        self.con.close()
+
+    def sql(self, query: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        return [dict(r) for r in self.con.execute(query, params)]
+
+    def author_ids(self, author: str) -> List[str]:
+        """OpenAlex id(s) for an id in any roster form, or a cohort author name (case-insensitive)."""
+        aid = normalize_openalex_id(author)
+        if aid:
+            return [aid]
+        rows = self.con.execute("SELECT author_id FROM cohort_authors WHERE name = ? COLLATE NOCASE", (author.strip(),))
+        return [r[0] for r in rows]
+
+    def find_works(self, author: Optional[str] = None, corresponding: bool = False, position: Optional[str] = None,
+                   partner_ror: Optional[str] = None, partner_institution: Optional[str] = None,
+                   since: Optional[int] = None, until: Optional[int] = None, work_type: Optional[str] = None,
+                   topic: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Works matching every given filter, newest first.
+
+        author: cohort author (id or roster name); corresponding/position then apply to that author's
+        authorship, otherwise to any authorship. partner_ror/partner_institution: some *other*
+        authorship on the work is affiliated with that institution (ROR id or exact name).
+        topic: primary topic, field, subfield or concept name."""
+        where, params = [], []
+        me = ""
+        if author is not None:
+            ids = self.author_ids(author)
+            if not ids:
+                return []
+            me = f"a.author_id IN ({','.join('?' * len(ids))})"
+            where.append(f"w.work_id IN (SELECT work_id FROM cohort WHERE author_id IN ({','.join('?' * len(ids))}))")
+            params += ids
+        if corresponding or position:
+            cond = ["a.work_id = w.work_id"] + ([me] if me else [])
+            if me:
+                params += ids
+            if corresponding:
+                cond.append("a.is_corresponding = 1")
+            if position:
+                cond.append("a.position = ?")
+                params.append(position)
+            where.append(f"EXISTS (SELECT 1 FROM authorships a WHERE {' AND '.join(cond)})")
+        for value, column in ((partner_ror, "i.ror"), (partner_institution, "i.display_name")):
+            if not value:
+                continue
+            other = ""
+            if me:
+                other = f" AND (p.author_id IS NULL OR p.author_id NOT IN ({','.join('?' * len(ids))}))"
+            where.append(f"EXISTS (SELECT 1 FROM institutions i JOIN authorship_institutions ai ON ai.inst_id = i.inst_id "
+                         f"JOIN authorships p ON p.work_id = ai.work_id AND p.seq = ai.seq "
+                         f"WHERE {column} = ? AND ai.work_id = w.work_id{other})")
+            params.append(normalize_ror(value) if column == "i.ror" else value)
+            if me:
+                params += ids
+        if since is not None:
+            where.append("w.year >= ?")
+            params.append(int(since))
+        if until is not None:
+            where.append("w.year <= ?")
+            params.append(int(until))
+        if work_type:
+            where.append("w.type = ?")
+            params.append(work_type)
+        if topic:
+            where.append("w.work_id IN (SELECT work_id FROM topics WHERE name = ?)")
+            params.append(topic)
+        query = ("SELECT w.work_id, w.doi, w.title, w.year, w.type, w.cited_by_count, w.oa_status, w.source FROM works w"
+                 + (" WHERE " + " AND ".join(where) if where else "")
+                 + " ORDER BY w.year DESC, w.cited_by_count DESC, w.work_id")
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        return self.sql(query, params)
+
+
+# ------------------------- CLI -------------------------
+
+def _print_rows(rows: List[Dict[str, Any]], fmt: str) -> None:
+    if fmt == "json":
+        json.dump(rows, sys.stdout, ensure_ascii=False, indent=1)
+        sys.stdout.write("\n")
+        return
+    if not rows:
+        return
+    writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]), delimiter="\t" if fmt == "tsv" else ",",
+                            lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Build or query the indexed corpus store (SQLite).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("build", help="(Re)build the store from the dedup CSV")
+    b.add_argument("--dedup", required=True, help="Dedup CSV written by UC_BioSci_works.py")
+    b.add_argument("--roster", default=None, help="Roster CSV (OpenAlexID, Name) for cohort author names")
+    b.add_argument("--db", default=os.path.join("data", CORPUS_NAME))
+    b.add_argument("--force", action="store_true", help="Rebuild even if the dedup file is unchanged")
+
+    q = sub.add_parser("query", help="Find works by cohort author, role, partner institution, year, type, topic")
+    q.add_argument("--db", default=os.path.join("data", CORPUS_NAME))
+    q.add_argument("--author", help="Cohort author: OpenAlex id (any form) or roster name")
+    q.add_argument("--corresponding", action="store_true", help="...who was a corresponding author")
+    q.add_argument("--position", choices=["first", "middle", "last"], help="...in this author position")
+    q.add_argument("--partner-ror", help="Another author on the work is affiliated with this ROR id")
+    q.add_argument("--partner-institution", help="Same, by exact institution name")
+    q.add_argument("--since", type=int, help="Publication year >= this")
+    q.add_argument("--until", type=int, help="Publication year <= this")
+    q.add_argument("--type", dest="work_type", help="Work type, e.g. article")
+    q.add_argument("--topic", help="Primary topic, field, subfield or concept name")
+    q.add_argument("--limit", type=int, default=None)
+    q.add_argument("--format", choices=["csv", "tsv", "json"], default="tsv")
+
+    s = sub.add_parser("sql", help="Run a read-only SQL query")
+    s.add_argument("--db", default=os.path.join("data", CORPUS_NAME))
+    s.add_argument("query")
+    s.add_argument("--format", choices=["csv", "tsv", "json"], default="tsv")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s: %(message)s")
+    try:
+        if args.command == "build":
+            build_corpus_store(args.dedup, args.db, read_roster_pairs(args.roster) if args.roster else None, force=args.force)
+            return
+        store = CorpusStore(args.db)
+        if args.command == "sql":
+            rows = store.sql(args.query)
+        else:
+            rows = store.find_works(author=args.author, corresponding=args.corresponding, position=args.position,
+                                    partner_ror=args.partner_ror, partner_institution=args.partner_institution,
+                                    since=args.since, until=args.until, work_type=args.work_type, topic=args.topic,
+                                    limit=args.limit)
+        _print_rows(rows, args.format)
+    except (FileNotFoundError, sqlite3.Error) as e:
+        logging.error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,8 +12,16 @@ What stays the same:
   and ID formats: raw A..., openalex:..., human URL, API URL).
 - Gentle API usage (User-Agent with optional mailto, retry with backoff,
   delay between calls).
-- Outputs H_index, I10_index, Works_count, Total_citations (same names),
-  and logs simple deltas vs a previous output if requested.
+- Outputs H_index, I10_index, Works_count, Total_citations (same names).
+- Appends each run's metrics to data/metrics_history.csv (keyed by OpenAlexID + run_date),
+  logs keyed per-author deltas vs the previous run (or --diff-since) if requested, and exports
+  data/metrics_trajectories.json for the dashboard.
+- Also outputs Updated_date (the author record's last update in OpenAlex) and Last_work_year (the
+  latest year of counts_by_year with works); Works_count + Last_work_year is the fingerprint
+  UC_BioSci_works.py uses to skip re-harvesting unchanged authors.
+- Records every author it resolves in the identity registry shared with UC_BioSci_works.py
+  (data/cache/author_registry.json, see identity.py): OpenAlex ID <-> ORCID <-> roster row,
+  merged IDs and when each was last verified. Missing IDs known to it are filled without a request.
 
 Usage examples:
     python fetch_author_metrics.py \
@@ -21,6 +29,10 @@ Usage examples:
       --output data/faculty_with_metrics.csv \
       --email you@university.ca --log-diffs
 
+    # as a library (pandas/requests are imported on first use)
+    import etl
+    df = etl.fetch_metrics("data/faculty.csv", "data/faculty_with_metrics.csv", log_diffs=True)
+
 Supported input types: .csv, .tsv, .xlsx, .xls
 Output is always CSV.
 """
@@ -36,10 +48,20 @@ import re
 import sys
 import time
 from datetime import datetime
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple, Union
+
+try:  # imported as part of the etl package
+    from ._lazy import LazyModule
+    from .identity import AuthorRegistry, normalize_openalex_id, normalize_orcid
+    from .publish import ArtifactPublisher
+except ImportError:  # run as a script: python etl/fetch_author_metrics.py
+    from _lazy import LazyModule
+    from identity import AuthorRegistry, normalize_openalex_id, normalize_orcid
+    from publish import ArtifactPublisher
 
-import pandas as pd
-import requests
+# Heavy imports are deferred to first use, so --help and `import etl` stay fast
+pd = LazyModule("pandas", globals(), "pd")
+requests = LazyModule("requests", globals())
 
 OPENALEX_BASE = "https://api.openalex.org"
 
@@ -142,24 +164,6 @@ def normalize_author_id(author_id: str) -> str:
 
     return f"{OPENALEX_BASE}/authors/{aid}"
 
-
-def normalize_orcid(orcid: str) -> str:
-    """Return ORCID in bare 16-digit form with hyphens (e.g., 0000-0002-1825-0097).
-    Accepts full URLs or bare values; returns "" for missing.
-    """
-    val = (str(orcid) if orcid is not None else "").strip()
-    if not val or val.lower() in {"nan", "none"}:
-        return ""
-    # Extract the last 19 chars if a URL was provided
-    m = re.search(r"(\d{4}-\d{4}-\d{4}-[\dX]{4})", val)
-    if m:
-        return m.group(1)
-    # Insert hyphens if a compact 16-char form
-    digits = re.sub(r"[^0-9X]", "", val)
-    if len(digits) == 16:
-        return f"{digits[0:4]}-{digits[4:8]}-{digits[8:12]}-{digits[12:16]}"
-    return val
-
 # ------------------------- HTTP helpers -------------------------
 
 def build_session(email: Optional[str]) -> requests.Session:
@@ -198,8 +202,8 @@ def fetch_author(url_or_id: str, session: requests.Session, *, email: Optional[s
     if not url:
         return None
     params = {
-        # h_index, i10_index live under summary_stats
-        "select": "id,display_name,works_count,cited_by_count,orcid,summary_stats",
+        # h_index, i10_index live under summary_stats; counts_by_year feeds the works-harvest fingerprint
+        "select": "id,display_name,works_count,cited_by_count,orcid,summary_stats,updated_date,counts_by_year",
     }
     if email:
         params["mailto"] = email
@@ -220,7 +224,7 @@ def fetch_by_orcid(orcid: str, session: requests.Session, *, email: Optional[str
         return None
     # OpenAlex supports path form /authors/orcid:<id>
     url = f"{OPENALEX_BASE}/authors/orcid:{norm}"
-    params: Dict[str, Any] = {"select": "id,display_name,works_count,cited_by_count,orcid,summary_stats"}
+    params: Dict[str, Any] = {"select": "id,display_name,works_count,cited_by_count,orcid,summary_stats,updated_date"}
     if email:
         params["mailto"] = email
     resp = _get(session, url, params, max_tries=3, backoff=1.0)
@@ -244,8 +248,16 @@ def extract_metrics(author_json: Dict[str, Any]) -> Dict[str, Any]:
         "I10_index": ss.get("i10_index"),
         "Works_count": author_json.get("works_count"),
         "Total_citations": author_json.get("cited_by_count"),
+        "Updated_date": author_json.get("updated_date"),
+        "Last_work_year": last_work_year(author_json),
     }
 
+
+def last_work_year(author_json: Dict[str, Any]) -> Optional[int]:
+    """Latest year in counts_by_year (OpenAlex keeps the last ~10) with at least one work."""
+    years = [c.get("year") for c in author_json.get("counts_by_year") or [] if (c.get("works_count") or 0) > 0]
+    return max((y for y in years if isinstance(y, int)), default=None)
+
 # ------------------------- IO -------------------------
 
 def read_input(path: str) -> pd.DataFrame:
@@ -258,16 +270,128 @@ def read_input(path: str) -> pd.DataFrame:
     raise ValueError("Unsupported input format. Use .csv, .tsv, .xlsx, or .xls")
 
 
-def write_output(df: pd.DataFrame, out_path: str) -> None:
-    df.to_csv(out_path, index=False, quoting=csv.QUOTE_MINIMAL)
+def write_output(df: pd.DataFrame, out_path: str, publisher: Optional[ArtifactPublisher] = None) -> None:
+    if publisher is None:
+        df.to_csv(out_path, index=False, quoting=csv.QUOTE_MINIMAL)
+    elif not publisher.publish_csv(df, out_path, quoting=csv.QUOTE_MINIMAL):
+        logging.info("[ok] Unchanged: %s", out_path)
+        return
     logging.info("[ok] Wrote: %s", out_path)
 
+# ------------------------- Metrics history -------------------------
+
+HISTORY_METRICS = ["H_index", "I10_index", "Works_count", "Total_citations"]
+HISTORY_KEY = ["OpenAlexID", "run_date"]
+
+
+def history_key(author_id: Any) -> str:
+    """Bare, upper-case OpenAlex author id (A...) used as the history key; "" if missing."""
+    url = normalize_author_id(author_id)
+    return url.rsplit("/", 1)[-1].upper() if url else ""
+
+
+def load_history(path: str) -> pd.DataFrame:
+    """Read the metrics history, indexed by (OpenAlexID, run_date) and sorted, so one author's
+    trajectory is a contiguous slice and as-of lookups are a filter + groupby.last()."""
+    if path and os.path.exists(path):
+        hist = pd.read_csv(path, dtype={"OpenAlexID": str, "run_date": str})
+    else:
+        hist = pd.DataFrame(columns=HISTORY_KEY + HISTORY_METRICS)
+    for col in HISTORY_METRICS:
+        hist[col] = pd.to_numeric(hist.get(col), errors="coerce").astype("Int64")
+    return hist.set_index(HISTORY_KEY).sort_index()
+
+
+def append_snapshot(hist: pd.DataFrame, out_df: pd.DataFrame, run_date: str) -> pd.DataFrame:
+    """Add this run's metrics to the history. Rows are only ever added; re-running on the same
+    date replaces that date's rows. Authors whose lookup failed are not recorded, and neither are
+    authors whose metrics equal their latest earlier row (as-of lookups make that lossless and
+    an unchanged night leaves the file untouched)."""
+    snap = out_df[["OpenAlexID"] + HISTORY_METRICS].copy()
+    snap["OpenAlexID"] = snap["OpenAlexID"].map(history_key)
+    snap = snap[(snap["OpenAlexID"] != "") & snap[HISTORY_METRICS].notna().any(axis=1)]
+    snap["run_date"] = run_date
+    for col in HISTORY_METRICS:
+        snap[col] = pd.to_numeric(snap[col], errors="coerce").astype("Int64")
+    snap = snap.drop_duplicates("OpenAlexID", keep="last").set_index(HISTORY_KEY)
+    earlier = hist[hist.index.get_level_values("run_date") < run_date]
+    prev = snapshot_as_of(earlier, run_date).reindex(snap.index.get_level_values("OpenAlexID"))
+    prev.index = snap.index
+    # <NA> never compares equal, so fill with a sentinel; authors without an earlier row are kept
+    same = (prev.fillna(-1) == snap[HISTORY_METRICS].fillna(-1)).all(axis=1) & prev.notna().any(axis=1)
+    snap = snap[~same]
+    today = hist.index.get_level_values("run_date") == run_date
+    combined = pd.concat([hist[~today], snap])
+    return combined.sort_index()
+
+
+def write_history(hist: pd.DataFrame, path: str, publisher: Optional[ArtifactPublisher] = None) -> None:
+    if publisher is not None:
+        publisher.publish_csv(hist.reset_index(), path)
+    else:
+        tmp = path + ".tmp"
+        hist.reset_index().to_csv(tmp, index=False)
+        os.replace(tmp, path)
+    logging.info("[ok] Wrote metrics history: %s (%d rows, %d authors)",
+                 path, len(hist), hist.index.get_level_values("OpenAlexID").nunique())
+
+
+def history_dates(hist: pd.DataFrame) -> list:
+    return sorted(hist.index.get_level_values("run_date").unique())
+
+
+def snapshot_as_of(hist: pd.DataFrame, date: str) -> pd.DataFrame:
+    """Each author's latest metrics recorded on or before `date`, indexed by OpenAlexID."""
+    sub = hist[hist.index.get_level_values("run_date") <= date].reset_index()
+    # Whole rows: groupby().last() takes each column's last non-null value, mixing runs
+    latest = sub.sort_values("run_date", kind="stable").drop_duplicates("OpenAlexID", keep="last")
+    return latest.set_index("OpenAlexID").drop(columns="run_date").sort_index()
+
+
+def metric_deltas(hist: pd.DataFrame, since: str, until: Optional[str] = None) -> pd.DataFrame:
+    """Keyed deltas between two dates (until defaults to the latest run). Aligned on OpenAlexID,
+    so roster edits do not shift rows; authors missing on either side get <NA> deltas."""
+    until = until or (history_dates(hist) or [since])[-1]
+    return snapshot_as_of(hist, until).sub(snapshot_as_of(hist, since))
+
+
+def log_deltas(hist: pd.DataFrame, since: str, until: str) -> None:
+    deltas = metric_deltas(hist, since, until)
+    both = deltas.dropna(how="all")
+    logging.info("[diff] %s -> %s: %d authors in both snapshots, %d in only one",
+                 since, until, len(both), len(deltas) - len(both))
+    for col in HISTORY_METRICS:
+        d = both[col].dropna()
+        logging.info("[diff] %s: %d authors changed; total delta = %s", col, int((d != 0).sum()), int(d.sum()))
+    movers = both["Total_citations"].dropna().sort_values(ascending=False).head(5)
+    for aid, delta in movers[movers > 0].items():
+        logging.info("[diff] top citation gain: %s +%d", aid, int(delta))
+
+
+def export_trajectories(hist: pd.DataFrame, path: str, publisher: Optional[ArtifactPublisher] = None) -> None:
+    """Write {author: [[run_date, H, I10, Works, Citations], ...]} for the dashboard."""
+    flat = hist.reset_index()
+    out: Dict[str, Any] = {"version": 1, "fields": ["run_date"] + HISTORY_METRICS, "authors": {}}
+    for aid, grp in flat.groupby("OpenAlexID", sort=True):
+        rows = grp[out["fields"]].astype(object)
+        out["authors"][aid] = rows.where(rows.notna(), None).values.tolist()
+    if publisher is not None:
+        publisher.publish_json(out, path, separators=(",", ":"))
+    else:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(out, fh, separators=(",", ":"))
+        os.replace(tmp, path)
+    logging.info("[ok] Wrote metric trajectories: %s (%d authors)", path, len(out["authors"]))
+
 # ------------------------- Cross-resolve IDs -------------------------
 
-def resolve_missing_ids(df: pd.DataFrame, *, openalex_col: Optional[str], orcid_col: Optional[str], session: requests.Session, email: Optional[str], delay: float) -> pd.DataFrame:
+def resolve_missing_ids(df: pd.DataFrame, *, openalex_col: Optional[str], orcid_col: Optional[str], session: requests.Session, email: Optional[str], delay: float,
+                        registry: Optional[AuthorRegistry] = None) -> pd.DataFrame:
     """For each row, if either OpenAlexID or ORCID is missing but the other exists, look up the missing one.
     Returns an updated DataFrame with both columns filled where possible.
-    The function does not write to disk; it only updates the in-memory df.
+    The function does not write to disk; it only updates the in-memory df (and the registry:
+    mappings it verified recently are used without a request, new lookups are recorded).
     """
     # Ensure we have explicit columns in the df for output consistency
     if openalex_col is None:
@@ -279,14 +403,13 @@ def resolve_missing_ids(df: pd.DataFrame, *, openalex_col: Optional[str], orcid_
         if "ORCID" not in df.columns:
             df[orcid_col] = ""
 
-    cache_by_openalex: Dict[str, Dict[str, Any]] = {}
-    cache_by_orcid: Dict[str, Dict[str, Any]] = {}
+    registry = registry if registry is not None else AuthorRegistry()
 
-    for idx, row in df.iterrows():
+    for pos, (idx, row) in enumerate(df.iterrows()):
         raw_openalex = str(row.get(openalex_col) or "").strip()
         raw_orcid = str(row.get(orcid_col) or "").strip()
 
-        have_openalex = bool(raw_openalex)
+        have_openalex = bool(normalize_author_id(raw_openalex))  # "nan" (empty CSV cell) is missing
         have_orcid = bool(normalize_orcid(raw_orcid))
 
         author_obj: Optional[Dict[str, Any]] = None
@@ -296,79 +419,67 @@ def resolve_missing_ids(df: pd.DataFrame, *, openalex_col: Optional[str], orcid_
             continue
 
         if have_openalex and not have_orcid:
-            key = normalize_author_id(raw_openalex)
-            author_obj = cache_by_openalex.get(key)
-            if not author_obj:
-                author_obj = fetch_author(raw_openalex, session, email=email)
-                if author_obj:
-                    cache_by_openalex[key] = author_obj
-                    time.sleep(delay)
+            known = registry.get(registry.canonical(raw_openalex))
+            if known and known.get("orcid") and registry.is_fresh(known["canonical"]):
+                df.at[idx, orcid_col] = f"https://orcid.org/{known['orcid']}"
+                continue
+            author_obj = fetch_author(raw_openalex, session, email=email)
             if author_obj:
+                registry.observe(raw_openalex, author_obj, row=pos)
+                time.sleep(delay)
                 df.at[idx, orcid_col] = author_obj.get("orcid") or ""
             continue
 
         if have_orcid and not have_openalex:
             norm = normalize_orcid(raw_orcid)
-            author_obj = cache_by_orcid.get(norm)
-            if not author_obj:
-                author_obj = fetch_by_orcid(norm, session, email=email)
-                if author_obj:
-                    cache_by_orcid[norm] = author_obj
-                    time.sleep(delay)
+            known_id = registry.by_orcid(norm)
+            if known_id and registry.is_fresh(known_id):
+                df.at[idx, openalex_col] = f"https://openalex.org/{known_id}"
+                continue
+            author_obj = fetch_by_orcid(norm, session, email=email)
             if author_obj:
+                registry.observe(None, author_obj, row=pos)
+                time.sleep(delay)
                 df.at[idx, openalex_col] = author_obj.get("id") or ""
             continue
 
     return df
 
-# ------------------------- Main -------------------------
-
-def main() -> None:
-    setup_logging()
-
-    parser = argparse.ArgumentParser(description="Append OpenAlex metrics to a roster file (now ORCID-aware).")
-    parser.add_argument("--input", "-i", required=True, help="Path to input CSV/TSV/Excel file")
-    parser.add_argument("--output", "-o", default=None, help="Path to output CSV (default: <input>_with_metrics.csv)")
-    parser.add_argument("--delay", type=float, default=0.25, help="Delay (s) between API calls to be gentle on rate limits")
-    parser.add_argument("--email", type=str, default=None, help="Contact email for User-Agent and mailto, e.g., name@ucalgary.ca")
-    parser.add_argument("--log-diffs", action="store_true", help="If an older output exists, log per-row metric deltas")
-    args = parser.parse_args()
-
-    in_path = args.input
-    out_path = args.output or f"{os.path.splitext(in_path)[0]}_with_metrics.csv"
-
-    # Determine contact email
-    email = args.email or os.environ.get("OPENALEX_MAILTO") or os.environ.get("CONTACT_EMAIL")
-
-    # Read input
-    try:
-        df = read_input(in_path)
-    except Exception as e:
-        logging.error("Failed to read input: %s", e)
-        sys.exit(1)
+# ------------------------- Library API -------------------------
+
+def fetch_metrics(roster: Any, out_path: Optional[str] = None, *, delay: float = 0.25, email: Optional[str] = None,
+                  history: Optional[str] = "data/metrics_history.csv",
+                  trajectories: Optional[str] = "data/metrics_trajectories.json",
+                  log_diffs: bool = False, diff_since: Optional[str] = None,
+                  registry: Union[str, AuthorRegistry, None] = "data/cache/author_registry.json",
+                  session: Optional[requests.Session] = None) -> pd.DataFrame:
+    """Fetch OpenAlex metrics for every author in `roster` (DataFrame or roster file path) and return
+    the roster with the metric columns appended; with `out_path`, also write it there. The history,
+    trajectories and author registry (identity.py; a path or an already loaded AuthorRegistry) files
+    are updated unless None/''. `session` reuses a caller's HTTP session. Raises ValueError without
+    an ID column."""
+    # row order aligns roster and metrics below, so work on a RangeIndex copy
+    df = read_input(roster) if isinstance(roster, (str, os.PathLike)) else roster.reset_index(drop=True)
 
     # Detect ID columns
     openalex_col = find_openalex_col(df.columns)
     orcid_col = find_orcid_col(df.columns)
 
     if openalex_col is None and orcid_col is None:
-        logging.error("No OpenAlex ID or ORCID column detected. Please add one.")
-        sys.exit(2)
+        raise ValueError("No OpenAlex ID or ORCID column detected. Please add one.")
 
-    session = build_session(email)
+    session = session or build_session(email)
+    if isinstance(registry, AuthorRegistry):
+        reg = registry
+    else:
+        reg = AuthorRegistry.load(registry) if registry else AuthorRegistry()
 
     # First: fill missing IDs using the other identifier, if present
-    df = resolve_missing_ids(df, openalex_col=openalex_col, orcid_col=orcid_col, session=session, email=email, delay=args.delay)
+    df = resolve_missing_ids(df, openalex_col=openalex_col, orcid_col=orcid_col, session=session, email=email, delay=delay,
+                             registry=reg)
 
     # Build results rows
     out_rows = []
-    prev_out_path = out_path if args.log_diffs else None
-    prev_df: Optional[pd.DataFrame] = None
-    if prev_out_path and os.path.exists(prev_out_path):
-        try:
-            prev_df = pd.read_csv(prev_out_path)
-        except Exception:
-            prev_df = None
 
     # Ensure explicit columns exist and remember their names for output
     if openalex_col is None:
@@ -376,22 +487,32 @@ def main() -> None:
     if orcid_col is None:
         orcid_col = "ORCID"
 
-    # Iterate
-    for _, row in df.iterrows():
+    # Iterate; an id on several rows stays placed at its first, as the harvest's work plan does
+    first_pos: Dict[str, int] = {}
+    for pos, (_, row) in enumerate(df.iterrows()):
         author_id_val = row.get(openalex_col)
         orcid_val = row.get(orcid_col)
 
         author_json: Optional[Dict[str, Any]] = None
+        observed: Optional[str] = None
 
-        # Prefer OpenAlex ID if available; otherwise try ORCID
+        # Prefer OpenAlex ID if available (the surviving one, if the registry knows of a merge);
+        # otherwise try ORCID
         if author_id_val and str(author_id_val).strip():
-            author_json = fetch_author(str(author_id_val), session, email=email)
+            author_json = fetch_author(reg.canonical(author_id_val) or str(author_id_val), session, email=email)
             if author_json:
-                time.sleep(args.delay)
+                observed = reg.observe(author_id_val, author_json, row=pos)
+                time.sleep(delay)
         elif orcid_val and normalize_orcid(str(orcid_val)):
             author_json = fetch_by_orcid(str(orcid_val), session, email=email)
             if author_json:
-                time.sleep(args.delay)
+                observed = reg.observe(None, author_json, row=pos)
+                time.sleep(delay)
+        if observed:
+            if observed in first_pos:
+                reg.place(observed, first_pos[observed])
+            else:
+                first_pos[observed] = pos
 
         if not author_json:
             out_rows.append({
@@ -402,6 +523,8 @@ def main() -> None:
                 "I10_index": None,
                 "Works_count": None,
                 "Total_citations": None,
+                "Updated_date": None,
+                "Last_work_year": None,
             })
             continue
 
@@ -410,14 +533,31 @@ def main() -> None:
 
     out_df = pd.DataFrame(out_rows)
 
-    # If requested, log simple deltas vs previous output
-    if prev_df is not None and len(prev_df) == len(out_df):
-        for col in ("H_index", "I10_index", "Works_count", "Total_citations"):
-            if col in prev_df.columns and col in out_df.columns:
-                diffs = out_df[col].fillna(0).astype(float) - prev_df[col].fillna(0).astype(float)
-                changed = int((diffs != 0).sum())
-                total_delta = float(diffs.sum())
-                logging.info("[diff] %s: %d rows changed; total delta = %s", col, changed, total_delta)
+    # Artifacts are only rewritten when their content changed (see publish.py)
+    publisher = ArtifactPublisher(os.path.dirname(out_path or history or trajectories or "") or ".")
+
+    # Record this run in the history; deltas are keyed by OpenAlex ID, so roster edits don't matter
+    if history:
+        run_date = datetime.now().strftime("%Y-%m-%d")
+        try:
+            hist = load_history(history)
+        except Exception:
+            logging.exception("Could not read metrics history %s; not updating it this run", history)
+            hist = None
+        if hist is not None:
+            prior = [d for d in history_dates(hist) if d < run_date]
+            hist = append_snapshot(hist, out_df, run_date)
+            write_history(hist, history, publisher)
+            if log_diffs:
+                since = diff_since or (prior[-1] if prior else None)
+                if since:
+                    log_deltas(hist, since, run_date)
+                else:
+                    logging.info("[diff] No earlier snapshot in %s; nothing to compare", history)
+            if trajectories:
+                export_trajectories(hist, trajectories, publisher)
+    elif log_diffs:
+        logging.warning("[diff] --log-diffs needs --history; skipping deltas")
 
     # Merge original dataframe with metrics on best-effort key (OpenAlexID/ORCID/Display_name)
     # Prefer to append columns rather than drop any existing ones.
@@ -427,10 +567,61 @@ def main() -> None:
     merged[openalex_col] = out_df["OpenAlexID"]
     merged[orcid_col] = out_df["ORCID"]
     # Append metrics
-    for col in ["Display_name", "H_index", "I10_index", "Works_count", "Total_citations"]:
+    for col in ["Display_name", "H_index", "I10_index", "Works_count", "Total_citations", "Updated_date", "Last_work_year"]:
         merged[col] = out_df[col]
 
-    write_output(merged, out_path)
+    if out_path:
+        write_output(merged, out_path, publisher)
+    publisher.save()
+    if reg.save():
+        logging.info("[ok] Updated author registry: %s (%d ids)", reg.path, len(reg))
+    return merged
+
+# ------------------------- Main -------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Append OpenAlex metrics to a roster file (now ORCID-aware).")
+    parser.add_argument("--input", "-i", required=True, help="Path to input CSV/TSV/Excel file")
+    parser.add_argument("--output", "-o", default=None, help="Path to output CSV (default: <input>_with_metrics.csv)")
+    parser.add_argument("--delay", type=float, default=0.25, help="Delay (s) between API calls to be gentle on rate limits")
+    parser.add_argument("--email", type=str, default=None, help="Contact email for User-Agent and mailto, e.g., name@ucalgary.ca")
+    parser.add_argument("--log-diffs", action="store_true",
+                        help="Log per-author metric deltas (keyed by OpenAlex ID) vs the previous run in the history")
+    parser.add_argument("--diff-since", default=None, metavar="YYYY-MM-DD",
+                        help="With --log-diffs: compare against the latest snapshot on or before this date instead")
+    parser.add_argument("--history", default="data/metrics_history.csv",
+                        help="Append-only metrics history CSV keyed by OpenAlexID + run_date ('' to disable)")
+    parser.add_argument("--trajectories", default="data/metrics_trajectories.json",
+                        help="Per-author metric trajectories JSON for the dashboard ('' to skip)")
+    parser.add_argument("--registry", default="data/cache/author_registry.json",
+                        help="Author identity registry shared with UC_BioSci_works.py ('' to disable)")
+    return parser
+
+
+def main(argv: Optional[list] = None) -> None:
+    args = build_parser().parse_args(argv)
+    setup_logging()
+
+    in_path = args.input
+    out_path = args.output or f"{os.path.splitext(in_path)[0]}_with_metrics.csv"
+
+    # Determine contact email
+    email = args.email or os.environ.get("OPENALEX_MAILTO") or os.environ.get("CONTACT_EMAIL")
+
+    # Read input
+    try:
+        df = read_input(in_path)
+    except Exception as e:
+        logging.error("Failed to read input: %s", e)
+        sys.exit(1)
+
+    try:
+        fetch_metrics(df, out_path, delay=args.delay, email=email, history=args.history,
+                      trajectories=args.trajectories, log_diffs=args.log_diffs, diff_since=args.diff_since,
+                      registry=args.registry)
+    except ValueError as e:
+        logging.error("%s", e)
+        sys.exit(2)
 
 
 if __name__ == "__main__":
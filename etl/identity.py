@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+identity.py — persistent author identity registry (shared by both ETL scripts)
+
+One JSON file (data/cache/author_registry.json by default) remembers, per OpenAlex author ID:
+
+- canonical: the ID OpenAlex answers with today. OpenAlex merges duplicate author profiles; the old
+  ID keeps working as a redirect to the surviving one, but /works?filter=author.id:<old> and the
+  batched /authors?filter=openalex:... lookups no longer match it. canonical(id) follows the chain.
+- orcid, name and row (0-based roster position where the ID was last seen);
+- verified: when OpenAlex last confirmed the mapping.
+
+Lookups by ID, ORCID and roster row are dict hits on indexes built at load time, so the scripts can
+resolve every roster row in memory and only ask the API about entries that are new or older than
+MAX_AGE_DAYS (OPENALEX_REGISTRY_MAX_AGE_DAYS).
+
+    reg = AuthorRegistry.load("data/cache/author_registry.json")
+    reg.observe("A123", {"id": "https://openalex.org/A999", "orcid": None}, row=4)
+    reg.canonical("A123")        # -> "A999"
+    reg.save()
+
+Also home to the ID normalizers both scripts use (normalize_openalex_id, normalize_orcid).
+Standard library only: importing it costs nothing.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+REGISTRY_NAME = "author_registry.json"
+MAX_AGE_DAYS = int(os.getenv("OPENALEX_REGISTRY_MAX_AGE_DAYS", "30"))
+# A re-verification only needs persisting once the stored time is this old (it then still has
+# MAX_AGE_DAYS - this left); younger ones stay in memory, so routine runs leave the file alone
+VERIFIED_WRITE_DAYS = MAX_AGE_DAYS / 2
+
+_OPENALEX_ID_RE = re.compile(r"A\d+")
+_ORCID_RE = re.compile(r"(\d{4}-\d{4}-\d{4}-[\dX]{4})")
+
+
+# ------------------------- ID normalization -------------------------
+
+def normalize_openalex_id(value: Any) -> Optional[str]:
+    """Canonical 'A##########' for the forms rosters use (bare id, openalex:A..., site or API URL,
+    any case); None for missing (None, NaN, '', 'nan') or malformed values."""
+    s = str(value if value is not None else "").strip()
+    s = re.sub(r"^openalex:", "", s, flags=re.I)
+    s = re.sub(r"^https?://(api\.)?openalex\.org/(authors/)?", "", s, flags=re.I).rstrip("/").upper()
+    return s if _OPENALEX_ID_RE.fullmatch(s) else None
+
+
+def normalize_orcid(orcid: str) -> str:
+    """Return ORCID in bare 16-digit form with hyphens (e.g., 0000-0002-1825-0097).
+    Accepts full URLs or bare values; returns "" for missing.
+    """
+    val = (str(orcid) if orcid is not None else "").strip()
+    if not val or val.lower() in {"nan", "none"}:
+        return ""
+    # Extract the last 19 chars if a URL was provided
+    m = _ORCID_RE.search(val)
+    if m:
+        return m.group(1)
+    # Insert hyphens if a compact 16-char form
+    digits = re.sub(r"[^0-9X]", "", val)
+    if len(digits) == 16:
+        return f"{digits[0:4]}-{digits[4:8]}-{digits[8:12]}-{digits[12:16]}"
+    return val
+
+
+# ------------------------- Registry -------------------------
+
+class AuthorRegistry:
+    """OpenAlex ID <-> ORCID <-> roster row, with merge redirects and verification times.
+
+    Entries are keyed by normalized OpenAlex ID: {"canonical", "orcid", "name", "row", "verified"}.
+    A merged-away ID keeps its own entry whose canonical points at the surviving ID. save() only
+    writes when an entry differs from the file it was loaded from: a mapping (canonical, orcid,
+    name, row) changed, or a verification time older than VERIFIED_WRITE_DAYS was renewed.
+    """
+
+    def __init__(self, path: Optional[str] = None, entries: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._by_orcid: Dict[str, str] = {}
+        self._by_row: Dict[int, str] = {}
+        for aid, entry in (entries or {}).items():
+            self._put(aid, entry)
+        self._saved = {aid: dict(entry) for aid, entry in self.entries.items()}  # as on disk
+
+    @classmethod
+    def load(cls, path: str) -> "AuthorRegistry":
+        """Registry stored at `path`; empty (and written there on save) if the file is missing or unreadable."""
+        entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as fh:
+                    entries = json.load(fh).get("authors", {})
+            except (OSError, ValueError, AttributeError):
+                logging.warning("Unreadable author registry %s; ids will be resolved again", path)
+        return cls(path, entries)
+
+    def changed(self) -> bool:
+        """True if an entry differs from the saved file in a way worth writing (see the class doc)."""
+        if self.entries.keys() != self._saved.keys():
+            return True
+        cutoff = (datetime.now() - timedelta(days=VERIFIED_WRITE_DAYS)).isoformat(timespec="seconds")
+        for aid, entry in self.entries.items():
+            old = self._saved[aid]
+            if any(entry.get(k) != old.get(k) for k in entry.keys() | old.keys() if k != "verified"):
+                return True
+            if entry.get("verified") != old.get("verified") and (old.get("verified") or "") < cutoff:
+                return True
+        return False
+
+    def save(self, path: Optional[str] = None) -> bool:
+        """Write the registry (to `path`, default where it was loaded from) if it changed, or if
+        `path` is a different file. Returns True if a file was written."""
+        path = path or self.path
+        if not path or (path == self.path and not self.changed()):
+            return False
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"version": 1, "authors": dict(sorted(self.entries.items()))}, fh, indent=1)
+        os.replace(tmp, path)
+        if path == self.path:
+            self._saved = {aid: dict(entry) for aid, entry in self.entries.items()}
+        return True
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, author_id: Any) -> bool:
+        return normalize_openalex_id(author_id) in self.entries
+
+    # -- lookups --------------------------------------------------------------------------------
+
+    def get(self, author_id: Any) -> Optional[Dict[str, Any]]:
+        aid = normalize_openalex_id(author_id)
+        return self.entries.get(aid) if aid else None
+
+    def canonical(self, author_id: Any) -> Optional[str]:
+        """Surviving ID for `author_id` (itself if unknown or never merged); None if not an ID."""
+        aid = normalize_openalex_id(author_id)
+        seen = set()
+        while aid and aid not in seen:
+            seen.add(aid)
+            nxt = (self.entries.get(aid) or {}).get("canonical")
+            if not nxt or nxt == aid:
+                break
+            aid = nxt
+        return aid
+
+    def by_orcid(self, orcid: Any) -> Optional[str]:
+        """Canonical OpenAlex ID last seen with this ORCID."""
+        aid = self._by_orcid.get(normalize_orcid(orcid))
+        return self.canonical(aid) if aid else None
+
+    def at_row(self, row: int) -> Optional[str]:
+        """Canonical OpenAlex ID last seen at this roster row."""
+        aid = self._by_row.get(row)
+        return self.canonical(aid) if aid else None
+
+    def is_fresh(self, author_id: Any, max_age_days: int = MAX_AGE_DAYS, now: Optional[datetime] = None) -> bool:
+        """True if OpenAlex confirmed this ID (and where it redirects) within max_age_days."""
+        verified = (self.get(author_id) or {}).get("verified")
+        if not verified:
+            return False
+        try:
+            age = (now or datetime.now()) - datetime.fromisoformat(verified)
+        except ValueError:
+            return False
+        return age <= timedelta(days=max_age_days)
+
+    def stale(self, author_ids: Iterable[Any], max_age_days: int = MAX_AGE_DAYS) -> List[str]:
+        """The normalized IDs among `author_ids` that need resolving (new, or not verified recently)."""
+        now = datetime.now()
+        out = []
+        for a in author_ids:
+            aid = normalize_openalex_id(a)
+            if aid and not self.is_fresh(aid, max_age_days, now):
+                out.append(aid)
+        return out
+
+    # -- updates --------------------------------------------------------------------------------
+
+    def _put(self, aid: str, entry: Dict[str, Any]) -> None:
+        old = self.entries.get(aid) or {}
+        if old.get("orcid") and self._by_orcid.get(old["orcid"]) == aid:
+            del self._by_orcid[old["orcid"]]
+        if old.get("row") is not None and self._by_row.get(old["row"]) == aid:
+            del self._by_row[old["row"]]
+        self.entries[aid] = entry
+        if entry.get("orcid"):
+            self._by_orcid[entry["orcid"]] = aid
+        if entry.get("row") is not None:
+            self._by_row[int(entry["row"])] = aid
+
+    def _update(self, aid: str, **fields: Any) -> None:
+        old = self.entries.get(aid) or {"canonical": aid, "orcid": "", "name": "", "row": None, "verified": ""}
+        new = {**old, **{k: v for k, v in fields.items() if v is not None and v != ""}}
+        if new != old:
+            self._put(aid, new)
+
+    def observe(self, requested: Any, author_json: Dict[str, Any], *, row: Optional[int] = None,
+                name: Optional[str] = None) -> Optional[str]:
+        """Record an OpenAlex author record fetched for `requested` (an ID, or None when it was looked
+        up by ORCID). A different ID in the answer means `requested` was merged into it. Returns the
+        canonical ID, or None if the record has no usable ID."""
+        aid = normalize_openalex_id(author_json.get("id"))
+        if not aid:
+            return None
+        now = datetime.now().isoformat(timespec="seconds")
+        orcid = normalize_orcid(author_json.get("orcid") or "")
+        req = normalize_openalex_id(requested)
+        if req and req != aid:
+            logging.info("OpenAlex author %s was merged into %s", req, aid)
+            self._update(req, canonical=aid, verified=now)
+        # the roster row (if any) now indexes the surviving ID
+        self._update(aid, canonical=aid, orcid=orcid, name=name or author_json.get("display_name") or "",
+                     row=row, verified=now)
+        return aid
+
+    def confirm(self, author_ids: Iterable[Any]) -> None:
+        """Mark IDs OpenAlex just listed as current (e.g. found by a batched filter lookup)."""
+        now = datetime.now().isoformat(timespec="seconds")
+        for a in author_ids:
+            aid = normalize_openalex_id(a)
+            if aid:
+                self._update(aid, canonical=aid, verified=now)
+
+    def place(self, author_id: Any, row: int, name: Optional[str] = None) -> None:
+        """Remember the roster row (and name) an ID was seen at; does not count as verification."""
+        aid = self.canonical(author_id)
+        if aid:
+            # keep the OpenAlex display name if there is one
+            self._update(aid, row=row, name=None if (self.entries.get(aid) or {}).get("name") else name)
+
+    def merge(self, other: "AuthorRegistry") -> None:
+        """Fold in another registry's entries (e.g. a shard's); the more recently verified entry wins."""
+        for aid, entry in other.entries.items():
+            mine = self.entries.get(aid)
+            if mine is None or (entry.get("verified") or "") > (mine.get("verified") or ""):
+                self._put(aid, dict(entry))
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+pipeline.py — both ETL scripts as one DAG of stages in one process
+
+    python etl/pipeline.py \
+        --input data/full_time_faculty.csv \
+        --output data/openalex_all_authors_last5y_key_fields_dedup.csv \
+        --email you@ucalgary.ca --log-diffs
+
+Stages (paths relative to the output directory, i.e. the directory of --output):
+
+    metrics       --input                                  -> roster_with_metrics.csv (+ metrics history)
+    harvest       roster_with_metrics.csv                  -> compiled lifetime + last-5y CSVs
+    dedup         compiled last-5y + lifetime CSVs         -> --output
+    per_author    --output, roster_with_metrics.csv        -> ..._dedup_per_author.csv
+    search_index  --output, roster_with_metrics.csv        -> openalex_search_index.json
+    term_tables   --output, ..._dedup_per_author.csv       -> openalex_wordcloud_terms.json
+    partitions    --output, ..._dedup_per_author.csv       -> partitions/manifest.json
+    corpus_store  --output, roster_with_metrics.csv        -> openalex_corpus.sqlite (see corpus.py)
+    static_assets the dashboard files above                -> static/manifest.json + hashed, precompressed
+                                                              copies (see assets.py; with --static-assets,
+                                                              or once static/ exists)
+
+metrics and harvest read OpenAlex, so they run every time (the harvest itself skips unchanged
+authors through its fingerprints). Every other stage is skipped when the sha256 of each of its
+inputs matches the last successful run (cache/pipeline_state.json) and its outputs exist; --force
+runs everything. Stages whose dependencies are done run concurrently on a thread pool (--workers);
+they share the works script's ArtifactPublisher, which serializes its writes. The harvest takes the
+works script's options (--no-cache, --cache-max-age-days, --no-id-check, --dead-letter-retries, ...).
+
+Before any stage runs, the OpenAlex requests of the run are estimated per stage and strategy
+(planner.py) and written to cache/run_plan.json; a plan over --daily-budget is logged as a warning.
+--plan prints that estimate and exits without making a request.
+
+--refresh-citations runs none of the stages: it refreshes cited_by_count, fwci and OA status of the
+works in --output in batched lookups and patches them into every file that carries them (see
+UC_BioSci_works.refresh_citations), as the works script's flag of the same name does.
+
+What a single process shares, compared with running the two scripts back to back: the metrics
+roster is handed to the harvest as a DataFrame (no re-read), the author registry (identity.py) is
+loaded once, HTTP sessions stay open, and pandas/requests are imported once.
+
+Exit codes: 1 if a required stage (metrics, harvest, dedup) failed or no author has last-5y
+output; a failed dashboard stage is logged and its dependents skipped, as in the scripts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:  # imported as part of the etl package
+    from . import UC_BioSci_works as works
+    from . import fetch_author_metrics as metrics
+    from . import planner
+    from .identity import AuthorRegistry
+except ImportError:  # run as a script: python etl/pipeline.py
+    import UC_BioSci_works as works
+    import fetch_author_metrics as metrics
+    import planner
+    from identity import AuthorRegistry
+
+STATE_NAME = "pipeline_state.json"
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[], Any]
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    after: Tuple[str, ...] = ()
+    volatile: bool = False   # reads OpenAlex: never skipped
+    required: bool = True    # a failure fails the run (otherwise only its dependents are skipped)
+
+
+def file_digest(path: str) -> Optional[str]:
+    """sha256 of the file at `path` (None if missing), read in 1 MiB blocks."""
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Pipeline:
+    """Run stages in dependency order, independent ones concurrently, skipping stages whose inputs
+    are unchanged since their last successful run. run() returns {stage: status}, status being
+    "ran", "skipped", "failed" or "blocked" (a dependency failed); stage return values are kept in
+    `results`."""
+
+    def __init__(self, stages: List[Stage], state_path: str, workers: int = 4, force: bool = False) -> None:
+        self.stages = {s.name: s for s in stages}
+        for s in stages:
+            unknown = [d for d in s.after if d not in self.stages]
+            if unknown:
+                raise ValueError(f"stage {s.name!r} depends on unknown stage(s) {unknown}")
+        self.state_path = state_path
+        self.workers = max(1, workers)
+        self.force = force
+        self.results: Dict[str, Any] = {}
+        self.seconds: Dict[str, float] = {}
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, encoding="utf-8") as fh:
+                return json.load(fh).get("stages", {})
+        except (OSError, ValueError, AttributeError):
+            logging.warning(f"Unreadable pipeline state {self.state_path}; every stage will run")
+            return {}
+
+    def _save_state(self) -> None:
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"version": 1, "stages": dict(sorted(self.state.items()))}, fh, indent=1)
+        os.replace(tmp, self.state_path)
+
+    def up_to_date(self, stage: Stage, digests: Dict[str, Optional[str]]) -> bool:
+        prev = self.state.get(stage.name)
+        return (not self.force and not stage.volatile and prev is not None and prev.get("inputs") == digests
+                and all(os.path.exists(p) for p in stage.outputs))
+
+    def run(self) -> Dict[str, str]:
+        status: Dict[str, str] = {}
+        pending = dict(self.stages)
+        running: Dict[Any, Tuple[Stage, Dict[str, Optional[str]], float]] = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stage") as pool:
+            while pending or running:
+                progressed = False
+                for name, stage in list(pending.items()):
+                    deps = [status.get(d) for d in stage.after]
+                    if any(d in ("failed", "blocked") for d in deps):
+                        logging.warning(f"[stage] {name}: not run, a dependency failed")
+                        status[name] = "blocked"
+                    elif all(d in ("ran", "skipped") for d in deps):
+                        # inputs are final once every dependency is done
+                        digests = {p: file_digest(p) for p in stage.inputs}
+                        if self.up_to_date(stage, digests):
+                            logging.info(f"[stage] {name}: inputs unchanged since {self.state[name].get('finished')}, skipped")
+                            status[name] = "skipped"
+                        else:
+                            logging.info(f"[stage] {name}: running")
+                            running[pool.submit(stage.run)] = (stage, digests, time.perf_counter())
+                    else:
+                        continue
+                    del pending[name]
+                    progressed = True
+                if not running:
+                    if pending and not progressed:
+                        raise ValueError(f"dependency cycle among stages {sorted(pending)}")
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    stage, digests, t0 = running.pop(fut)
+                    self.seconds[stage.name] = round(time.perf_counter() - t0, 1)
+                    try:
+                        self.results[stage.name] = fut.result()
+                    except Exception:
+                        logging.exception(f"[stage] {stage.name}: failed after {self.seconds[stage.name]}s")
+                        status[stage.name] = "failed"
+                        self.state.pop(stage.name, None)
+                    else:
+                        logging.info(f"[stage] {stage.name}: done in {self.seconds[stage.name]}s")
+                        status[stage.name] = "ran"
+                        self.state[stage.name] = {"inputs": digests, "finished": datetime.now().isoformat(timespec="seconds")}
+        self._save_state()
+        return status
+
+
+def build_stages(args: argparse.Namespace, ctx: Dict[str, Any]) -> List[Stage]:
+    """The ETL's stages, wired to the paths under the configured output directory. `ctx` carries
+    what stages hand each other in memory (roster DataFrame, registry, per-author frame)."""
+    out_dir = works.OUTPUT_DIR
+    roster_out = args.metrics_output or os.path.join(out_dir, "roster_with_metrics.csv")
+    lifetime = os.path.join(out_dir, works.LIFETIME_NAME)
+    last5 = os.path.join(out_dir, works.LAST5_NAME)
+    dedup_out = args.output
+    per_author = os.path.join(out_dir, works.PER_AUTHOR_NAME)
+
+    def run_metrics() -> None:
+        if args.no_metrics:
+            ctx["roster"] = works.pd.read_csv(args.input)
+            return
+        email = args.email or os.environ.get("OPENALEX_MAILTO") or os.environ.get("CONTACT_EMAIL")
+        ctx["roster"] = metrics.fetch_metrics(
+            metrics.read_input(args.input), roster_out, delay=args.delay, email=email,
+            history=os.path.join(out_dir, "metrics_history.csv"),
+            trajectories=os.path.join(out_dir, "metrics_trajectories.json"),
+            log_diffs=args.log_diffs, registry=ctx["registry"], session=metrics.build_session(email))
+
+    def run_harvest() -> Dict[str, Any]:
+        return works.harvest_roster(ctx["roster"], lifetime, last5, fetch_workers=args.fetch_workers,
+                                    transform_workers=args.transform_workers, queue_size=args.queue_size,
+                                    use_cache=not args.no_cache, cache_max_age_days=args.cache_max_age_days,
+                                    check_ids=not args.no_id_check, dead_letter_retries=args.dead_letter_retries,
+                                    dead_letter_backoff=args.dead_letter_backoff,
+                                    registry=ctx["registry"], split_min_works=args.split_min_works,
+                                    budget_requests=args.budget_requests, budget_minutes=args.budget_minutes)
+
+    def run_dedup() -> bool:
+        return works.dedup_stage(last5, dedup_out, ctx["engine"], memory_mb=args.dedup_memory_mb,
+                                 workers=args.dedup_workers)
+
+    def dedup_exists() -> bool:
+        if not os.path.exists(dedup_out):
+            logging.warning(f"Expected dedup file not found at {dedup_out}; nothing to build from it.")
+            return False
+        return True
+
+    def run_per_author() -> None:
+        if dedup_exists():
+            ctx["per_author"] = works.per_author_stage(dedup_out, ctx_roster(), ctx["engine"])
+
+    def run_search_index() -> None:
+        if dedup_exists():
+            works.write_search_index(dedup_out, ctx_roster(), os.path.join(out_dir, works.SEARCH_INDEX_NAME))
+
+    def per_author_frame() -> Any:
+        if "per_author" not in ctx and os.path.exists(per_author):
+            ctx["per_author"] = works.pd.read_csv(per_author)  # per_author was skipped this run
+        return ctx.get("per_author")
+
+    def run_term_tables() -> None:
+        if dedup_exists():
+            works.write_term_tables(dedup_out, per_author_frame(), os.path.join(out_dir, works.TERM_TABLES_NAME))
+
+    def run_partitions() -> None:
+        if dedup_exists():
+            works.write_partitions(dedup_out, per_author if os.path.exists(per_author) else None,
+                                   os.path.join(out_dir, works.PARTITIONS_DIR))
+
+    def run_corpus_store() -> None:
+        if dedup_exists():
+            works.write_corpus_store(dedup_out, ctx_roster(), os.path.join(out_dir, works.CORPUS_NAME))
+
+    def run_static_assets() -> None:
+        works.write_static_assets(force=True)
+
+    def ctx_roster() -> Any:
+        return ctx["roster"]
+
+    source = args.input if args.no_metrics else roster_out
+    dashboard_files = [source, dedup_out, last5, per_author, os.path.join(out_dir, works.SEARCH_INDEX_NAME),
+                       os.path.join(out_dir, works.TERM_TABLES_NAME),
+                       os.path.join(out_dir, works.PARTITIONS_DIR, works.PARTITION_MANIFEST_NAME)]
+    static_manifest = works.asset_manifest_path(out_dir)
+    stages = [
+        Stage("metrics", run_metrics, [args.input], [] if args.no_metrics else [roster_out], volatile=True),
+        Stage("harvest", run_harvest, [source], [lifetime, last5], ("metrics",), volatile=True),
+        Stage("dedup", run_dedup, [last5, lifetime], [dedup_out], ("harvest",)),
+        Stage("per_author", run_per_author, [dedup_out, source], [per_author], ("dedup",), required=False),
+        Stage("search_index", run_search_index, [dedup_out, source],
+              [os.path.join(out_dir, works.SEARCH_INDEX_NAME)], ("dedup",), required=False),
+        Stage("term_tables", run_term_tables, [dedup_out, per_author],
+              [os.path.join(out_dir, works.TERM_TABLES_NAME)], ("per_author",), required=False),
+        Stage("partitions", run_partitions, [dedup_out, per_author],
+              [os.path.join(out_dir, works.PARTITIONS_DIR, works.PARTITION_MANIFEST_NAME)], ("per_author",),
+              required=False),
+        Stage("corpus_store", run_corpus_store, [dedup_out, source], [os.path.join(out_dir, works.CORPUS_NAME)],
+              ("dedup",), required=False),
+    ]
+    if args.static_assets or os.path.exists(static_manifest):
+        stages.append(Stage("static_assets", run_static_assets, dashboard_files, [static_manifest],
+                            ("per_author", "search_index", "term_tables", "partitions"), required=False))
+    return stages
+
+
+def plan_run(args: argparse.Namespace, registry: AuthorRegistry) -> Dict[str, Any]:
+    """The request plan of this run (planner.build_plan), from the input roster and, for the harvest,
+    the last metrics output's works_count values when there is one."""
+    roster_out = args.metrics_output or os.path.join(works.OUTPUT_DIR, "roster_with_metrics.csv")
+    source = roster_out if not args.no_metrics and os.path.exists(roster_out) else args.input
+    input_roster = works.pd.read_csv(args.input) if args.no_metrics else metrics.read_input(args.input)
+    harvest_roster = input_roster if source == args.input else works.pd.read_csv(source)
+    return planner.build_plan(input_roster, harvest_roster, registry, dedup_path=args.output,
+                              run_metrics=not args.no_metrics, daily_budget=args.daily_budget,
+                              budget_requests=args.budget_requests, split_min_works=args.split_min_works,
+                              use_cache=not args.no_cache, cache_max_age_days=args.cache_max_age_days,
+                              check_ids=not args.no_id_check, delay=args.delay, fetch_workers=args.fetch_workers)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run the metrics + works ETL as one DAG in one process.")
+    parser.add_argument("--input", "-i", required=True, help="Roster CSV/TSV/Excel (the metrics stage's input)")
+    parser.add_argument("--output", "-o", required=True,
+                        help="Dedup CSV path; its directory is the output directory, as for UC_BioSci_works.py")
+    parser.add_argument("--metrics-output", default=None,
+                        help="Roster with metrics (default: <output dir>/roster_with_metrics.csv)")
+    parser.add_argument("--no-metrics", action="store_true",
+                        help="--input already has the metrics columns; harvest it without the metrics stage")
+    parser.add_argument("--email", default=None, help="Contact email for the metrics requests' User-Agent/mailto")
+    parser.add_argument("--delay", type=float, default=0.25, help="Delay (s) between metrics API calls")
+    parser.add_argument("--log-diffs", action="store_true", help="Log per-author metric deltas vs the previous run")
+    parser.add_argument("--force", action="store_true", help="Run every stage, even if its inputs are unchanged")
+    parser.add_argument("--workers", type=int, default=4, help="Stages run concurrently (default 4)")
+    parser.add_argument("--fetch-workers", type=int, default=4, help="Harvest download threads (default 4)")
+    parser.add_argument("--transform-workers", type=int, default=0,
+                        help="Harvest transform processes (default 0: transform in-process)")
+    parser.add_argument("--queue-size", type=int, default=8, help="Harvest authors in flight (default 8)")
+    parser.add_argument("--split-min-works", type=int, default=works.SPLIT_MIN_WORKS,
+                        help="Fetch authors with at least this many works as concurrent year ranges (0 = never)")
+    parser.add_argument("--budget-requests", type=int, default=int(os.getenv("OPENALEX_BUDGET_REQUESTS", "0")),
+                        help="Harvest only the stalest cached authors that fit this many /works requests; authors "
+                             "without a cache are fetched on top of it (0 = all due)")
+    parser.add_argument("--budget-minutes", type=float, default=float(os.getenv("OPENALEX_BUDGET_MINUTES", "0")),
+                        help="Stop starting harvest downloads of cached authors after this many minutes (0 = no limit)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Harvest every author even if its fingerprint is unchanged (the cache is still refreshed)")
+    parser.add_argument("--cache-max-age-days", type=int, default=int(os.getenv("OPENALEX_CACHE_MAX_AGE_DAYS", "30")),
+                        help="Refetch cached authors after this many days regardless of fingerprint (default 30)")
+    parser.add_argument("--no-id-check", action="store_true",
+                        help="Skip the harvest's batched OpenAlex existence check of roster ids")
+    parser.add_argument("--dead-letter-retries", type=int, default=2,
+                        help="Retry rounds for harvest downloads that failed or stopped early (default 2)")
+    parser.add_argument("--dead-letter-backoff", type=float, default=30.0,
+                        help="Seconds from a failed download to its first retry, doubling per round (default 30)")
+    parser.add_argument("--refresh-citations", action="store_true",
+                        help="Instead of the stages, refresh the citation fields of the works in --output "
+                             f"({works.REFRESH_BATCH} ids per request) and patch them in place")
+    parser.add_argument("--static-assets", action="store_true",
+                        help="Write content-hashed, precompressed copies of the dashboard files (assets.py)")
+    parser.add_argument("--daily-budget", type=int, default=planner.DAILY_BUDGET,
+                        help="OpenAlex requests allowed per day, for the run plan (default 100000)")
+    parser.add_argument("--plan", action="store_true",
+                        help="Dry run: estimate the run's requests per stage and strategy, write the plan, exit")
+    parser.add_argument("--engine", choices=works.ENGINES, default="pandas", help="Dedup/per-author engine")
+    parser.add_argument("--dedup-memory-mb", type=int, default=0, help="Out-of-core dedup threshold (0 = off)")
+    parser.add_argument("--dedup-workers", type=int, default=1, help="Out-of-core dedup partition workers")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    parser.add_argument("--keep-logs", type=int, default=0,
+                        help="Delete all but the newest N run logs, including committed ones (default 0: keep all)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    works.configure(os.path.dirname(args.output))
+    os.makedirs(works.OUTPUT_DIR, exist_ok=True)
+    log_dir = os.path.join(works.OUTPUT_DIR, "logs")
+    started = datetime.now()
+    counter = works.setup_logging(log_dir, started.strftime('%Y%m%d_%H%M%S'), level=args.log_level,
+                                  keep=max(0, args.keep_logs))
+    summary: Dict[str, Any] = {"started": started.isoformat(timespec="seconds"), "command": "pipeline"}
+
+    try:
+        engine = works.get_engine(args.engine)
+    except RuntimeError as e:
+        logging.error(str(e))
+        sys.exit(2)
+    ctx: Dict[str, Any] = {"engine": engine, "registry": AuthorRegistry.load(works.registry_path())}
+
+    if args.refresh_citations:
+        if not os.path.exists(args.output):
+            logging.error(f"No dedup output at {args.output} to refresh; run the pipeline first.")
+            sys.exit(1)
+        roster_out = args.metrics_output or os.path.join(works.OUTPUT_DIR, "roster_with_metrics.csv")
+        source = roster_out if not args.no_metrics and os.path.exists(roster_out) else args.input
+        counts = works.refresh_citations(args.output, os.path.join(works.OUTPUT_DIR, works.PER_AUTHOR_NAME),
+                                         works.pd.read_csv(source), workers=args.fetch_workers)
+        works.PUBLISHER.save()
+        summary.update(command="pipeline refresh-citations", **counts,
+                       artifacts_changed=len(works.PUBLISHER.changed),
+                       duration_s=round((datetime.now() - started).total_seconds(), 1))
+        works.write_run_summary(log_dir, summary, counter)
+        return
+
+    plan_path = os.path.join(works.OUTPUT_DIR, works.CACHE_DIR_NAME, planner.RUN_PLAN_NAME)
+    try:
+        plan = plan_run(args, ctx["registry"])
+    except Exception as e:  # the plan is advisory; a roster the stages reject fails there
+        if args.plan:
+            logging.error(f"[plan] Could not estimate the run: {e}")
+            sys.exit(2)
+        logging.warning(f"[plan] Could not estimate the run: {e}")
+    else:
+        planner.write_run_plan(plan, plan_path)
+        if args.plan:
+            print(planner.format_plan(plan))
+            return
+        c = plan["configured"]
+        logging.info(f"[plan] ~{c['requests']} OpenAlex requests ({c['strategy']}), ~{c['minutes']} min; "
+                     f"recommended: {plan['recommended']['strategy']}")
+        if not c["within_budget"]:
+            logging.warning(f"[plan] Estimated {c['requests']} requests exceed the daily budget of "
+                            f"{args.daily_budget}; see {plan_path}")
+    pipeline = Pipeline(build_stages(args, ctx), os.path.join(works.OUTPUT_DIR, works.CACHE_DIR_NAME, STATE_NAME),
+                        workers=args.workers, force=args.force)
+    status = pipeline.run()
+    works.PUBLISHER.save()
+
+    counts = pipeline.results.get("harvest") or {}
+    summary.update(**counts)
+    for st in ("ran", "skipped", "failed", "blocked"):
+        summary[f"stages_{st}"] = ",".join(n for n, s in status.items() if s == st) or "-"
+    summary["artifacts_changed"] = len(works.PUBLISHER.changed)
+    summary["duration_s"] = round((datetime.now() - started).total_seconds(), 1)
+    works.write_run_summary(log_dir, summary, counter)
+
+    failed = [n for n, s in status.items() if s in ("failed", "blocked") and pipeline.stages[n].required]
+    if failed:
+        logging.error(f"Required stage(s) did not complete: {', '.join(failed)}")
+        sys.exit(1)
+    if counts and counts.get("processed", 0) == 0:
+        logging.error("No authors processed with last-5y output — failing run so CI flags it.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+planner.py — OpenAlex request-cost plan for a pipeline run (dry run: python etl/pipeline.py --plan ...)
+
+Estimates, before any request is made, how many API calls each stage of the next run will make:
+
+    metrics     one /authors lookup per roster row with an id, plus one per row whose missing OpenAlex
+                id or ORCID the author registry cannot fill (fetch_author_metrics.py)
+    validation  batched /authors?filter=openalex:... checks of the ids the registry has not verified
+                recently, as of the plan (VALIDATION_BATCH per request; merged-away ids cost one more
+                each, not counted). Metrics lookups verify ids first, so this is an upper bound
+    harvest     /works pages per author: ceil(works_count / PER_PAGE), plus the year probe for authors
+                fetched in year ranges (fetch_cost), using the works_count of the last metrics run
+
+and what the harvest would cost under each strategy:
+
+    full            every author downloaded (--no-cache)
+    incremental     authors whose fingerprint changed or whose cache expired (the default run)
+    scheduled       the stalest authors that fit --budget-requests (schedule_refresh)
+    citations-only  --refresh-citations: REFRESH_BATCH works per request, no metrics or validation
+
+The totals are compared with the daily request budget (--daily-budget, OPENALEX_DAILY_BUDGET; the
+polite pool allows 100,000 a day) and the cheapest strategy that still refreshes every due author is
+recommended; if none fits, a --budget-requests that does. Authors whose works_count changes in this
+run's metrics stage are not known yet, so the incremental estimate is a lower bound.
+
+The plan is written to <output dir>/cache/run_plan.json (not committed) before every pipeline run.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:  # imported as part of the etl package
+    from . import UC_BioSci_works as works
+    from . import fetch_author_metrics as metrics
+    from .identity import AuthorRegistry, normalize_orcid
+except ImportError:  # run as a script: python etl/pipeline.py
+    import UC_BioSci_works as works
+    import fetch_author_metrics as metrics
+    from identity import AuthorRegistry, normalize_orcid
+
+RUN_PLAN_NAME = "run_plan.json"
+DAILY_BUDGET = int(os.getenv("OPENALEX_DAILY_BUDGET", "100000"))
+SECONDS_PER_REQUEST = float(os.getenv("OPENALEX_SECONDS_PER_REQUEST", "0.5"))  # round trip, for the time estimate
+
+
+def _ceil_div(a: int, b: int) -> int:
+    return -(-a // max(1, b))
+
+
+def estimate_metrics(roster: "works.pd.DataFrame", registry: AuthorRegistry) -> Dict[str, Any]:
+    """Requests fetch_metrics will make for `roster` (the raw input roster)."""
+    openalex_col = metrics.find_openalex_col(roster.columns)
+    orcid_col = metrics.find_orcid_col(roster.columns)
+    lookups = resolves = 0
+    for _, row in roster.iterrows():
+        aid = metrics.normalize_author_id(str(row.get(openalex_col) or "")) if openalex_col else ""
+        orcid = normalize_orcid(str(row.get(orcid_col) or "")) if orcid_col else ""
+        if aid and not orcid:
+            known = registry.get(registry.canonical(aid))
+            resolves += not (known and known.get("orcid") and registry.is_fresh(known["canonical"]))
+        elif orcid and not aid:
+            known_id = registry.by_orcid(orcid)
+            resolves += not (known_id and registry.is_fresh(known_id))
+        lookups += bool(aid or orcid)
+    return {"rows": len(roster), "requests": lookups + resolves, "lookups": lookups, "id_resolutions": resolves}
+
+
+def estimate_harvest(roster: "works.pd.DataFrame", registry: AuthorRegistry, *, use_cache: bool = True,
+                     cache_max_age_days: int = 30, split_min_works: int = works.SPLIT_MIN_WORKS,
+                     budget_requests: int = 0, check_ids: bool = True) -> Dict[str, Any]:
+    """Validation and /works requests of a harvest of `roster` (with the metrics columns), per strategy.
+    Validation counts the ids the registry has not verified recently (registry.stale), as of now: a
+    metrics lookup that succeeds in this run verifies its id first, so it is an upper bound."""
+    fp_prev = works.load_fingerprints(works.fingerprints_path())
+    seen: set = set()
+    authors: List[Dict[str, Any]] = []
+    for _, row in roster.iterrows():
+        name, raw = works.get_row_identifiers(row)
+        aid = registry.canonical(raw)
+        if aid is None or aid in seen:
+            continue
+        seen.add(aid)
+        wc = works.roster_works_count(row)
+        fp_now = works.roster_fingerprint(row)
+        cached = aid in fp_prev and fp_now is not None and os.path.exists(works.works_cache_path(aid))
+        due = not (use_cache and cached and works.cache_is_fresh(fp_prev.get(aid), fp_now, cache_max_age_days))
+        score = works.staleness_score(fp_prev.get(aid), fp_now, cache_max_age_days) if cached else float("inf")
+        authors.append({"id": aid, "name": name, "works_count": wc, "due": due, "score": score,
+                        "cost": works.fetch_cost(wc, split_min_works)})
+
+    unchecked = registry.stale(a["id"] for a in authors)
+    validation = _ceil_div(len(unchecked), works.VALIDATION_BATCH) if check_ids else 0
+    strategies = {
+        "full": sum(a["cost"] for a in authors),
+        "incremental": sum(a["cost"] for a in authors if a["due"]),
+    }
+    over_budget = 0
+    if budget_requests > 0 and use_cache:
+        _, strategies["scheduled"] = works.schedule_refresh([(a["id"], a["score"], a["cost"]) for a in authors],
+                                                            budget_requests)
+        # authors without a usable cache are fetched whatever the budget (they have nothing to reuse)
+        over_budget = max(0, strategies["scheduled"] - budget_requests)
+    heaviest = sorted(authors, key=lambda a: -a["cost"])[:5]
+    return {
+        "authors": len(authors),
+        "due": sum(a["due"] for a in authors),
+        "unknown_works_count": sum(a["works_count"] is None for a in authors),
+        "split_authors": sum(split_min_works > 0 and (a["works_count"] or 0) >= split_min_works for a in authors),
+        "validation_requests": validation,
+        "unverified": len(unchecked),
+        "uncached": sum(a["score"] == float("inf") for a in authors),
+        "over_budget_requests": over_budget,
+        "strategies": strategies,
+        "heaviest": [{"id": a["id"], "name": a["name"], "works_count": a["works_count"], "requests": a["cost"]}
+                     for a in heaviest],
+    }
+
+
+def estimate_citation_refresh(dedup_path: str) -> Optional[int]:
+    """Requests of --refresh-citations on the current dedup output (None if there is none)."""
+    if not os.path.exists(dedup_path):
+        return None
+    ids = works.pd.read_csv(dedup_path, dtype=str, keep_default_na=False, usecols=["id"])["id"]
+    return _ceil_div(ids.map(works._work_key).nunique(), works.REFRESH_BATCH)
+
+
+def build_plan(input_roster: "works.pd.DataFrame", harvest_roster: "works.pd.DataFrame", registry: AuthorRegistry, *,
+               dedup_path: str, run_metrics: bool = True, daily_budget: int = DAILY_BUDGET,
+               budget_requests: int = 0, split_min_works: int = works.SPLIT_MIN_WORKS, use_cache: bool = True,
+               cache_max_age_days: int = 30, check_ids: bool = True, delay: float = 0.25,
+               fetch_workers: int = 4) -> Dict[str, Any]:
+    """Per-stage request estimate of a pipeline run, per-strategy totals against `daily_budget`, and the
+    recommended strategy. `harvest_roster` should carry the last run's metrics (Works_count)."""
+    m = estimate_metrics(input_roster, registry) if run_metrics else {"rows": len(input_roster), "requests": 0}
+    h = estimate_harvest(harvest_roster, registry, use_cache=use_cache, cache_max_age_days=cache_max_age_days,
+                         split_min_works=split_min_works, budget_requests=budget_requests, check_ids=check_ids)
+    fixed = m["requests"] + h["validation_requests"]
+    totals = {name: fixed + n for name, n in h["strategies"].items()}
+    citations = estimate_citation_refresh(dedup_path)
+    if citations is not None:
+        totals["citations-only"] = citations
+
+    configured = "scheduled" if "scheduled" in totals else "incremental"
+    room = daily_budget - fixed
+    if totals["incremental"] <= daily_budget:
+        recommended = {"strategy": "incremental", "requests": totals["incremental"]}
+    elif room > 0:
+        recommended = {"strategy": "scheduled", "requests": daily_budget, "budget_requests": room}
+    elif citations is not None and citations <= daily_budget:
+        recommended = {"strategy": "citations-only", "requests": citations}
+    else:
+        recommended = {"strategy": "none", "requests": fixed}
+
+    def minutes(harvest_requests: int) -> float:
+        # metrics are sequential with --delay; harvest pages spread over the fetch threads
+        s = m["requests"] * (SECONDS_PER_REQUEST + delay) + \
+            (h["validation_requests"] + harvest_requests) * SECONDS_PER_REQUEST / max(1, fetch_workers)
+        return round(s / 60, 1)
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "settings": {"per_page": works.PER_PAGE, "select_fields": len(works.WORKS_SELECT.split(",")),
+                     "validation_batch": works.VALIDATION_BATCH, "refresh_batch": works.REFRESH_BATCH,
+                     "split_min_works": split_min_works, "budget_requests": budget_requests,
+                     "cache_max_age_days": cache_max_age_days, "use_cache": use_cache, "check_ids": check_ids,
+                     "daily_budget": daily_budget},
+        "stages": {"metrics": m, "harvest": h},
+        "totals": totals,
+        "configured": {"strategy": configured, "requests": totals[configured],
+                       "minutes": minutes(h["strategies"][configured]),
+                       "within_budget": totals[configured] <= daily_budget},
+        "recommended": recommended,
+    }
+
+
+def format_plan(plan: Dict[str, Any]) -> str:
+    m, h = plan["stages"]["metrics"], plan["stages"]["harvest"]
+    s = plan["settings"]
+    lines = [
+        f"Request plan (per-page {s['per_page']}, daily budget {s['daily_budget']}):",
+        f"  metrics      {m['requests']:>7}  ({m['rows']} roster rows)",
+        f"  validation   {h['validation_requests']:>7}  ({h['unverified']}/{h['authors']} ids unverified, batches of {s['validation_batch']})",
+    ]
+    for name, n in h["strategies"].items():
+        lines.append(f"  harvest/{name:<12}{n:>5}  -> total {plan['totals'][name]}")
+    if "citations-only" in plan["totals"]:
+        lines.append(f"  citations-only {plan['totals']['citations-only']:>5}  (batches of {s['refresh_batch']})")
+    lines.append(f"  {h['due']}/{h['authors']} authors due, {h['split_authors']} fetched in year ranges, "
+                 f"{h['unknown_works_count']} without a known works_count (counted as one page)")
+    if h.get("over_budget_requests"):
+        lines.append(f"  scheduled harvest exceeds --budget-requests {s['budget_requests']} by "
+                     f"{h['over_budget_requests']}: {h['uncached']} authors without a usable cache are always fetched")
+    c, r = plan["configured"], plan["recommended"]
+    lines.append(f"  this run ({c['strategy']}): ~{c['requests']} requests, ~{c['minutes']} min, "
+                 f"{'within' if c['within_budget'] else 'OVER'} the daily budget")
+    rec = f"  recommended: {r['strategy']} (~{r['requests']} requests)"
+    if r.get("budget_requests"):
+        rec += f" with --budget-requests {r['budget_requests']}"
+    lines.append(rec)
+    return "\n".join(lines)
+
+
+def write_run_plan(plan: Dict[str, Any], path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(plan, fh, indent=1, default=str)
+    os.replace(tmp, path)
+    logging.info(f"[plan] Wrote {path}")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+publish.py — content-hash publishing of ETL output artifacts (shared by both ETL scripts)
+
+Every artifact is rendered first (in memory, or into <path>.tmp for streamed files), hashed over
+its canonical content, and only then compared with what is already on disk:
+
+- unchanged -> the published file is left alone (no write, no mtime change, nothing for
+  `git add -A` to pick up, browser caches stay valid);
+- changed/new -> written to <path>.tmp and atomically os.replace'd onto <path>.
+
+Canonical content: JSON artifacts hash their parsed value re-serialized with sorted keys; every
+other artifact hashes its bytes with line endings normalized to "\n" and trailing newlines
+stripped. publish_manifest.json (in the publisher's root) records, per artifact path relative to
+that root: sha256 of the canonical content, size in bytes and the date it last changed. The
+manifest itself is only rewritten when some artifact changed. One publisher may be shared by
+threads (pipeline stages run concurrently): publishing, removal and save() are serialized by a lock.
+
+    pub = ArtifactPublisher("data")
+    pub.publish_csv(df, "data/out.csv")
+    pub.publish_json(obj, "data/out.json", separators=(",", ":"))
+    pub.save()
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+MANIFEST_NAME = "publish_manifest.json"
+
+
+def canonical_digest(path: str, data: bytes) -> str:
+    """sha256 of the canonical form of `data`, which is (or will be) the content of `path`."""
+    if path.endswith(".json"):
+        try:
+            obj = json.loads(data)
+            data = json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        except ValueError:
+            pass  # not valid JSON: fall through to the text rules
+    data = data.replace(b"\r\n", b"\n").rstrip(b"\n")
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_digest(path: str) -> Optional[str]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as fh:
+        return canonical_digest(path, fh.read())
+
+
+class ArtifactPublisher:
+    """Replace output files only when their canonical content changed; keep a hash manifest."""
+
+    def __init__(self, root: str, manifest_name: str = MANIFEST_NAME) -> None:
+        self.root = root
+        self.manifest_path = os.path.join(root, manifest_name)
+        self.changed: List[str] = []
+        self.unchanged: List[str] = []
+        self.removed: List[str] = []
+        self._entries: Dict[str, Optional[Dict[str, Any]]] = {}  # this run's updates (None = removed)
+        self._on_disk: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()  # guards the files, the lists and the manifest state
+
+    def _key(self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def _record(self, path: str, digest: str, size: int, changed: bool) -> None:
+        key = self._key(path)
+        (self.changed if changed else self.unchanged).append(key)
+        # Unchanged files only need an entry if the manifest doesn't know them yet (first run)
+        if changed or (self._load_manifest().get(key) or {}).get("sha256") != digest:
+            self._entries[key] = {"sha256": digest, "bytes": size, "updated": datetime.now().strftime("%Y-%m-%d")}
+
+    # -- publishing --------------------------------------------------------------------------------
+
+    def publish_bytes(self, path: str, data: bytes) -> bool:
+        """Publish `data` at `path`; returns True if the file was (re)written."""
+        digest = canonical_digest(path, data)
+        with self._lock:
+            return self._publish_bytes(path, data, digest)
+
+    def _publish_bytes(self, path: str, data: bytes, digest: str) -> bool:
+        if digest == _file_digest(path):
+            self._record(path, digest, len(data), changed=False)
+            return False
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+        self._record(path, digest, len(data), changed=True)
+        return True
+
+    def publish_text(self, path: str, text: str) -> bool:
+        return self.publish_bytes(path, text.encode("utf-8"))
+
+    def publish_csv(self, df, path: str, **to_csv_kwargs: Any) -> bool:
+        to_csv_kwargs.setdefault("index", False)
+        return self.publish_text(path, df.to_csv(**to_csv_kwargs))
+
+    def publish_json(self, obj: Any, path: str, **dump_kwargs: Any) -> bool:
+        return self.publish_text(path, json.dumps(obj, **dump_kwargs))
+
+    def publish_file(self, tmp_path: str, path: str) -> bool:
+        """Publish an already-written temp file (streamed output): moved onto `path` if its content
+        differs, deleted otherwise."""
+        with open(tmp_path, "rb") as fh:
+            data = fh.read()
+        digest = canonical_digest(path, data)
+        with self._lock:
+            return self._publish_file(tmp_path, path, len(data), digest)
+
+    def _publish_file(self, tmp_path: str, path: str, size: int, digest: str) -> bool:
+        if digest == _file_digest(path):
+            os.remove(tmp_path)
+            self._record(path, digest, size, changed=False)
+            return False
+        os.replace(tmp_path, path)
+        self._record(path, digest, size, changed=True)
+        return True
+
+    def remove(self, path: str) -> bool:
+        """Unpublish an artifact that no longer exists in this run's output."""
+        with self._lock:
+            return self._remove(path)
+
+    def _remove(self, path: str) -> bool:
+        existed = os.path.exists(path)
+        if existed:
+            os.remove(path)
+        key = self._key(path)
+        if existed or key in self._load_manifest():
+            self.removed.append(key)
+            self._entries[key] = None
+        return existed
+
+    # -- manifest ----------------------------------------------------------------------------------
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        if self._on_disk is None:
+            self._on_disk = {}
+            if os.path.exists(self.manifest_path):
+                try:
+                    with open(self.manifest_path, encoding="utf-8") as fh:
+                        self._on_disk = json.load(fh).get("artifacts", {})
+                except (OSError, ValueError, AttributeError):
+                    logging.warning(f"Unreadable publish manifest {self.manifest_path}; rebuilding it")
+        return self._on_disk
+
+    def save(self) -> bool:
+        """Fold this run's changes into the manifest (re-read from disk, so several publishers in one
+        root can share it) and log a one-line summary. Returns True if the manifest was rewritten."""
+        with self._lock:
+            return self._save()
+
+    def _save(self) -> bool:
+        logging.info(f"[publish] {len(self.changed)} changed, {len(self.unchanged)} unchanged, "
+                     f"{len(self.removed)} removed artifacts under {self.root}")
+        if not self._entries:
+            return False
+        self._on_disk = None  # pick up entries another publisher saved since we first read it
+        artifacts = dict(self._load_manifest())
+        for key, entry in self._entries.items():
+            if entry is None:
+                artifacts.pop(key, None)
+            else:
+                artifacts[key] = entry
+        text = json.dumps({"version": 1, "artifacts": dict(sorted(artifacts.items()))}, indent=1)
+        os.makedirs(self.root or ".", exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.replace(tmp, self.manifest_path)
+        self._on_disk = artifacts
+        self._entries = {}
+        return True